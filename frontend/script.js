@@ -6,6 +6,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const langSwitchButton = document.getElementById('lang-switch');
 
     let projects = [];
+    let searchResults = null; // Server-ranked matches for the current query, or null when not searching
+    let searchTimer = null;
     let sortColumn = null;
     let sortDirection = 'asc';
     let currentLang = 'zh';
@@ -74,23 +76,70 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    function renderTable() {
-        const filteredProjects = projects
-            .filter(p => {
-                const searchLower = searchInput.value.toLowerCase();
-                const statusFilterValue = statusFilter.value;
-                const maturityFilterValue = maturityFilter.value;
+    async function searchProjects() {
+        const query = searchInput.value.trim();
+        if (!query) {
+            searchResults = null;
+            renderTable();
+            return;
+        }
+        try {
+            const response = await fetch(`/api/projects/search?q=${encodeURIComponent(query)}&limit=200`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const results = await response.json();
+            // Ignore responses that arrive after the user has kept typing
+            if (searchInput.value.trim() === query) {
+                searchResults = results;
+                renderTable();
+            }
+        } catch (error) {
+            console.error("Could not search projects:", error);
+        }
+    }
 
-                // Remove icon from filter value for correct matching
-                const cleanStatusFilter = statusFilterValue.split(' ').pop();
-                const cleanMaturityFilter = maturityFilterValue.split(' ').pop();
+    // Static options carry an icon prefix ("✅ 完成") that older records lack ("完成")
+    function matchesFilter(value, filterValue) {
+        return filterValue === '' || value === filterValue || value === filterValue.split(' ').pop();
+    }
 
-                return (
-                    (p.name.toLowerCase().includes(searchLower) || p.description.toLowerCase().includes(searchLower)) &&
-                    (cleanStatusFilter === '' || p.status === cleanStatusFilter) &&
-                    (cleanMaturityFilter === '' || p.maturity === cleanMaturityFilter)
-                );
+    function fillFilterOptions(select, counts) {
+        const selected = select.value;
+        const options = Object.entries(counts)
+            .filter(([value]) => value !== '')
+            .map(([value, count]) => {
+                const option = document.createElement('option');
+                option.value = value;
+                option.textContent = `${value} (${count})`;
+                return option;
             });
+        // Keep the translated "all" option in first place
+        select.replaceChildren(select.options[0], ...options);
+        select.value = [...select.options].some(o => o.value === selected) ? selected : '';
+    }
+
+    async function fetchFacets() {
+        try {
+            const response = await fetch('/api/projects/stats');
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const stats = await response.json();
+            fillFilterOptions(statusFilter, stats.by_status);
+            fillFilterOptions(maturityFilter, stats.by_maturity);
+        } catch (error) {
+            // The static options in index.html remain usable
+            console.error("Could not fetch project stats:", error);
+        }
+    }
+
+    function renderTable() {
+        const filteredProjects = (searchResults ?? projects)
+            .filter(p => (
+                matchesFilter(p.status, statusFilter.value) &&
+                matchesFilter(p.maturity, maturityFilter.value)
+            ));
         
         if (sortColumn) {
             filteredProjects.sort((a, b) => {
@@ -110,7 +159,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 <td>${p.status}</td>
                 <td>${p.description}</td>
                 <td>${p.source_url ? `<a href="${p.source_url}" target="_blank">🔗</a>` : '-'}</td>
-                <td>${p.created_date}</td>
+                <td>${p.created_date ?? '-'}</td>
             </tr>
         `).join('');
     }
@@ -128,7 +177,10 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     });
 
-    searchInput.addEventListener('input', renderTable);
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(searchProjects, 200);
+    });
     statusFilter.addEventListener('change', renderTable);
     maturityFilter.addEventListener('change', renderTable);
 
@@ -140,4 +192,5 @@ document.addEventListener('DOMContentLoaded', () => {
     // Initial load
     setLanguage(currentLang);
     fetchProjects();
+    fetchFacets();
 });
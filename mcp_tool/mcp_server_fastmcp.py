@@ -16,10 +16,20 @@ os.environ['no_proxy'] = '127.0.0.1,localhost'
 
 # 服务器配置
 API_BASE_URL = "http://127.0.0.1:8000"
+# /api/projects/search 单次最多返回的结果数（服务端上限）
+SEARCH_LIMIT = 200
 
 # 创建FastMCP服务器
 mcp = FastMCP("project-navigator")
 
+def format_possible_duplicates(result: Dict[str, Any]) -> str:
+    """导航服务标记的疑似重复项目（名称与描述高度相似）"""
+    duplicates = result.get("possible_duplicates") or []
+    if not duplicates:
+        return ""
+    lines = [f"- #{d['id']} {d['name']}（相似度 {d['similarity']:.0%}，{d['readme_path']}）" for d in duplicates]
+    return "\n\n⚠️ 可能与以下已有项目重复：\n" + "\n".join(lines)
+
 @mcp.tool()
 def add_project(
     name: str,
@@ -60,7 +70,7 @@ def add_project(
         response.raise_for_status()
         
         result = response.json()
-        return f"✅ 项目创建成功！\n\n项目ID: {result.get('id')}\n项目名称: {name}\n项目类型: {project_type}\n成熟度: {maturity}\n状态: {status}\nREADME路径: {readme_path}\n创建日期: {project_data['created_date']}"
+        return f"✅ 项目创建成功！\n\n项目ID: {result.get('id')}\n项目名称: {name}\n项目类型: {project_type}\n成熟度: {maturity}\n状态: {status}\nREADME路径: {readme_path}\n创建日期: {project_data['created_date']}" + format_possible_duplicates(result)
     except requests.exceptions.RequestException as e:
         return f"❌ 创建项目失败: {str(e)}"
 
@@ -109,26 +119,20 @@ def list_projects(
         return f"❌ 获取项目列表失败: {str(e)}"
 
 @mcp.tool()
-def search_projects(query: str) -> str:
-    """搜索项目记录
+def search_projects(query: str, limit: int = SEARCH_LIMIT) -> str:
+    """搜索项目记录，按相关度排序，最多返回 200 条
     
     Args:
         query: 搜索关键词
+        limit: 最多返回的结果数（1-200，默认 200）
     """
     try:
-        response = requests.get(f"{API_BASE_URL}/api/projects")
+        # 由服务端FTS5全文索引完成检索与BM25排序
+        limit = max(1, min(limit, SEARCH_LIMIT))
+        response = requests.get(f"{API_BASE_URL}/api/projects/search", params={"q": query, "limit": limit})
         response.raise_for_status()
         
-        projects = response.json()
-        query_lower = query.lower()
-        
-        # 简单的关键词搜索
-        filtered_projects = []
-        for project in projects:
-            if (query_lower in project["name"].lower() or 
-                query_lower in project["description"].lower() or
-                query_lower in project["project_type"].lower()):
-                filtered_projects.append(project)
+        filtered_projects = response.json()
         
         if not filtered_projects:
             return f"🔍 没有找到包含 '{query}' 的项目"
@@ -140,6 +144,8 @@ def search_projects(query: str) -> str:
             result += f"成熟度: {project['maturity']} | "
             result += f"状态: {project['status']}\n"
             result += f"   描述: {project['description'][:100]}{'...' if len(project['description']) > 100 else ''}\n\n"
+        if len(filtered_projects) == limit:
+            result += f"⚠️ 仅显示相关度最高的 {limit} 条结果，可使用更具体的关键词缩小范围\n"
         
         return result
     except requests.exceptions.RequestException as e:
@@ -167,6 +173,7 @@ def get_project(project_id: int) -> str:
         result += f"**描述**: {project['description']}\n"
         result += f"**README路径**: {project['readme_path']}\n"
         result += f"**创建日期**: {project['created_date']}\n"
+        result += f"**版本**: {project['version']}\n"
         
         return result
     except requests.exceptions.RequestException as e:
@@ -175,29 +182,29 @@ def get_project(project_id: int) -> str:
         return f"❌ 获取项目详情失败: {str(e)}"
 
 @mcp.tool()
-def update_project_status(project_id: int, new_status: str) -> str:
+def update_project_status(project_id: int, new_status: str, expected_version: int = 0) -> str:
     """更新项目状态
     
     Args:
         project_id: 项目ID
         new_status: 新状态 (✅ 完成, 🔍 研究中, 📋 规划中, 📚 已归档)
+        expected_version: 期望的项目版本（可选，见项目详情）；项目已被他人修改时不会覆盖
     """
     try:
-        # 先获取项目信息
-        get_response = requests.get(f"{API_BASE_URL}/api/projects/{project_id}")
-        get_response.raise_for_status()
-        project = get_response.json()
-        
-        # 更新状态
-        project["status"] = new_status
-        
-        update_response = requests.put(
-            f"{API_BASE_URL}/api/projects/{project_id}", 
-            json=project
+        # 一次条件写入：只提交status字段，由服务端按If-Match校验版本
+        headers = {"If-Match": f'"{expected_version}"'} if expected_version else {}
+        response = requests.patch(
+            f"{API_BASE_URL}/api/projects/{project_id}",
+            json={"status": new_status},
+            headers=headers
         )
-        update_response.raise_for_status()
+        if response.status_code == 412:
+            current_version = response.headers.get("ETag", "?").strip('"')
+            return f"❌ 项目 ID {project_id} 已被修改（当前版本 {current_version}），请重新获取后再更新"
+        response.raise_for_status()
+        project = response.json()
         
-        return f"✅ 项目状态更新成功！\n\n项目: {project['name']}\n新状态: {new_status}"
+        return f"✅ 项目状态更新成功！\n\n项目: {project['name']}\n新状态: {new_status}\n版本: {project['version']}"
     except requests.exceptions.RequestException as e:
         if "404" in str(e):
             return f"❌ 项目 ID {project_id} 不存在"
@@ -207,28 +214,15 @@ def update_project_status(project_id: int, new_status: str) -> str:
 def get_projects_summary() -> str:
     """获取项目导航系统的总体统计信息"""
     try:
-        response = requests.get(f"{API_BASE_URL}/api/projects")
+        # 统计信息由服务端计数表直接提供，无需下载全部项目
+        response = requests.get(f"{API_BASE_URL}/api/projects/stats")
         response.raise_for_status()
-        projects = response.json()
-        
-        # 统计信息
-        total = len(projects)
-        by_type = {}
-        by_maturity = {}
-        by_status = {}
+        stats = response.json()
         
-        for project in projects:
-            # 统计类型
-            ptype = project['project_type']
-            by_type[ptype] = by_type.get(ptype, 0) + 1
-            
-            # 统计成熟度
-            maturity = project['maturity']
-            by_maturity[maturity] = by_maturity.get(maturity, 0) + 1
-            
-            # 统计状态
-            status = project['status']
-            by_status[status] = by_status.get(status, 0) + 1
+        total = stats['total']
+        by_type = stats['by_type']
+        by_maturity = stats['by_maturity']
+        by_status = stats['by_status']
         
         summary = f"📊 项目导航系统概览\n\n"
         summary += f"总项目数: {total}\n\n"
@@ -30,6 +30,8 @@ os.environ['no_proxy'] = '127.0.0.1,localhost'
 
 # 服务器配置
 API_BASE_URL = "http://127.0.0.1:8000"
+# /api/projects/search 单次最多返回的结果数（服务端上限）
+SEARCH_LIMIT = 200
 SERVER_NAME = "project-navigator"
 SERVER_VERSION = "1.0.0"
 
@@ -103,13 +105,19 @@ async def handle_list_tools() -> List[Tool]:
         ),
         Tool(
             name="search_projects",
-            description="搜索项目记录",
+            description=f"搜索项目记录，按相关度排序，最多返回 {SEARCH_LIMIT} 条",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "query": {
                         "type": "string",
                         "description": "搜索关键词"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": f"最多返回的结果数（1-{SEARCH_LIMIT}，默认 {SEARCH_LIMIT}）",
+                        "minimum": 1,
+                        "maximum": SEARCH_LIMIT
                     }
                 },
                 "required": ["query"]
@@ -143,6 +151,10 @@ async def handle_list_tools() -> List[Tool]:
                         "type": "string",
                         "description": "新状态",
                         "enum": ["✅ 完成", "🔍 研究中", "📋 规划中", "📚 已归档"]
+                    },
+                    "expected_version": {
+                        "type": "integer",
+                        "description": "期望的项目版本（可选，见项目详情）；项目已被他人修改时不会覆盖"
                     }
                 },
                 "required": ["project_id", "new_status"]
@@ -169,6 +181,14 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
     except Exception as e:
         return [TextContent(type="text", text=f"执行工具 {name} 时出错: {str(e)}")]
 
+def format_possible_duplicates(project_data: Dict[str, Any]) -> str:
+    """导航服务标记的疑似重复项目（名称与描述高度相似）"""
+    duplicates = project_data.get("possible_duplicates") or []
+    if not duplicates:
+        return ""
+    lines = [f"- #{d['id']} {d['name']}（相似度 {d['similarity']:.0%}，{d['readme_path']}）" for d in duplicates]
+    return "\n\n⚠️ 可能与以下已有项目重复：\n" + "\n".join(lines)
+
 async def add_project(args: Dict[str, Any]) -> List[TextContent]:
     """添加项目"""
     # 如果没有提供readme_path，自动生成
@@ -194,6 +214,7 @@ async def add_project(args: Dict[str, Any]) -> List[TextContent]:
                  f"状态: {args['status']}\n"
                  f"README路径: {args['readme_path']}\n"
                  f"创建日期: {args['created_date']}"
+                 + format_possible_duplicates(project_data)
         )]
     except requests.exceptions.RequestException as e:
         return [TextContent(type="text", text=f"❌ 创建项目失败: {str(e)}")]
@@ -234,19 +255,12 @@ async def list_projects(args: Dict[str, Any]) -> List[TextContent]:
 async def search_projects(args: Dict[str, Any]) -> List[TextContent]:
     """搜索项目"""
     try:
-        response = requests.get(f"{API_BASE_URL}/api/projects")
+        # 由服务端FTS5全文索引完成检索与BM25排序
+        limit = max(1, min(int(args.get("limit") or SEARCH_LIMIT), SEARCH_LIMIT))
+        response = requests.get(f"{API_BASE_URL}/api/projects/search", params={"q": args["query"], "limit": limit})
         response.raise_for_status()
         
-        projects = response.json()
-        query = args["query"].lower()
-        
-        # 简单的关键词搜索
-        filtered_projects = []
-        for project in projects:
-            if (query in project["name"].lower() or 
-                query in project["description"].lower() or
-                query in project["project_type"].lower()):
-                filtered_projects.append(project)
+        filtered_projects = response.json()
         
         if not filtered_projects:
             return [TextContent(type="text", text=f"🔍 没有找到包含 '{args['query']}' 的项目")]
@@ -258,6 +272,8 @@ async def search_projects(args: Dict[str, Any]) -> List[TextContent]:
             result += f"成熟度: {project['maturity']} | "
             result += f"状态: {project['status']}\n"
             result += f"   描述: {project['description'][:100]}{'...' if len(project['description']) > 100 else ''}\n\n"
+        if len(filtered_projects) == limit:
+            result += f"⚠️ 仅显示相关度最高的 {limit} 条结果，可使用更具体的关键词缩小范围\n"
         
         return [TextContent(type="text", text=result)]
     except requests.exceptions.RequestException as e:
@@ -280,6 +296,7 @@ async def get_project(args: Dict[str, Any]) -> List[TextContent]:
         result += f"**描述**: {project['description']}\n"
         result += f"**README路径**: {project['readme_path']}\n"
         result += f"**创建日期**: {project['created_date']}\n"
+        result += f"**版本**: {project['version']}\n"
         
         return [TextContent(type="text", text=result)]
     except requests.exceptions.RequestException as e:
@@ -290,25 +307,29 @@ async def get_project(args: Dict[str, Any]) -> List[TextContent]:
 async def update_project_status(args: Dict[str, Any]) -> List[TextContent]:
     """更新项目状态"""
     try:
-        # 先获取项目信息
-        get_response = requests.get(f"{API_BASE_URL}/api/projects/{args['project_id']}")
-        get_response.raise_for_status()
-        project = get_response.json()
-        
-        # 更新状态
-        project["status"] = args["new_status"]
-        
-        update_response = requests.put(
-            f"{API_BASE_URL}/api/projects/{args['project_id']}", 
-            json=project
+        # 一次条件写入：只提交status字段，由服务端按If-Match校验版本
+        expected_version = args.get("expected_version")
+        headers = {"If-Match": f'"{expected_version}"'} if expected_version else {}
+        response = requests.patch(
+            f"{API_BASE_URL}/api/projects/{args['project_id']}",
+            json={"status": args["new_status"]},
+            headers=headers
         )
-        update_response.raise_for_status()
+        if response.status_code == 412:
+            current_version = response.headers.get("ETag", "?").strip('"')
+            return [TextContent(
+                type="text",
+                text=f"❌ 项目 ID {args['project_id']} 已被修改（当前版本 {current_version}），请重新获取后再更新"
+            )]
+        response.raise_for_status()
+        project = response.json()
         
         return [TextContent(
             type="text", 
             text=f"✅ 项目状态更新成功！\n\n"
                  f"项目: {project['name']}\n"
-                 f"新状态: {args['new_status']}"
+                 f"新状态: {args['new_status']}\n"
+                 f"版本: {project['version']}"
         )]
     except requests.exceptions.RequestException as e:
         if "404" in str(e):
@@ -338,28 +359,15 @@ async def handle_read_resource(uri: str) -> str:
     """读取资源"""
     if uri == "project://navigator/summary":
         try:
-            response = requests.get(f"{API_BASE_URL}/api/projects")
+            # 统计信息由服务端计数表直接提供，无需下载全部项目
+            response = requests.get(f"{API_BASE_URL}/api/projects/stats")
             response.raise_for_status()
-            projects = response.json()
-            
-            # 统计信息
-            total = len(projects)
-            by_type = {}
-            by_maturity = {}
-            by_status = {}
+            stats = response.json()
             
-            for project in projects:
-                # 统计类型
-                ptype = project['project_type']
-                by_type[ptype] = by_type.get(ptype, 0) + 1
-                
-                # 统计成熟度
-                maturity = project['maturity']
-                by_maturity[maturity] = by_maturity.get(maturity, 0) + 1
-                
-                # 统计状态
-                status = project['status']
-                by_status[status] = by_status.get(status, 0) + 1
+            total = stats['total']
+            by_type = stats['by_type']
+            by_maturity = stats['by_maturity']
+            by_status = stats['by_status']
             
             summary = f"📊 项目导航系统概览\n\n"
             summary += f"总项目数: {total}\n\n"
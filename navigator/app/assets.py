@@ -0,0 +1,94 @@
+"""
+Content-hashed URLs for the frontend assets.
+
+Pages reference assets as "/assets/style.<hash>.css", where <hash> is taken
+from the file's content. A hashed URL therefore never changes meaning, and
+it is served with `Cache-Control: immutable` so browsers stop revalidating
+it; editing the file changes its URL instead. Plain "/assets/style.css" URLs
+keep working, with `no-cache`.
+"""
+import hashlib
+import os
+import pathlib
+import re
+import stat
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+
+from . import compression, scanner
+
+FRONTEND_DIR = scanner.BASE_DIR.joinpath("frontend").resolve()
+URL_PREFIX = "/assets/"
+
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_HASHED_NAME_RE = re.compile(rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<suffix>\.[^./]+)$")
+_ASSET_REF_RE = re.compile(r'(?P<attr>href|src)="/assets/(?P<name>[^"?#]+)"')
+
+_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def content_hash(path: str, stat_result: os.stat_result) -> str:
+    """Short content hash of a file, recomputed only when its mtime or size changes."""
+    key = (stat_result.st_mtime_ns, stat_result.st_size)
+    entry = _hashes.get(path)
+    if entry is None or entry[0] != key:
+        with open(path, "rb") as f:
+            entry = (key, hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH])
+        _hashes[path] = entry
+    return entry[1]
+
+
+def asset_url(name: str, root: pathlib.Path = FRONTEND_DIR) -> str:
+    """Returns the content-hashed URL of a frontend asset ("style.css" -> "/assets/style.<hash>.css")."""
+    path = root / name
+    try:
+        digest = content_hash(str(path), path.stat())
+    except OSError:
+        return URL_PREFIX + name
+    stem, dot, suffix = name.rpartition(".")
+    if not dot:
+        return f"{URL_PREFIX}{name}.{digest}"
+    return f"{URL_PREFIX}{stem}.{digest}.{suffix}"
+
+
+def rewrite_asset_urls(html: str, root: pathlib.Path = FRONTEND_DIR) -> str:
+    """Points every href/src of the form "/assets/<name>" at the asset's hashed URL."""
+    return _ASSET_REF_RE.sub(lambda m: f'{m["attr"]}="{asset_url(m["name"], root)}"', html)
+
+
+def _unhashed_name(path: str) -> Optional[Tuple[str, str]]:
+    match = _HASHED_NAME_RE.match(path)
+    if match is None:
+        return None
+    return match["stem"] + match["suffix"], match["hash"]
+
+
+class FrontendAssets(compression.PrecompressedStaticFiles):
+    """
+    Serves the frontend directory under both plain and content-hashed names.
+    A hashed name whose hash matches the file is cached as immutable; a stale
+    hash (a page rendered before the file changed) still gets the current
+    file, but with `no-cache`.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        # StaticFiles checks the method itself, but only on the plain-name path.
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+        unhashed = _unhashed_name(path)
+        if unhashed is not None:
+            name, digest = unhashed
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, name)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                current = content_hash(os.fspath(full_path), stat_result) == digest
+                response.headers["Cache-Control"] = IMMUTABLE if current else "no-cache"
+                return response
+        response = await super().get_response(path, scope)
+        response.headers.setdefault("Cache-Control", "no-cache")
+        return response
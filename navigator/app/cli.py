@@ -1,13 +1,37 @@
 import typer
 from rich.prompt import Prompt, Confirm
 from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
 import requests
+import concurrent.futures
+import contextlib
 import datetime
+import json
+import os
+import pathlib
+import time
+from typing import List
+
+from . import scanner
 
 app = typer.Typer()
 console = Console()
 
+# Set by --direct: commands use crud on the database in process instead of
+# the API, so they work without a running server. The server stack
+# (SQLAlchemy, pydantic, app.crud, ...) is only imported on that path: the
+# navigator-admin distribution at the repository root installs just typer,
+# requests and rich.
+direct_mode = False
+_direct_sessions = None
+_direct_index_loaded = False
+
 API_URL = "http://127.0.0.1:8000/api/projects"
+BULK_API_URL = f"{API_URL}/bulk"
+EXPORT_API_URL = f"{API_URL}/export"
+
+# Fields of a bulk upsert record (`schemas.ProjectBulkItem`).
+BULK_FIELDS = ("name", "project_type", "maturity", "status", "description", "readme_path", "source_url", "created_date")
 
 def create_project_interactive():
     name = Prompt.ask("Enter project name")
@@ -52,6 +76,89 @@ def create_project_interactive():
 
     return project_data
 
+@app.callback()
+def options(
+    direct: bool = typer.Option(False, "--direct", help="Write to the database in process instead of through the API (no server needed)."),
+):
+    global direct_mode
+    if direct:
+        try:
+            import sqlalchemy  # noqa: F401
+        except ImportError:
+            console.print("[bold red]✖ --direct needs the server's dependencies:[/bold red] pip install -e navigator")
+            raise typer.Exit(code=1)
+    direct_mode = direct
+
+@contextlib.contextmanager
+def direct_session():
+    """
+    A session on `database.make_direct_engine()`, safe to use next to a live
+    server. The schema and derived indexes are brought up to date first, as
+    at server startup, except the duplicate index: writes sign only the rows
+    they touch, and `add` loads the stored signatures when it needs them.
+    """
+    from sqlalchemy.orm import sessionmaker
+    from . import database, search, stats
+
+    global _direct_sessions
+    if _direct_sessions is None:
+        engine = database.make_direct_engine()
+        database.init_db(engine)
+        search.init_search_index(engine)
+        stats.init_facet_counts(engine)
+        _direct_sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = _direct_sessions()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def destination(url: str = API_URL) -> str:
+    if not direct_mode:
+        return url
+    from . import database
+    return database.DATABASE_URL
+
+def validate(schema, data):
+    """Validates records like the API would, exiting with the errors if they don't fit `schema`."""
+    from pydantic import TypeAdapter, ValidationError
+
+    try:
+        return TypeAdapter(schema).validate_python(data)
+    except ValidationError as e:
+        console.print(f"\n[bold red]✖ Invalid project data:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+class ProjectExists(Exception):
+    """A project with the same readme_path is already in the catalog (direct mode)."""
+
+def create_project(project_data: dict) -> dict:
+    """Creates one project and returns it shaped like the API's response (`schemas.ProjectCreated`)."""
+    if not direct_mode:
+        response = requests.post(API_URL, json=project_data)
+        response.raise_for_status()
+        return response.json()
+    from sqlalchemy.exc import IntegrityError
+    from . import crud, duplicates, schemas
+
+    global _direct_index_loaded
+    project = validate(schemas.ProjectCreate, project_data)
+    with direct_session() as db:
+        if not _direct_index_loaded:
+            # For the duplicate check: load what is stored, without the
+            # server's O(catalog) signing pass over stale projects.
+            duplicates.init_duplicate_index(db.get_bind(), sign=False)
+            _direct_index_loaded = True
+        try:
+            db_project = crud.create_project(db, project)
+        except IntegrityError:
+            raise ProjectExists(project.readme_path)
+        created = schemas.ProjectCreated(
+            **schemas.Project.model_validate(db_project).model_dump(),
+            possible_duplicates=crud.find_possible_duplicates(db, db_project),
+        )
+    return created.model_dump(mode="json")
+
 @app.command()
 def add():
     """Add a new project interactively."""
@@ -63,12 +170,169 @@ def add():
 
     if Confirm.ask("\nDo you want to create this project?"):
         try:
-            response = requests.post(API_URL, json=project_data)
-            response.raise_for_status()
+            created = create_project(project_data)
             console.print("\n[bold green]✔ Project created successfully![/bold green]")
-            console.print(response.json())
+            possible_duplicates = created.pop("possible_duplicates", [])
+            console.print(created)
+            if possible_duplicates:
+                console.print("\n[bold yellow]⚠ This looks like an existing project:[/bold yellow]")
+                for duplicate in possible_duplicates:
+                    console.print(
+                        f"  #{duplicate['id']} {duplicate['name']} "
+                        f"({duplicate['similarity']:.0%} similar, {duplicate['readme_path']})"
+                    )
         except requests.exceptions.RequestException as e:
             console.print(f"\n[bold red]✖ Error creating project:[/bold red] {e}")
+        except ProjectExists:
+            console.print(f"\n[bold red]✖ Error creating project:[/bold red] readme_path '{project_data['readme_path']}' already exists.")
+
+def send_bulk(records) -> dict:
+    """
+    Upserts project records, through the bulk endpoint or in direct mode
+    with `crud.bulk_upsert_projects` (one transaction), and returns the
+    summary shaped like the endpoint's response.
+    """
+    if not direct_mode:
+        response = requests.post(BULK_API_URL, json=records)
+        response.raise_for_status()
+        return response.json()
+    from . import crud, schemas
+
+    projects = validate(List[schemas.ProjectBulkItem], records)
+    with direct_session() as db:
+        results = crud.bulk_upsert_projects(db, projects)
+    return crud.summarize_bulk_results(results).model_dump(mode="json")
+
+def post_bulk(records):
+    """Upserts project records and prints a summary."""
+    try:
+        summary = send_bulk(records)
+    except requests.exceptions.RequestException as e:
+        console.print(f"\n[bold red]✖ Bulk import failed:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
+    for row in summary["results"]:
+        if row["outcome"] == "error":
+            console.print(f"[red]✖ {row['readme_path']}:[/red] {row['detail']}")
+    console.print(
+        f"\n[bold green]✔ Bulk import finished:[/bold green] "
+        f"{summary['created']} created, {summary['updated']} updated, "
+        f"{summary['unchanged']} unchanged, {summary['errors']} failed."
+    )
+    return summary
+
+@app.command()
+def bulk(file: pathlib.Path = typer.Argument(..., exists=True, dir_okay=False, help="JSON file containing a list of projects.")):
+    """Create or update many projects from a JSON file in one request."""
+    records = json.loads(file.read_text(encoding="utf-8"))
+    if not isinstance(records, list):
+        console.print("[bold red]✖ Expected a JSON list of projects.[/bold red]")
+        raise typer.Exit(code=1)
+    console.print(f"Sending [cyan]{len(records)}[/cyan] projects to {destination(BULK_API_URL)}...")
+    post_bulk(records)
+
+def scan_project_folder(folder: pathlib.Path):
+    """The record described by a folder's README (None without one) and how many tracked files it has."""
+    files = sum(1 for path in folder.iterdir() if path.is_file() and scanner.is_tracked_file(path.name))
+    return scanner.describe_project(folder), files
+
+def scan_projects(root: pathlib.Path, workers: int):
+    """
+    Reads every project folder under `root` in a thread pool, showing a
+    progress bar. Returns the records found (by readme_path), the number of
+    files scanned and the seconds taken.
+    """
+    folders = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    records, files = {}, 0
+    start = time.perf_counter()
+    columns = (
+        TextColumn("Scanning"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(),
+        TextColumn("{task.fields[files]} files, {task.fields[rate]:.0f} files/s"),
+    )
+    with Progress(*columns, console=console) as progress:
+        task = progress.add_task("scan", total=len(folders), files=0, rate=0.0)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in concurrent.futures.as_completed([pool.submit(scan_project_folder, f) for f in folders]):
+                record, count = future.result()
+                files += count
+                if record is not None:
+                    records[record["readme_path"]] = record
+                elapsed = time.perf_counter() - start
+                progress.update(task, advance=1, files=files, rate=files / elapsed if elapsed else 0.0)
+    return records, files, time.perf_counter() - start
+
+def fetch_catalog():
+    """The current catalog from the streaming export (or the database), keyed by canonical readme_path."""
+    if direct_mode:
+        from . import crud
+
+        with direct_session() as db:
+            rows = [row._asdict() for batch in crud.iter_project_batches(db) for row in batch]
+        return {scanner.canonical_readme_path(row["readme_path"]): row for row in rows}
+    try:
+        response = requests.get(EXPORT_API_URL, params={"format": "ndjson"}, stream=True)
+        response.raise_for_status()
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+    except requests.exceptions.RequestException as e:
+        console.print(f"\n[bold red]✖ Could not read the catalog:[/bold red] {e}")
+        raise typer.Exit(code=1)
+    return {scanner.canonical_readme_path(row["readme_path"]): row for row in rows}
+
+def diff_catalog(scanned: dict, catalog: dict, overwrite: bool = False):
+    """
+    Compares scanned records with the catalog and returns (records to send,
+    {readme_path: changed fields}). Folders missing from the catalog are
+    new. For known projects, a README only fills in an empty description or
+    a name that is still the folder name, unless `overwrite` is set, since
+    catalog names and descriptions are usually edited by hand.
+    """
+    records, changes = [], {}
+    for readme_path, record in sorted(scanned.items()):
+        current = catalog.get(readme_path)
+        if current is None:
+            records.append(record)
+            changes[readme_path] = ["new"]
+            continue
+        slug = readme_path.split("/")[1]
+        changed = [
+            field for field in ("name", "description")
+            if record[field] and record[field] != current[field]
+            and (overwrite or not current[field] or (field == "name" and current[field] == slug))
+        ]
+        if changed:
+            # Sent as a full record under the stored readme_path spelling, so
+            # the bulk upsert matches the existing row and keeps its other fields.
+            update = {field: current[field] for field in BULK_FIELDS}
+            update.update({field: record[field] for field in changed})
+            records.append(update)
+            changes[readme_path] = changed
+    return records, changes
+
+@app.command("import")
+def import_projects(
+    directory: pathlib.Path = typer.Argument(scanner.PROJECTS_DIR, exists=True, file_okay=False, help="Folder holding one sub-folder per project."),
+    workers: int = typer.Option(min(32, (os.cpu_count() or 1) * 4), min=1, help="Threads reading project folders."),
+    overwrite: bool = typer.Option(False, help="Replace catalog names and descriptions with the READMEs' ones."),
+    dry_run: bool = typer.Option(False, help="Show the changes without sending them."),
+):
+    """Scan project folders and bulk-upsert new or changed projects."""
+    scanned, files, seconds = scan_projects(directory, workers)
+    console.print(
+        f"Scanned [cyan]{len(scanned)}[/cyan] projects ({files} files) in {seconds:.2f}s "
+        f"([cyan]{files / seconds if seconds else 0:.0f}[/cyan] files/s)."
+    )
+    records, changes = diff_catalog(scanned, fetch_catalog(), overwrite=overwrite)
+    if not records:
+        console.print("[bold green]✔ The catalog is up to date.[/bold green]")
+        return
+    for readme_path, fields in changes.items():
+        label = "[green]+ new[/green]" if fields == ["new"] else f"[yellow]~ {', '.join(fields)}[/yellow]"
+        console.print(f"  {label} {readme_path}")
+    if dry_run:
+        console.print(f"\nDry run: {len(records)} projects would be sent.")
+        return
+    console.print(f"\nSending [cyan]{len(records)}[/cyan] projects to {destination(BULK_API_URL)}...")
+    post_bulk(records)
 
 @app.command()
 def hello():
@@ -0,0 +1,325 @@
+"""
+Response compression (gzip, and brotli when the `brotli` package is
+installed: pip install "nav-admin[compression]").
+
+Dynamic responses such as JSON lists and exports are compressed on the fly
+by `CompressionMiddleware`, when the client accepts it, the content type is
+textual and the body is at least `MIN_SIZE` bytes. Bytes that are served
+over and over, the frontend assets and rendered /view pages, are compressed
+once (at maximum quality) and then sent as stored bytes; the middleware
+passes through any response that already has a Content-Encoding.
+
+Every response is tallied per route (see `stats`), so the bytes saved can
+be read from /api/compression/stats.
+"""
+import gzip
+import os
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional dependency; fall back to gzip only.
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the saving would not pay
+# for the extra header bytes and CPU time.
+MIN_SIZE = int(os.environ.get("NAVIGATOR_COMPRESS_MIN_BYTES", 512))
+
+# On-the-fly compression favours speed; stored variants are compressed once
+# and can afford the slowest, smallest settings.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+GZIP_LEVEL_STORED = 9
+BROTLI_QUALITY_STORED = 11
+
+# In order of preference when a client accepts several equally.
+CODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Picks the content coding to send for an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best = None
+    for coding in CODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+def compress(body: bytes, coding: str, stored: bool = False) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY_STORED if stored else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL_STORED if stored else GZIP_LEVEL, mtime=0)
+
+
+def precompress(body: bytes, stored: bool = True) -> Dict[str, bytes]:
+    """Returns {coding: compressed body} for every coding that actually makes `body` smaller."""
+    if len(body) < MIN_SIZE:
+        return {}
+    variants = {}
+    for coding in CODINGS:
+        data = compress(body, coding, stored=stored)
+        if len(data) < len(body):
+            variants[coding] = data
+    return variants
+
+
+def variant_etag(etag: str, coding: Optional[str]) -> str:
+    """Each encoding is a different representation, so it gets its own strong ETag."""
+    if coding is None or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk, so streams stay live."""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.coding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+# --- Bytes saved per route ---
+
+class CompressionStats:
+    """Thread-safe per-route tally of response bytes before and after compression."""
+
+    def __init__(self):
+        self._routes: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, identity_bytes: int, sent_bytes: int):
+        with self._lock:
+            counts = self._routes.setdefault(route, [0, 0, 0, 0])
+            counts[0] += 1
+            counts[1] += sent_bytes < identity_bytes
+            counts[2] += identity_bytes
+            counts[3] += sent_bytes
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                route: {
+                    "responses": responses,
+                    "compressed": compressed,
+                    "bytes_in": bytes_in,
+                    "bytes_out": bytes_out,
+                    "bytes_saved": bytes_in - bytes_out,
+                }
+                for route, (responses, compressed, bytes_in, bytes_out) in sorted(self._routes.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+stats = CompressionStats()
+
+
+def route_label(scope, fallback: Optional[str] = None) -> str:
+    """
+    The matched route's path template ("/view/{file_path:path}", "/assets"),
+    else `fallback`, else the raw path.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (the /assets static files) leave only their prefix behind.
+    mount_path = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+    return mount_path or fallback or scope["path"]
+
+
+# --- On-the-fly compression ---
+
+class CompressionMiddleware:
+    """
+    Compresses textual responses of at least `minimum_size` bytes with the
+    best coding the client accepts. Streamed responses are compressed chunk
+    by chunk. Responses that already carry a Content-Encoding are passed
+    through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        start = None
+        compressor: Optional[_StreamCompressor] = None
+        tally = [0, 0]  # identity bytes, sent bytes
+        record = True
+
+        async def send_compressed(message):
+            nonlocal start, compressor, record
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                # Other extensions (e.g. pathsend) go out as they are.
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                compressible = (
+                    is_compressible(headers.get("content-type"))
+                    and "content-encoding" not in headers
+                    and start["status"] not in (204, 206, 304)
+                )
+                if "content-encoding" in headers:
+                    record = False  # Stored variants are tallied where they are chosen.
+                if compressible and "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if compressible and coding is not None:
+                    if more_body:
+                        compressor = _StreamCompressor(coding)
+                        del headers["content-length"]
+                        headers["Content-Encoding"] = coding
+                    elif len(body) >= self.minimum_size:
+                        data = compress(body, coding)
+                        if len(data) < len(body):
+                            headers["Content-Encoding"] = coding
+                            headers["Content-Length"] = str(len(data))
+                            tally[0] += len(body)
+                            tally[1] += len(data)
+                            await send(start)
+                            start = None
+                            await send({"type": "http.response.body", "body": data})
+                            stats.record(route_label(scope), *tally)
+                            return
+                await send(start)
+                start = None
+
+            tally[0] += len(body)
+            if compressor is not None:
+                body = compressor.compress(body)
+                if not more_body:
+                    body += compressor.finish()
+                message = {"type": "http.response.body", "body": body, "more_body": more_body}
+            tally[1] += len(body)
+            await send(message)
+            if not more_body and record:
+                stats.record(route_label(scope), *tally)
+
+        await self.app(scope, receive, send_compressed)
+
+
+# --- Stored variants of static files ---
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    `StaticFiles` that answers with stored gzip/brotli variants of textual
+    files. Variants are built by `precompress_all()` at startup and rebuilt
+    when a file's mtime or size changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._variants: Dict[str, Tuple[Tuple[int, int], Dict[str, bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def _stored_variants(self, full_path: str, stat_result: os.stat_result) -> Dict[str, bytes]:
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            entry = self._variants.get(full_path)
+        if entry is None or entry[0] != key:
+            with open(full_path, "rb") as f:
+                entry = (key, precompress(f.read()))
+            with self._lock:
+                self._variants[full_path] = entry
+        return entry[1]
+
+    def precompress_all(self) -> Tuple[int, int, int]:
+        """Builds the variants of every textual file; returns (files, bytes, smallest stored bytes)."""
+        files = identity_bytes = stored_bytes = 0
+        for directory in self.all_directories:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    full_path = os.path.realpath(os.path.join(root, name))
+                    response = FileResponse(full_path)
+                    if not is_compressible(response.media_type):
+                        continue
+                    stat_result = os.stat(full_path)
+                    variants = self._stored_variants(full_path, stat_result)
+                    files += 1
+                    identity_bytes += stat_result.st_size
+                    stored_bytes += min((len(v) for v in variants.values()), default=stat_result.st_size)
+        return files, identity_bytes, stored_bytes
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        request_headers = Headers(scope=scope)
+        compressible = is_compressible(response.media_type)
+        if compressible:
+            response.headers.add_vary_header("Accept-Encoding")
+        # Range requests keep the FileResponse, which serves the identity bytes partially.
+        if compressible and "range" not in request_headers:
+            coding = negotiate(request_headers.get("accept-encoding"))
+            variant = self._stored_variants(os.fspath(full_path), stat_result).get(coding)
+            if variant is not None:
+                headers = dict(response.headers)
+                headers["content-encoding"] = coding
+                headers["content-length"] = str(len(variant))
+                headers["etag"] = variant_etag(headers["etag"], coding)
+                response = Response(variant, status_code=status_code, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        if "content-encoding" in response.headers:
+            stats.record(route_label(scope), stat_result.st_size, len(response.body))
+        return response
@@ -1,15 +1,432 @@
+import base64
+import datetime
+import json
+from typing import Optional
+
+from sqlalchemy import and_, case, false, func, or_, select, text, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import duplicates, links, models, scanner, schemas, search, stats
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit.
+IN_CHUNK_SIZE = 500
+
+# Columns the list endpoint may sort on. Every sort is made total by adding
+# the primary key as a tie-breaker, which is what keyset pagination needs.
+SORTABLE_COLUMNS = {
+    "created_date": models.Project.created_date,
+    "name": models.Project.name,
+    "id": models.Project.id,
+}
+
+def encode_cursor(sort: str, project: models.Project) -> str:
+    """Builds an opaque cursor pointing just past `project` in `sort` order."""
+    value = getattr(project, sort)
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    raw = json.dumps([value, project.id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(sort: str, cursor: str):
+    """Inverse of `encode_cursor`; raises ValueError on malformed input."""
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if sort == "created_date" and value is not None:
+            value = datetime.date.fromisoformat(value)
+        return value, int(last_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
 
 def get_project(db: Session, project_id: int):
     return db.query(models.Project).filter(models.Project.id == project_id).first()
 
-def get_projects(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Project).offset(skip).limit(limit).all()
+def keyset_after(sort_column, id_column, value, last_id: int, descending: bool):
+    """
+    The condition selecting rows after (`value`, `last_id`) in (`sort_column`,
+    id) order. SQLite sorts NULLs first ascending and last descending, and a
+    row-value comparison with NULL is never true, so NULL sort values (e.g.
+    projects imported without a created_date) get their own branch.
+    """
+    if value is None:
+        after_in_nulls = and_(sort_column.is_(None), id_column < last_id if descending else id_column > last_id)
+        return after_in_nulls if descending else or_(after_in_nulls, sort_column.is_not(None))
+    # Row-value comparison lets SQLite seek straight into the index.
+    key = tuple_(sort_column, id_column)
+    return or_(key < (value, last_id), sort_column.is_(None)) if descending else key > (value, last_id)
+
+def projects_statement(
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    project_type: Optional[str] = None,
+    maturity: Optional[str] = None,
+    status: Optional[str] = None,
+    sort: str = "created_date",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    columns=None,
+):
+    """
+    Builds the SELECT behind `get_projects`, shared by the sync and async
+    code paths. Projects are ordered by (`sort`, id). Pass `columns` to
+    select plain rows instead of ORM objects.
+
+    When `cursor` is given the page starts right after the row it encodes
+    (keyset pagination) and `skip` is ignored, so deep pages cost the same
+    as the first one.
+    """
+    if sort not in SORTABLE_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort!r}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort order: {order!r}")
+
+    stmt = select(*columns) if columns is not None else select(models.Project)
+    if project_type is not None:
+        stmt = stmt.where(models.Project.project_type == project_type)
+    if maturity is not None:
+        stmt = stmt.where(models.Project.maturity == maturity)
+    if status is not None:
+        stmt = stmt.where(models.Project.status == status)
+
+    sort_column = SORTABLE_COLUMNS[sort]
+    id_column = models.Project.id
+    descending = order == "desc"
+
+    if cursor is not None:
+        value, last_id = decode_cursor(sort, cursor)
+        if sort == "id":
+            stmt = stmt.where(id_column < last_id if descending else id_column > last_id)
+        else:
+            stmt = stmt.where(keyset_after(sort_column, id_column, value, last_id, descending))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    if sort == "id":
+        stmt = stmt.order_by(id_column.desc() if descending else id_column.asc())
+    elif descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+
+    return stmt.limit(limit)
+
+def get_projects(db: Session, **filters):
+    """Lists projects; see `projects_statement` for the accepted filters."""
+    return db.scalars(projects_statement(**filters)).all()
+
+# Columns of `schemas.Project`, in its field order, for the plain-row path.
+PROJECT_ROW_COLUMNS = [models.Project.__table__.c[name] for name in schemas.Project.model_fields]
+
+def get_project_rows(db: Session, **filters):
+    """
+    Same as `get_projects`, but returns lightweight Core rows shaped like
+    `schemas.Project` (use `row._asdict()`), skipping ORM object construction.
+    """
+    return db.execute(projects_statement(columns=PROJECT_ROW_COLUMNS, **filters)).all()
+
+# Rows read from the cursor at a time when streaming an export.
+EXPORT_BATCH_SIZE = 1000
+
+def iter_project_batches(db: Session, batch_size: int = EXPORT_BATCH_SIZE, **filters):
+    """
+    Yields every project matching `filters` (no paging) as lists of Core
+    rows shaped like `schemas.Project`. The result is consumed with
+    `yield_per`, so only `batch_size` rows are held in memory at once.
+    """
+    stmt = projects_statement(columns=PROJECT_ROW_COLUMNS, limit=None, **filters)
+    result = db.execute(stmt, execution_options={"yield_per": batch_size})
+    yield from result.partitions()
+
+def search_projects(db: Session, query: str, limit: int = 20):
+    """
+    Full-text searches projects, best match first.
+
+    Returns (project, score) pairs where a higher score is a better match.
+    """
+    match = search.build_match_query(query)
+    if match is None:
+        return []
+    weights = ", ".join(str(w) for w in search.BM25_WEIGHTS)
+    hits = db.execute(
+        text(
+            f"SELECT rowid, bm25({search.FTS_TABLE}, {weights}) AS rank "
+            f"FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH :match "
+            "ORDER BY rank LIMIT :limit"
+        ),
+        {"match": match, "limit": limit},
+    ).all()
+    if not hits:
+        return []
+    projects = {
+        p.id: p
+        for p in db.query(models.Project).filter(models.Project.id.in_([hit.rowid for hit in hits]))
+    }
+    return [(projects[hit.rowid], -hit.rank) for hit in hits if hit.rowid in projects]
+
+def get_similar_projects(db: Session, index, project_id: int, limit: int = 10):
+    """
+    The projects most similar to one project by TF-IDF cosine similarity
+    (see `similarity`), as (project, score) pairs, best first. Returns None
+    if the project does not exist; raises `similarity.NotIndexed` if it was
+    added after the index was built.
+    """
+    project = get_project(db, project_id)
+    if project is None:
+        return None
+    hits = index.similar_to(project, limit)
+    if not hits:
+        return []
+    projects = {
+        p.id: p
+        for p in db.query(models.Project).filter(models.Project.id.in_([project_id for project_id, _ in hits]))
+    }
+    # Projects deleted since the index was built are skipped.
+    return [(projects[hit_id], score) for hit_id, score in hits if hit_id in projects]
+
+def _possible_duplicates_statement(project):
+    """The lookup of a project's likely duplicates (see `duplicates`), or None if it has none."""
+    hits = {hit.project_id: hit.similarity for hit in duplicates.find_duplicates(project)}
+    if not hits:
+        return None, hits
+    table = models.Project.__table__
+    return select(table.c.id, table.c.name, table.c.readme_path).where(table.c.id.in_(list(hits))), hits
+
+def _possible_duplicates(rows, hits):
+    # Projects deleted since they were indexed are skipped.
+    found = [schemas.PossibleDuplicate(id=row.id, name=row.name, readme_path=row.readme_path, similarity=hits[row.id]) for row in rows]
+    return sorted(found, key=lambda d: (-d.similarity, d.id))
+
+def find_possible_duplicates(db: Session, project):
+    """
+    Existing projects whose name and description look like this one's, most
+    similar first, found through the in-memory LSH index rather than a scan.
+    """
+    stmt, hits = _possible_duplicates_statement(project)
+    return _possible_duplicates(db.execute(stmt), hits) if stmt is not None else []
+
+def get_project_stats(db: Session):
+    """Faceted project counts, read from the trigger-maintained counter table."""
+    counts = stats.read_counts(db)
+    return schemas.ProjectStats(
+        total=counts["total"],
+        by_type=counts["project_type"],
+        by_maturity=counts["maturity"],
+        by_status=counts["status"],
+    )
 
 def create_project(db: Session, project: schemas.ProjectCreate):
     db_project = models.Project(**project.model_dump())
     db.add(db_project)
     db.commit()
     db.refresh(db_project)
-    return db_project 
\ No newline at end of file
+    return db_project
+
+class VersionMismatch(Exception):
+    """A conditional update expected a version the project no longer has."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Project is at version {current_version}.")
+        self.current_version = current_version
+
+def update_project(db: Session, project_id: int, values: dict, expected_version: Optional[int] = None):
+    """
+    Updates the given fields of a project and bumps its version if anything
+    changed, in a single UPDATE ... RETURNING statement. With `expected_version`, the update only
+    applies if the project is still at that version (optimistic concurrency).
+
+    Returns the updated row shaped like `schemas.Project`, or None if the
+    project does not exist. Raises `VersionMismatch` on a version conflict.
+    """
+    table = models.Project.__table__
+    # Only a real change moves the version; writing back identical values doesn't.
+    changed = or_(*(table.c[field].is_distinct_from(value) for field, value in values.items())) if values else false()
+    stmt = (
+        table.update()
+        .where(table.c.id == project_id)
+        .values(**values, version=case((changed, table.c.version + 1), else_=table.c.version))
+        .returning(*PROJECT_ROW_COLUMNS)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(table.c.version == expected_version)
+    row = db.execute(stmt).first()
+    if row is None:
+        current_version = db.execute(select(table.c.version).where(table.c.id == project_id)).scalar()
+        db.rollback()
+        if current_version is None:
+            return None
+        raise VersionMismatch(current_version)
+    # Core statements bypass the ORM hooks that maintain the search index
+    # and the duplicate signatures.
+    search.index_projects(db.connection(), [row])
+    duplicates.store_signatures(db.connection(), [row])
+    db.commit()
+    return row
+
+def _rows_by_readme_path(db: Session, readme_paths):
+    table = models.Project.__table__
+    rows = {}
+    for i in range(0, len(readme_paths), IN_CHUNK_SIZE):
+        chunk = readme_paths[i:i + IN_CHUNK_SIZE]
+        for row in db.execute(select(table).where(table.c.readme_path.in_(chunk))):
+            rows[row.readme_path] = row
+    return rows
+
+def find_projects_by_readme(connection, readme_paths, *columns):
+    """
+    Maps canonical readme paths ("ideaed-projects/<slug>/README.md") to the
+    stored project rows, tolerating legacy path spellings: "./"-prefixed,
+    absolute and Windows paths. Selects `columns`, which must include readme_path.
+    """
+    table = models.Project.__table__
+    rows = {}
+    candidates = {}
+    for path in readme_paths:
+        candidates[path] = path
+        candidates[f"./{path}"] = path
+    for i in range(0, len(candidates), IN_CHUNK_SIZE):
+        chunk = list(candidates)[i:i + IN_CHUNK_SIZE]
+        for row in connection.execute(select(*columns).where(table.c.readme_path.in_(chunk))):
+            rows[candidates[row.readme_path]] = row
+    # Rows written with absolute (often Windows) paths only match on suffix.
+    missing = set(readme_paths) - rows.keys()
+    if missing:
+        normalized = func.replace(table.c.readme_path, "\\", "/")
+        stmt = select(*columns).where(or_(normalized.in_(missing), *(normalized.like(f"%/{path}") for path in missing)))
+        for row in connection.execute(stmt):
+            path = scanner.canonical_readme_path(row.readme_path)
+            if path in missing:
+                rows.setdefault(path, row)
+    return rows
+
+def get_related_projects(db: Session, project_id: int):
+    """
+    The link neighbourhood of a project, from the precomputed link graph:
+    links out of and into its folder and the projects two hops away.
+    Returns None if the project does not exist.
+    """
+    table = models.Project.__table__
+    readme_path = db.execute(select(table.c.readme_path).where(table.c.id == project_id)).scalar()
+    if readme_path is None:
+        return None
+    canonical = scanner.canonical_readme_path(readme_path)
+    slug = links.project_of(canonical) if canonical else None
+    if slug is None:
+        return schemas.RelatedProjects(project_id=project_id, outgoing=[], incoming=[], two_hop=[])
+
+    hood = links.neighbourhood(db, slug)
+    slugs = {row.target_project for row in hood.outgoing if row.target_project}
+    slugs |= {row.source_project for row in hood.incoming} | hood.two_hop.keys()
+    readme_paths = {f"{scanner.PROJECTS_DIR.name}/{s}/{scanner.README_NAME}": s for s in slugs}
+    found = find_projects_by_readme(db, list(readme_paths), table.c.id, table.c.name, table.c.readme_path)
+
+    def ref(project_slug):
+        if project_slug is None:
+            return None
+        row = found.get(f"{scanner.PROJECTS_DIR.name}/{project_slug}/{scanner.README_NAME}")
+        return schemas.ProjectRef(slug=project_slug, id=row.id if row else None, name=row.name if row else None)
+
+    def link(row, project_slug):
+        return schemas.ProjectLink(source_path=row.source_path, target=row.target, text=row.text, project=ref(project_slug))
+
+    two_hop = sorted(hood.two_hop.items(), key=lambda item: (-len(item[1]), item[0]))
+    return schemas.RelatedProjects(
+        project_id=project_id,
+        outgoing=[link(row, row.target_project) for row in hood.outgoing],
+        incoming=[link(row, row.source_project) for row in hood.incoming],
+        two_hop=[schemas.TwoHopProject(project=ref(s), via=via) for s, via in two_hop],
+    )
+
+def bulk_upsert_projects(db: Session, projects):
+    """
+    Inserts or updates many projects, matched on readme_path, in a single
+    transaction using one executemany upsert.
+
+    Returns a `schemas.BulkRowResult` per input row, in input order. Rows
+    whose readme_path repeats an earlier row of the same batch are rejected.
+    """
+    table = models.Project.__table__
+    fields = [c.name for c in table.columns if c.name not in ("id", "version")]
+    results = [None] * len(projects)
+    pending = {}
+    for index, project in enumerate(projects):
+        if project.readme_path in pending:
+            results[index] = schemas.BulkRowResult(
+                index=index, readme_path=project.readme_path, outcome="error",
+                detail="Duplicate readme_path earlier in this batch.",
+            )
+        else:
+            pending[project.readme_path] = (index, project)
+
+    existing = _rows_by_readme_path(db, list(pending))
+    today = datetime.date.today()
+    params = []
+    for readme_path, (index, project) in pending.items():
+        values = project.model_dump()
+        current = existing.get(readme_path)
+        if values["created_date"] is None:
+            values["created_date"] = current.created_date if current is not None else today
+        if current is None:
+            outcome = "created"
+        elif any(getattr(current, f) != values[f] for f in fields):
+            outcome = "updated"
+        else:
+            outcome = "unchanged"
+        results[index] = schemas.BulkRowResult(
+            index=index, readme_path=readme_path, outcome=outcome,
+            id=current.id if current is not None else None,
+        )
+        if outcome != "unchanged":
+            params.append(values)
+
+    if params:
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.readme_path],
+            set_={f: stmt.excluded[f] for f in fields if f != "readme_path"},
+        )
+        db.execute(stmt, params)
+        written = _rows_by_readme_path(db, [p["readme_path"] for p in params])
+        # Core statements bypass the ORM hooks that maintain the search index
+        # and the duplicate signatures.
+        search.index_projects(db.connection(), written.values())
+        duplicates.store_signatures(db.connection(), written.values())
+        for row in written.values():
+            results[pending[row.readme_path][0]].id = row.id
+    db.commit()
+    return results
+
+def summarize_bulk_results(results) -> schemas.BulkUpsertResult:
+    """Counts the outcomes of `bulk_upsert_projects` into the bulk endpoint's response."""
+    counts = {outcome: sum(r.outcome == outcome for r in results) for outcome in ("created", "updated", "unchanged", "error")}
+    return schemas.BulkUpsertResult(
+        created=counts["created"],
+        updated=counts["updated"],
+        unchanged=counts["unchanged"],
+        errors=counts["error"],
+        results=results,
+    )
+
+# --- Async counterparts (used when NAVIGATOR_ASYNC_DB=1) ---
+
+async def get_project_async(db: AsyncSession, project_id: int):
+    return await db.get(models.Project, project_id)
+
+async def get_projects_async(db: AsyncSession, **filters):
+    """Async version of `get_projects`."""
+    return (await db.scalars(projects_statement(**filters))).all()
+
+async def get_project_rows_async(db: AsyncSession, **filters):
+    """Async version of `get_project_rows`."""
+    return (await db.execute(projects_statement(columns=PROJECT_ROW_COLUMNS, **filters))).all()
+
+async def find_possible_duplicates_async(db: AsyncSession, project):
+    """Async version of `find_possible_duplicates`."""
+    stmt, hits = _possible_duplicates_statement(project)
+    return _possible_duplicates(await db.execute(stmt), hits) if stmt is not None else []
+
+async def create_project_async(db: AsyncSession, project: schemas.ProjectCreate):
+    db_project = models.Project(**project.model_dump())
+    db.add(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    return db_project
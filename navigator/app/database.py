@@ -1,23 +1,140 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
+from typing import Optional
 
 # --- Use absolute path for the database ---
 # Get the absolute path to the directory where this file is located
 _current_dir = os.path.dirname(os.path.abspath(__file__))
 # Go up one level to the 'navigator' directory
 _navigator_dir = os.path.dirname(_current_dir)
-DATABASE_URL = f"sqlite:///{os.path.join(_navigator_dir, 'navigator.db')}"
+DATABASE_URL = os.environ.get(
+    "NAVIGATOR_DATABASE_URL",
+    f"sqlite:///{os.path.join(_navigator_dir, 'navigator.db')}",
+)
 
+# Set NAVIGATOR_ASYNC_DB=1 to serve the project list/create endpoints from
+# async handlers on an aiosqlite engine (requires the 'async' extra).
+ASYNC_DB = os.environ.get("NAVIGATOR_ASYNC_DB", "0") == "1"
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# --- SQLite tuning profile ---
+# NAVIGATOR_SQLITE_PROFILE=tuned (the default) switches the database to WAL so
+# readers no longer wait behind writers, and applies the pragmas below to
+# every new connection. Set it to "default" to keep SQLite's stock settings.
+SQLITE_PROFILE = os.environ.get("NAVIGATOR_SQLITE_PROFILE", "tuned")
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("NAVIGATOR_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("NAVIGATOR_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("NAVIGATOR_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    # Negative values are KiB, so this is a 64 MiB page cache per connection.
+    "cache_size": int(os.environ.get("NAVIGATOR_SQLITE_CACHE_SIZE", -64 * 1024)),
+    "busy_timeout": int(os.environ.get("NAVIGATOR_SQLITE_BUSY_TIMEOUT", 5000)),
+    "temp_store": "MEMORY",
+}
+
+# Reads and writes use separate pools: SQLite allows one writer at a time, so
+# a small writer pool queues writes in-process instead of spinning on
+# SQLITE_BUSY, while the read-only pool serves concurrent readers from WAL.
+READ_POOL_SIZE = int(os.environ.get("NAVIGATOR_DB_READ_POOL_SIZE", 8))
+WRITE_POOL_SIZE = int(os.environ.get("NAVIGATOR_DB_WRITE_POOL_SIZE", 1))
+# Set NAVIGATOR_DB_SPLIT_POOLS=0 to serve reads and writes from one engine
+# with SQLAlchemy's default pool, as before the split (the baseline of
+# benchmarks.sqlite_profile).
+SPLIT_POOLS = os.environ.get("NAVIGATOR_DB_SPLIT_POOLS", "1") == "1"
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    try:
+        if SQLITE_PROFILE == "tuned":
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=1")
+    finally:
+        cursor.close()
+
+
+def _make_engine(pool_size: Optional[int], read_only: bool):
+    kwargs = {}
+    if _is_sqlite:
+        kwargs = dict(connect_args={"check_same_thread": False})
+        if pool_size is not None:
+            kwargs.update(pool_size=pool_size, max_overflow=0)
+    new_engine = create_engine(DATABASE_URL, **kwargs)
+    if _is_sqlite:
+        event.listen(new_engine, "connect", lambda conn, record: _apply_pragmas(conn, read_only))
+    return new_engine
+
+
+if SPLIT_POOLS:
+    engine = _make_engine(WRITE_POOL_SIZE, read_only=False)
+    read_engine = _make_engine(READ_POOL_SIZE, read_only=True)
+else:
+    engine = read_engine = _make_engine(None, read_only=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
-def init_db():
+def make_direct_engine():
+    """
+    An engine for tools that write to the database next to a running server
+    (`nav-admin --direct`). Its connections get the same pragmas, so WAL and
+    busy_timeout apply, but every transaction starts with BEGIN IMMEDIATE:
+    the write lock is taken up front, waiting up to busy_timeout while the
+    server writes, and nothing a batch reads can change before it writes.
+    """
+    new_engine = _make_engine(1, read_only=False)
+    if _is_sqlite:
+        @event.listens_for(new_engine, "connect")
+        def _disable_driver_transactions(dbapi_connection, record):
+            # pysqlite would otherwise open its own deferred transactions.
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(new_engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    return new_engine
+
+# Created only in async mode so aiosqlite stays an optional dependency.
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    if _is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", lambda conn, record: _apply_pragmas(conn, read_only=False))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def init_db(bind=None):
+    bind = bind or engine
     # create_all already checks for table existence, so this is robust.
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=bind)
+    # ...but it leaves tables that already exist untouched, so add any new
+    # columns, indexes and triggers to databases created by an older version
+    # of the models. Triggers are declared in a table's info["triggers"].
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            _add_missing_columns(connection, table)
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+            for trigger in table.info.get("triggers", ()):
+                connection.execute(text(trigger))
+
+def _add_missing_columns(connection, table):
+    """Adds columns introduced by newer models to an existing table."""
+    existing = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table.name})"))}
+    for column in table.columns:
+        if column.name not in existing:
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
 
 # --- Dependency for API endpoints ---
 def get_db():
@@ -29,3 +146,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """
+    Like `get_db`, but the session comes from the read-only pool.
+    Use it for endpoints that never write.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """
+    Async counterpart of `get_db`, available when NAVIGATOR_ASYNC_DB=1.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,361 @@
+"""
+Likely-duplicate detection for new projects, with MinHash and LSH.
+
+The same idea tends to get added twice under different slugs (once with
+`nav-admin add`, once through the MCP `add_project` tool), so a new
+project's name and description are compared with every existing one's, but
+without scanning the table:
+
+- each project's text is lowercased, stripped of punctuation and cut into
+  overlapping SHINGLE_SIZE-character shingles, which needs no word
+  boundaries and so treats Chinese, English and mixed text ("AI销售教练")
+  alike. The shingle set becomes a MinHash signature of NUM_PERM 32-bit
+  values; the fraction of positions two signatures agree on estimates the
+  Jaccard similarity of their shingle sets.
+  Signatures are stored in `project_signatures` with the project version
+  they were computed from;
+- the signatures are cut into BANDS bands of ROWS values, and every band is
+  a key in an in-memory hash table (the LSH index). Projects sharing any
+  band are candidates, so a lookup is BANDS dict probes plus a check of the
+  few candidates, whatever the size of the catalog.
+
+With 32 bands of 4 rows, a pair at Jaccard 0.6 becomes a candidate with
+probability 0.99 and a pair at 0.2 with probability 0.05. Candidates at or
+above DUPLICATE_THRESHOLD are reported.
+
+Signatures are kept current by the same write paths as the search index,
+and `init_duplicate_index` rebuilds the in-memory index at startup and
+recomputes missing or stale ones (e.g. after edits from the sqlite3 shell).
+With NAVIGATOR_DUPLICATE_SIGN=0 the server only loads the stored
+signatures; unsigned projects are then signed when next written, or all at
+once with `python -m app.duplicates`.
+
+The LSH index lives in the process that built it. Signature rows written by
+another process (a second server worker, `nav-admin --direct`, the
+standalone watcher) reach the table but not this process's index until its
+next startup, so duplicates of such projects can go unreported meanwhile.
+"""
+import hashlib
+import operator
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from . import models
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Estimated Jaccard similarity from which a project is reported as a likely duplicate.
+DUPLICATE_THRESHOLD = float(os.environ.get("NAVIGATOR_DUPLICATE_THRESHOLD", "0.5"))
+
+# Projects read and signed per batch when (re)computing signatures at startup
+# (also the length of an IN list, so kept well under SQLite's parameter limit).
+SIGN_BATCH_SIZE = 500
+
+# Set NAVIGATOR_DUPLICATE_SIGN=0 to skip the startup signing pass (about 1 ms
+# of CPU per unsigned project, all of them after a bulk load from outside the app).
+SIGN_ON_STARTUP = os.environ.get("NAVIGATOR_DUPLICATE_SIGN", "1") == "1"
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_MAX_HASH = (1 << 32) - 1
+_FORMAT = struct.Struct(f"<{NUM_PERM}I")
+_BAND_BYTES = ROWS * 4
+
+
+class Duplicate(NamedTuple):
+    project_id: int
+    similarity: float
+
+
+def shingles(name: str, description: str) -> Set[str]:
+    """The distinct shingles of a project's name and description."""
+    text = " ".join(_WORD_RE.findall(f"{name or ''}\n{description or ''}".lower()))
+    return {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))} if text else set()
+
+
+def signature(name: str, description: str) -> bytes:
+    """
+    The packed MinHash signature of a project's name and description. One
+    SHAKE-128 digest per shingle supplies its value under each of the
+    NUM_PERM hash functions; position i of the signature is the minimum of
+    the i-th values. The digest is stable across processes, unlike hash().
+    """
+    values = [_FORMAT.unpack(hashlib.shake_128(s.encode("utf-8")).digest(_FORMAT.size)) for s in shingles(name, description)]
+    if not values:
+        return _FORMAT.pack(*[_MAX_HASH] * NUM_PERM)
+    return _FORMAT.pack(*map(min, zip(*values)))
+
+
+def estimate_similarity(first: bytes, second: bytes) -> float:
+    """The fraction of positions two signatures agree on (estimated Jaccard similarity)."""
+    # Equality doesn't depend on byte order, so native-order views will do.
+    return sum(map(operator.eq, memoryview(first).cast("I"), memoryview(second).cast("I"))) / NUM_PERM
+
+
+def _bands(sig: bytes) -> List[bytes]:
+    return [sig[i * _BAND_BYTES:(i + 1) * _BAND_BYTES] for i in range(BANDS)]
+
+
+class LshIndex:
+    """
+    Signatures by project, and projects by (band number, band value).
+
+    While a (re)load is in progress (`start_loading` to `finish_loading`),
+    committed changes are queued rather than applied, then replayed on top
+    of the loaded signatures, so writes made during the load are not lost.
+    """
+
+    def __init__(self):
+        self._signatures: Dict[int, bytes] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(BANDS)]
+        self._queued: Optional[List[Tuple[int, Optional[bytes]]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, project_id: int, sig: bytes):
+        self.apply([(project_id, sig)])
+
+    def remove(self, project_id: int):
+        self.apply([(project_id, None)])
+
+    def apply(self, changes: Iterable[Tuple[int, Optional[bytes]]]):
+        """Applies (project id, signature) changes in order; a None signature removes the project."""
+        with self._lock:
+            if self._queued is not None:
+                self._queued.extend(changes)
+                return
+            for project_id, sig in changes:
+                self._discard(project_id)
+                if sig is not None:
+                    self._insert(project_id, sig)
+
+    def _insert(self, project_id: int, sig: bytes):
+        self._signatures[project_id] = sig
+        for buckets, band in zip(self._buckets, _bands(sig)):
+            buckets.setdefault(band, set()).add(project_id)
+
+    def _discard(self, project_id: int):
+        sig = self._signatures.pop(project_id, None)
+        if sig is None:
+            return
+        for buckets, band in zip(self._buckets, _bands(sig)):
+            bucket = buckets.get(band)
+            if bucket is not None:
+                bucket.discard(project_id)
+                if not bucket:
+                    del buckets[band]
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+            for buckets in self._buckets:
+                buckets.clear()
+
+    def start_loading(self):
+        with self._lock:
+            self._queued = []
+
+    def finish_loading(self, loaded: "LshIndex"):
+        """Takes over the contents of `loaded`, then applies the changes queued since `start_loading`."""
+        with self._lock:
+            self._signatures, self._buckets = loaded._signatures, loaded._buckets
+            queued, self._queued = self._queued or [], None
+        self.apply(queued)
+
+    def query(self, sig: bytes, threshold: float = DUPLICATE_THRESHOLD, exclude: Optional[int] = None) -> List[Duplicate]:
+        """Indexed projects whose estimated similarity to `sig` is at least `threshold`, most similar first."""
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(self._buckets, _bands(sig)):
+                candidates.update(buckets.get(band, ()))
+            candidates.discard(exclude)
+            signatures = [(project_id, self._signatures[project_id]) for project_id in candidates]
+        found = [Duplicate(project_id, estimate_similarity(sig, other)) for project_id, other in signatures]
+        return sorted((d for d in found if d.similarity >= threshold), key=lambda d: (-d.similarity, d.project_id))
+
+
+index = LshIndex()
+
+
+class IndexReport(NamedTuple):
+    signed: int
+    indexed: int
+
+
+# --- Signature maintenance ---
+#
+# Signature rows are written in the caller's transaction, but the in-memory
+# index must only see them once that transaction commits: SQLite hands the
+# id of a rolled-back insert to the next one, so a phantom entry would later
+# be reported as a duplicate of an unrelated project. Changes are therefore
+# queued on the connection and applied after the commit, by the session
+# hooks below for ORM sessions and through `take_pending` by Core callers.
+
+_PENDING = "duplicates.pending"
+
+
+def _pending(connection: Connection) -> List[Tuple[int, Optional[bytes]]]:
+    return connection.info.setdefault(_PENDING, [])
+
+
+def _upsert_signatures(connection: Connection, params: List[dict], version):
+    table = models.ProjectSignature.__table__
+    stmt = sqlite_insert(table).values(
+        project_id=bindparam("project_id"), version=version, signature=bindparam("signature")
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.project_id],
+        set_={"version": stmt.excluded.version, "signature": stmt.excluded.signature},
+    )
+    connection.execute(stmt, params)
+    _pending(connection).extend((param["project_id"], param["signature"]) for param in params)
+
+
+def store_signatures(connection: Connection, rows: Iterable):
+    """(Re)computes and stores the signatures of the given project rows; they are indexed on commit."""
+    projects = models.Project.__table__
+    params = [
+        {"project_id": row.id, "signature": signature(row.name, row.description)}
+        for row in rows
+    ]
+    if params:
+        # Read back rather than taken from the row: the version trigger may
+        # have bumped it after the row was loaded.
+        version = select(projects.c.version).where(projects.c.id == bindparam("project_id")).scalar_subquery()
+        _upsert_signatures(connection, params, version)
+
+
+def remove_signatures(connection: Connection, project_ids: Iterable[int]):
+    """Deletes the signatures of the given projects; they leave the index on commit."""
+    table = models.ProjectSignature.__table__
+    params = [{"project_id": project_id} for project_id in project_ids]
+    if params:
+        connection.execute(table.delete().where(table.c.project_id == bindparam("project_id")), params)
+        _pending(connection).extend((param["project_id"], None) for param in params)
+
+
+def take_pending(connection: Connection) -> List[Tuple[int, Optional[bytes]]]:
+    """
+    Removes and returns the index changes of the connection's transaction.
+    Core callers take them before leaving the transaction and pass them to
+    `index.apply` once it has committed.
+    """
+    return connection.info.pop(_PENDING, [])
+
+
+def init_duplicate_index(engine, sign: bool = SIGN_ON_STARTUP) -> IndexReport:
+    """
+    Drops signatures of deleted projects, loads every signature into the LSH
+    index, then (if `sign`) signs projects whose signature is missing or
+    stale, one batch at a time. Slow on a large catalog that was edited outside the
+    app, so the server runs it in the background: signatures are computed
+    outside any transaction and written in short ones, so API writes are
+    not held up, and writes made while the index loads are kept (see
+    `LshIndex.finish_loading`).
+    """
+    projects = models.Project.__table__
+    table = models.ProjectSignature.__table__
+    with engine.begin() as connection:
+        connection.execute(table.delete().where(table.c.project_id.not_in(select(projects.c.id))))
+    loaded = LshIndex()
+    index.start_loading()
+    try:
+        with engine.connect() as connection:
+            for project_id, sig in connection.execute(select(table.c.project_id, table.c.signature)):
+                loaded.add(project_id, sig)
+    finally:
+        index.finish_loading(loaded)
+    if not sign:
+        return IndexReport(0, len(index))
+
+    signed, last_id = 0, 0
+    while True:
+        with engine.connect() as connection:
+            stale = connection.execute(
+                select(projects.c.id, projects.c.version, projects.c.name, projects.c.description)
+                .outerjoin(table, table.c.project_id == projects.c.id)
+                .where(projects.c.id > last_id, table.c.version.is_distinct_from(projects.c.version))
+                .order_by(projects.c.id)
+                .limit(SIGN_BATCH_SIZE)
+            ).all()
+        if not stale:
+            return IndexReport(signed, len(index))
+        last_id = stale[-1].id
+        params = [
+            {"project_id": row.id, "version": row.version, "signature": signature(row.name, row.description)}
+            for row in stale
+        ]
+        with engine.begin() as connection:
+            # A project edited since it was read was re-signed by that write.
+            current = dict(connection.execute(
+                select(projects.c.id, projects.c.version).where(projects.c.id.in_([row.id for row in stale]))
+            ).all())
+            params = [param for param in params if current.get(param["project_id"]) == param["version"]]
+            if params:
+                _upsert_signatures(connection, params, bindparam("version"))
+            changes = take_pending(connection)
+        index.apply(changes)
+        signed += len(params)
+
+
+def find_duplicates(project, threshold: float = DUPLICATE_THRESHOLD) -> List[Duplicate]:
+    """Likely duplicates of a project (row or schema) among the indexed projects, itself excluded."""
+    return index.query(signature(project.name, project.description), threshold, exclude=getattr(project, "id", None))
+
+
+# Keep signatures in step with ORM writes to models.Project. Bulk Core
+# statements bypass these hooks and must call store_signatures themselves.
+# Sessions share their connection's pending changes, and index them once the
+# session commits.
+
+@event.listens_for(models.Project, "after_insert")
+@event.listens_for(models.Project, "after_update")
+def _sign_project(mapper, connection, target):
+    store_signatures(connection, [target])
+
+
+@event.listens_for(models.Project, "after_delete")
+def _unsign_project(mapper, connection, target):
+    remove_signatures(connection, [target.id])
+
+
+@event.listens_for(Engine, "begin")
+@event.listens_for(Engine, "rollback")
+def _reset_pending(connection):
+    # connection.info outlives the checkout: start every transaction empty.
+    connection.info.pop(_PENDING, None)
+
+
+@event.listens_for(Session, "after_begin")
+def _share_pending(session, transaction, connection):
+    session.info[_PENDING] = _pending(connection)
+
+
+@event.listens_for(Session, "after_commit")
+def _index_committed(session):
+    index.apply(session.info.pop(_PENDING, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+if __name__ == "__main__":
+    from . import database
+
+    database.init_db()
+    report = init_duplicate_index(database.engine, sign=True)
+    print(f"Signed {report.signed} projects; {report.indexed} projects have signatures.")
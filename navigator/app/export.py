@@ -0,0 +1,48 @@
+"""
+Encoders for /api/projects/export, which streams the whole catalog.
+
+Both encoders consume batches of Core rows (see `crud.iter_project_batches`)
+and emit one chunk per batch, so the response is written as the cursor is
+read and memory use does not grow with the size of the table.
+"""
+import csv
+import io
+from typing import Iterable, Iterator, Sequence
+
+import orjson
+
+from . import schemas
+
+FIELDS = list(schemas.Project.model_fields)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ndjson_chunks(batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """One JSON object per line, shaped like `schemas.Project`."""
+    for rows in batches:
+        yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def csv_chunks(batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """A header row followed by one line per project; NULLs become empty cells."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # The header alone, for an empty export.
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+ENCODERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+}
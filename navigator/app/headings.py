@@ -0,0 +1,130 @@
+"""
+Heading index of markdown documents, for fetching one section at a time.
+
+`get_index` parses a document's ATX headings ("## Title") once and caches
+the result under the file's (mtime, size), so an edited file is simply
+re-parsed. Each heading carries a GitHub-style anchor ("## 市场分析" ->
+"市场分析", a repeated title gets "-1", "-2", ...) and the character range of
+its section: from the heading line up to the next heading of the same or a
+higher level. Headings inside fenced code blocks are ignored.
+
+`get_section_page` renders just one section through the configured markdown
+engine and keeps it in the /view render cache.
+"""
+import pathlib
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import render
+
+_ATX_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE_RE = re.compile(r"^ *(`{3,}|~{3,})")
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MARKUP_RE = re.compile(r"\*\*|__|[*_`]|<[^>]+>")
+_ANCHOR_DROP_RE = re.compile(r"[^\w\- ]")
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+    anchor: str
+    line: int  # 1-based line of the heading
+    start: int  # character offsets of the section in the document
+    end: int
+
+
+class DocumentIndex(NamedTuple):
+    headings: List[Heading]
+    by_anchor: Dict[str, Heading]
+
+
+def heading_text(raw: str) -> str:
+    """Heading source with links reduced to their text and inline markup removed."""
+    return _MARKUP_RE.sub("", _LINK_RE.sub(r"\1", raw)).strip()
+
+
+def anchor_for(title: str) -> str:
+    """GitHub's anchor for a heading: lowercased, punctuation dropped, spaces to hyphens."""
+    return _ANCHOR_DROP_RE.sub("", title.lower()).replace(" ", "-")
+
+
+def outside_fences(text: str) -> Iterator[Tuple[int, int, str]]:
+    """Yields (1-based line number, offset, line without its newline) for lines outside fenced code."""
+    fence = None
+    offset = 0
+    for number, line in enumerate(text.splitlines(keepends=True), start=1):
+        stripped = line.rstrip("\r\n")
+        fence_match = _FENCE_RE.match(stripped)
+        if fence is None:
+            if fence_match:
+                fence = fence_match.group(1)
+            else:
+                yield number, offset, stripped
+        elif fence_match and fence_match.group(1).startswith(fence) and not stripped.strip().strip(fence[0]):
+            # Only a bare fence at least as long as the opening one closes the block.
+            fence = None
+        offset += len(line)
+
+
+def build_index(text: str) -> DocumentIndex:
+    found: List[Tuple[int, str, int, int]] = []  # (level, title, line, start)
+    for number, offset, line in outside_fences(text):
+        match = _ATX_HEADING_RE.match(line)
+        if match:
+            found.append((len(match.group(1)), heading_text(match.group(2) or ""), number, offset))
+
+    headings = []
+    by_anchor = {}
+    seen: Dict[str, int] = {}
+    for i, (level, title, number, start) in enumerate(found):
+        end = next((later[3] for later in found[i + 1:] if later[0] <= level), len(text))
+        anchor = anchor_for(title)
+        if anchor in seen:
+            seen[anchor] += 1
+            anchor = f"{anchor}-{seen[anchor]}"
+        else:
+            seen[anchor] = 0
+        heading = Heading(level, title, anchor, number, start, end)
+        headings.append(heading)
+        by_anchor.setdefault(anchor, heading)
+    return DocumentIndex(headings, by_anchor)
+
+
+_indexes: Dict[str, Tuple[Tuple[int, int], DocumentIndex]] = {}
+_lock = threading.Lock()
+
+
+def get_index(path: pathlib.Path) -> DocumentIndex:
+    """The heading index of a markdown file, re-parsed only when its mtime or size changes."""
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        entry = _indexes.get(str(path))
+    if entry is None or entry[0] != key:
+        entry = (key, build_index(path.read_text(encoding="utf-8")))
+        with _lock:
+            _indexes[str(path)] = entry
+    return entry[1]
+
+
+def get_section_page(path: pathlib.Path, anchor: str) -> Optional[render.RenderedPage]:
+    """
+    The rendered HTML fragment of one section of a markdown file, or None if
+    it has no heading with that anchor. Cached like whole /view pages.
+    """
+    stat = path.stat()
+    key = (f"{path}#{anchor}", stat.st_mtime_ns, stat.st_size)
+    page = render.cache.get(key)
+    if page is None:
+        heading = get_index(path).by_anchor.get(anchor)
+        if heading is None:
+            return None
+        text = path.read_text(encoding="utf-8")
+        start = time.perf_counter()
+        html = render.render_markdown(text[heading.start:heading.end])
+        render.render_seconds.observe(time.perf_counter() - start, engine=render.MARKDOWN_ENGINE, source="section")
+        page = render.build_page(html, stat.st_mtime)
+        render.cache.put(key, page)
+    return page
@@ -0,0 +1,235 @@
+"""
+The graph of markdown links between project folders under ideaed-projects/.
+
+Every markdown file in a project folder is parsed for inline links,
+reference definitions, <autolinks> and <mcreference link="..."> citations.
+Each distinct target becomes a row of `document_links`:
+
+- relative links are resolved against the file ("../other/README.md" ->
+  "ideaed-projects/other/README.md") and tagged with the project folder
+  they point into, if any;
+- web links are normalized (lowercase host, no fragment or trailing slash),
+  so projects citing the same source share a target.
+
+`sync_links` compares each file's (mtime, size) with what was recorded in
+`linked_files` and re-parses only the files that changed, so it is cheap to
+run at startup and after every watcher batch. Queries for a project's
+neighbours then run on the adjacency indexes of `document_links` rather
+than on the files.
+"""
+import os
+import pathlib
+import posixpath
+import re
+import urllib.parse
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+
+from . import headings, models, scanner
+
+_INLINE_LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+[\"'][^\"']*[\"'])?\s*\)")
+_REFERENCE_RE = re.compile(r"^ {0,3}\[([^\]]+)\]:\s*<?(\S+?)>?(?:\s|$)")
+_AUTOLINK_RE = re.compile(r"<(https?://[^>\s]+)>")
+_CITATION_RE = re.compile(r"<mcreference\b[^>]*\blink=\"([^\"]+)\"[^>]*>(.*?)</mcreference>")
+_CODE_SPAN_RE = re.compile(r"`[^`]*`")
+
+_WEB_SCHEMES = ("http", "https")
+
+# Rows written per executemany when a sync re-parses many files.
+INSERT_BATCH_SIZE = 1000
+
+
+class Link(NamedTuple):
+    target: str
+    target_project: Optional[str]
+    text: Optional[str]
+
+
+class SyncReport(NamedTuple):
+    files: int
+    parsed: int
+    removed: int
+    links: int
+
+
+def project_of(path: str) -> Optional[str]:
+    """The project folder ("slug") a repository-relative path lies in, if any."""
+    parts = path.split("/")
+    if len(parts) >= 2 and parts[0] == scanner.PROJECTS_DIR.name and parts[1] and not parts[1].startswith("."):
+        if len(parts) > 2 or scanner.PROJECTS_DIR.joinpath(parts[1]).is_dir():
+            return parts[1]
+    return None
+
+
+def resolve_target(source_path: str, target: str) -> Optional[str]:
+    """
+    Normalizes a link target found in `source_path` (repository-relative).
+    Returns None for in-page anchors, non-web schemes and paths that leave
+    the repository.
+    """
+    target = target.strip()
+    parts = urllib.parse.urlsplit(target)
+    if parts.scheme:
+        if parts.scheme.lower() not in _WEB_SCHEMES or not parts.netloc:
+            return None
+        path = parts.path.rstrip("/")
+        return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+    path = urllib.parse.unquote(parts.path)
+    if not path:
+        return None
+    if path.startswith("/"):
+        resolved = posixpath.normpath(path.lstrip("/"))
+    else:
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source_path), path))
+    if resolved == ".." or resolved.startswith("../"):
+        return None
+    return resolved
+
+
+def extract_links(source_path: str, text: str) -> List[Link]:
+    """Distinct link targets of a markdown document, with the first text used for each."""
+    found: Dict[str, Optional[str]] = {}
+
+    def add(target: str, label: Optional[str]):
+        resolved = resolve_target(source_path, target)
+        if resolved is not None and resolved != source_path and resolved not in found:
+            found[resolved] = headings.heading_text(label) if label else None
+
+    for _, _, line in headings.outside_fences(text):
+        line = _CODE_SPAN_RE.sub("", line)
+        for match in _CITATION_RE.finditer(line):
+            add(match.group(1), match.group(2))
+        for match in _INLINE_LINK_RE.finditer(line):
+            add(match.group(2), match.group(1))
+        for match in _AUTOLINK_RE.finditer(line):
+            add(match.group(1), None)
+        match = _REFERENCE_RE.match(line)
+        if match:
+            add(match.group(2), match.group(1))
+    return [Link(target, project_of(target), label) for target, label in found.items()]
+
+
+def take_snapshot(root: pathlib.Path) -> Dict[str, Tuple[int, int]]:
+    """Maps every markdown file inside a project folder to (mtime_ns, size)."""
+    snapshot = {}
+    base = root.parent
+    for directory, dirnames, filenames in os.walk(root):
+        # Hidden folders hold scratch data (e.g. load-test documents).
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        if pathlib.Path(directory) == root:
+            continue  # Only files inside a project folder belong to a project.
+        for name in filenames:
+            if name.endswith(".md"):
+                full_path = os.path.join(directory, name)
+                stat = os.stat(full_path)
+                relative = pathlib.Path(full_path).relative_to(base).as_posix()
+                snapshot[relative] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _batches(rows: List[dict]) -> Iterable[List[dict]]:
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        yield rows[start:start + INSERT_BATCH_SIZE]
+
+
+def sync_links(connection: Connection, root: pathlib.Path = scanner.PROJECTS_DIR) -> SyncReport:
+    """Brings the link tables up to date with the files under `root`, re-parsing only changed files."""
+    links_table = models.DocumentLink.__table__
+    files_table = models.LinkedFile.__table__
+    snapshot = take_snapshot(root)
+    recorded = {row.path: (row.mtime_ns, row.size) for row in connection.execute(select(files_table))}
+    changed = [path for path, key in snapshot.items() if recorded.get(path) != key]
+    removed = [path for path in recorded if path not in snapshot]
+    if not changed and not removed:
+        return SyncReport(len(snapshot), 0, 0, 0)
+
+    stale = [{"path": path} for path in changed + removed]
+    connection.execute(links_table.delete().where(links_table.c.source_path == bindparam("path")), stale)
+    if removed:
+        connection.execute(files_table.delete().where(files_table.c.path == bindparam("path")), [{"path": p} for p in removed])
+
+    base = root.parent
+    rows, parsed = [], []
+    for path in changed:
+        try:
+            text = base.joinpath(path).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue  # Retried at the next sync, since it is not recorded.
+        source_project = project_of(path)
+        for link in extract_links(path, text):
+            rows.append({
+                "source_path": path,
+                "target": link.target,
+                "source_project": source_project,
+                "target_project": link.target_project,
+                "text": link.text,
+            })
+        mtime_ns, size = snapshot[path]
+        parsed.append({"path": path, "mtime_ns": mtime_ns, "size": size})
+    for batch in _batches(rows):
+        connection.execute(links_table.insert(), batch)
+    if parsed:
+        upsert = sqlite_insert(files_table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[files_table.c.path],
+            set_={"mtime_ns": upsert.excluded.mtime_ns, "size": upsert.excluded.size},
+        )
+        connection.execute(upsert, parsed)
+    return SyncReport(len(snapshot), len(parsed), len(removed), len(rows))
+
+
+def init_link_graph(engine, root: pathlib.Path = scanner.PROJECTS_DIR) -> SyncReport:
+    with engine.begin() as connection:
+        return sync_links(connection, root)
+
+
+# --- Neighbourhood queries ---
+
+class Neighbourhood(NamedTuple):
+    outgoing: list  # links from the project's files to other projects and the web
+    incoming: list  # links from other projects' files into the project
+    two_hop: Dict[str, List[str]]  # project -> targets or projects it is reached through
+
+
+def neighbourhood(connection, slug: str) -> Neighbourhood:
+    """
+    A project's direct links in both directions, plus the projects two hops
+    away: those linking to the same targets, and those linked (either way)
+    to a directly linked project.
+    """
+    table = models.DocumentLink.__table__
+    columns = (table.c.source_path, table.c.source_project, table.c.target, table.c.target_project, table.c.text)
+    direct = connection.execute(
+        select(*columns).where(or_(table.c.source_project == slug, table.c.target_project == slug))
+    ).all()
+    outgoing = [row for row in direct if row.source_project == slug and row.target_project != slug]
+    incoming = [row for row in direct if row.source_project != slug and row.target_project == slug]
+    neighbours = {row.target_project for row in outgoing if row.target_project} | {row.source_project for row in incoming}
+
+    two_hop: Dict[str, set] = {}
+    # Projects linking to a target this project links to (a shared source or document).
+    shared = table.alias("shared")
+    own_targets = select(table.c.target).where(table.c.source_project == slug).scalar_subquery()
+    for project, target in connection.execute(
+        select(shared.c.source_project, shared.c.target)
+        .where(shared.c.target.in_(own_targets), shared.c.source_project != slug)
+    ):
+        two_hop.setdefault(project, set()).add(target)
+    # Projects linked, in either direction, to a direct neighbour.
+    if neighbours:
+        for source, target in connection.execute(
+            select(table.c.source_project, table.c.target_project).where(or_(
+                table.c.source_project.in_(neighbours), table.c.target_project.in_(neighbours)
+            ))
+        ):
+            if target is None or source == target:
+                continue
+            for project, via in ((source, target), (target, source)):
+                if via in neighbours:
+                    two_hop.setdefault(project, set()).add(via)
+    for project in (slug, *neighbours):
+        two_hop.pop(project, None)
+    return Neighbourhood(outgoing, incoming, {project: sorted(via) for project, via in two_hop.items()})
@@ -1,26 +1,103 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from contextlib import asynccontextmanager
+import anyio
+import asyncio
+import logging
 import pathlib
-import markdown2
 
-from . import models, database, crud, schemas
+from . import models, assets, database, compression, crud, duplicates, export, headings, links, metrics, querybudget, render, schemas, search, similarity, stats, watcher
+from .responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
 
 # --- Lifespan Management & App Initialization ---
 
+async def prerender_markdown():
+    """Fills the /view render cache without holding up startup."""
+    report = await asyncio.to_thread(render.prerender, projects_dir, render.PRERENDER_WORKERS)
+    print(
+        f"Pre-rendered {report.documents} markdown documents in {report.seconds:.2f}s"
+        + (f" ({report.failed} failed)." if report.failed else ".")
+    )
+    return report
+
+async def load_similarity_index():
+    """Maps the similarity index, rebuilding it when missing or stale, then whenever the catalog changes."""
+    while True:
+        try:
+            status = await asyncio.to_thread(similarity.init_similarity_index, database.engine)
+        except Exception:  # Keep refreshing; the next interval retries the build.
+            logger.exception("Similarity index build failed")
+        else:
+            if status is not None:
+                print(status)
+        if not similarity.refresh_enabled():
+            return
+        await asyncio.sleep(similarity.REFRESH_INTERVAL)
+
+async def load_duplicate_index():
+    """Loads the LSH index and signs unsigned or stale projects, without holding up startup."""
+    try:
+        report = await asyncio.to_thread(duplicates.init_duplicate_index, database.engine)
+    except Exception:  # Writes still keep the index current; the next start retries.
+        logger.exception("Duplicate index load failed")
+        return
+    logger.info("Duplicate index: %d projects (%d signed).", report.indexed, report.signed)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles application startup and shutdown events."""
     print("Initializing database...")
     database.init_db()
+    search.init_search_index(database.engine)
+    stats.init_facet_counts(database.engine)
+    link_report = links.init_link_graph(database.engine, projects_dir)
     print("Database initialized.")
+    if link_report.parsed or link_report.removed:
+        print(f"Link graph: parsed {link_report.parsed} of {link_report.files} markdown files ({link_report.links} links).")
+    files, identity_bytes, stored_bytes = await asyncio.to_thread(frontend_assets.precompress_all)
+    print(f"Precompressed {files} frontend assets ({identity_bytes} -> {stored_bytes} bytes).")
+    warmup_task = None
+    if render.PRERENDER_ON_STARTUP:
+        print("Pre-rendering markdown documents in the background...")
+        warmup_task = asyncio.create_task(prerender_markdown())
+    app.state.warmup_task = warmup_task
+    similarity_task = asyncio.create_task(load_similarity_index())
+    duplicates_task = asyncio.create_task(load_duplicate_index())
+    project_watcher = None
+    if watcher.WATCH_ON_STARTUP:
+        project_watcher = watcher.ProjectWatcher(projects_dir, database.engine)
+        project_watcher.start(on_report=watcher.log_report)
+        print(f"Watching {projects_dir} for project changes.")
     yield
+    if project_watcher is not None:
+        await asyncio.to_thread(project_watcher.stop)
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    for index_task in (similarity_task, duplicates_task):
+        if not index_task.done():
+            index_task.cancel()
     print("Application shutting down.")
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(querybudget.QueryBudgetMiddleware)
+app.add_middleware(compression.CompressionMiddleware)
+# Added last so it is outermost and its timings include compression.
+app.add_middleware(metrics.MetricsMiddleware)
+
+for instrumented_engine in (database.engine, database.read_engine, database.async_engine):
+    if instrumented_engine is not None:
+        sync_engine = getattr(instrumented_engine, "sync_engine", instrumented_engine)
+        metrics.instrument_engine(sync_engine)
+        querybudget.instrument_engine(sync_engine)
 
 # --- Path Definitions ---
 
@@ -32,27 +109,328 @@ projects_dir = base_dir.joinpath("ideaed-projects").resolve()
 
 if not frontend_dir.is_dir():
     raise RuntimeError(f"Frontend directory not found at: {frontend_dir}")
-app.mount("/assets", StaticFiles(directory=frontend_dir), name="frontend_assets")
+frontend_assets = assets.FrontendAssets(directory=frontend_dir)
+spa_shell = render.SpaShell(frontend_dir.joinpath("index.html"))
+app.mount("/assets", frontend_assets, name="frontend_assets")
 
 # --- API Endpoints ---
 
-@app.get("/api/projects", response_model=List[schemas.Project])
-def read_projects_api(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    """Retrieves a list of all projects from the database."""
-    projects = crud.get_projects(db, skip=skip, limit=limit)
-    return projects
+def project_list_filters(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    project_type: Optional[str] = None,
+    type_: Optional[str] = Query(None, alias="type"),
+    maturity: Optional[str] = None,
+    status: Optional[str] = None,
+    sort: Literal["created_date", "name", "id"] = "created_date",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+) -> dict:
+    """Query parameters of the project list; `type` aliases `project_type` (the MCP tools send it)."""
+    return dict(
+        skip=skip,
+        limit=limit,
+        project_type=project_type if project_type is not None else type_,
+        maturity=maturity,
+        status=status,
+        sort=sort,
+        order=order,
+        cursor=cursor,
+    )
+
+def project_page_response(rows, filters: dict) -> ORJSONResponse:
+    response = ORJSONResponse([row._asdict() for row in rows])
+    if len(rows) == filters["limit"]:
+        response.headers["X-Next-Cursor"] = crud.encode_cursor(filters["sort"], rows[-1])
+    return response
+
+def read_projects_api(
+    filters: dict = Depends(project_list_filters),
+    db: Session = Depends(database.get_read_db),
+):
+    """
+    Retrieves projects from the database, optionally filtered by type,
+    maturity and status. When a full page is returned, the cursor for the
+    next page is sent in the `X-Next-Cursor` header.
+
+    Rows are read with SQLAlchemy Core and encoded straight to JSON with
+    orjson; they already have the `schemas.Project` shape, so per-row
+    pydantic validation is skipped.
+    """
+    try:
+        rows = crud.get_project_rows(db, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return project_page_response(rows, filters)
+
+async def read_projects_api_async(
+    filters: dict = Depends(project_list_filters),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """Async-mode version of `read_projects_api`."""
+    try:
+        rows = await crud.get_project_rows_async(db, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return project_page_response(rows, filters)
+
+def created_response(db_project, possible_duplicates) -> schemas.ProjectCreated:
+    return schemas.ProjectCreated(
+        **schemas.Project.model_validate(db_project).model_dump(), possible_duplicates=possible_duplicates
+    )
 
-@app.post("/api/projects", response_model=schemas.Project)
 def create_project_api(project: schemas.ProjectCreate, db: Session = Depends(database.get_db)):
-    """Creates a new project in the database."""
-    # Here you could add a check for existing readme_path to avoid duplicates
-    return crud.create_project(db=db, project=project)
+    """
+    Creates a new project in the database. Existing projects with a very
+    similar name and description are listed in `possible_duplicates`.
+    """
+    try:
+        db_project = crud.create_project(db=db, project=project)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Project with readme_path '{project.readme_path}' already exists.")
+    return created_response(db_project, crud.find_possible_duplicates(db, db_project))
 
-@app.get("/view/{file_path:path}")
-async def view_project_file_as_html(file_path: str):
+async def create_project_api_async(project: schemas.ProjectCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """Async-mode version of `create_project_api`."""
+    try:
+        db_project = await crud.create_project_async(db=db, project=project)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Project with readme_path '{project.readme_path}' already exists.")
+    return created_response(db_project, await crud.find_possible_duplicates_async(db, db_project))
+
+# The hot list/create routes are served by either the sync handlers (run in
+# Starlette's threadpool) or their async counterparts, see NAVIGATOR_ASYNC_DB.
+app.get("/api/projects", response_model=List[schemas.Project], response_class=ORJSONResponse)(
+    read_projects_api_async if database.ASYNC_DB else read_projects_api
+)
+app.post("/api/projects", response_model=schemas.ProjectCreated)(
+    create_project_api_async if database.ASYNC_DB else create_project_api
+)
+
+@app.get("/api/projects/search", response_model=List[schemas.ProjectSearchResult])
+def search_projects_api(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(database.get_read_db),
+):
+    """Full-text searches project names, descriptions, types and READMEs, ranked by BM25."""
+    return [
+        schemas.ProjectSearchResult(**schemas.Project.model_validate(project).model_dump(), score=score)
+        for project, score in crud.search_projects(db, q, limit=limit)
+    ]
+
+@app.get("/api/projects/stats", response_model=schemas.ProjectStats)
+def project_stats_api(db: Session = Depends(database.get_read_db)):
+    """Returns project counts in total and by type, maturity and status."""
+    return crud.get_project_stats(db)
+
+@app.post("/api/projects/bulk", response_model=schemas.BulkUpsertResult)
+def bulk_upsert_projects_api(projects: List[schemas.ProjectBulkItem], db: Session = Depends(database.get_db)):
     """
-    Finds a markdown file, converts it to HTML, and returns it for viewing.
+    Creates or updates many projects at once, matched on readme_path.
+    The whole batch is written in one transaction; the response reports the
+    outcome of every row in request order.
+    """
+    return crud.summarize_bulk_results(crud.bulk_upsert_projects(db, projects))
+
+@app.get("/api/projects/export")
+def export_projects_api(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    project_type: Optional[str] = None,
+    type_: Optional[str] = Query(None, alias="type"),
+    maturity: Optional[str] = None,
+    status: Optional[str] = None,
+    sort: Literal["created_date", "name", "id"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+):
+    """
+    Streams every matching project as NDJSON (one object per line) or CSV.
+    Rows are read from the database in batches while the response is being
+    sent, so the whole catalog can be pulled in one request.
+    """
+    filters = dict(
+        project_type=project_type if project_type is not None else type_,
+        maturity=maturity,
+        status=status,
+        sort=sort,
+        order=order,
+    )
+
+    def chunks():
+        # The session lives as long as the stream, not the request handler;
+        # its single read transaction gives the export a consistent snapshot.
+        with database.ReadSessionLocal() as db:
+            yield from export.ENCODERS[format](crud.iter_project_batches(db, **filters))
+
+    async def stream():
+        # Starlette drops a sync body iterator unclosed when the client
+        # disconnects; close it here so the read connection goes straight
+        # back to the pool instead of waiting for garbage collection.
+        iterator = chunks()
+        try:
+            async for chunk in iterate_in_threadpool(iterator):
+                yield chunk
+        finally:
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(iterator.close)
+
+    return StreamingResponse(
+        stream(),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="projects.{format}"'},
+    )
+
+# --- Single-project endpoints ---
+# Registered after /search, /stats, /bulk and /export so those paths aren't read as ids.
+
+def project_etag(version: int) -> str:
+    return f'"{version}"'
+
+def if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """
+    Returns the project version an If-Match header requires, or None when
+    any version will do (no header, or "*"). A header that cannot match
+    one of our ETags fails the precondition.
     """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+        return int(tag[1:-1])
+    raise HTTPException(status_code=412, detail="If-Match must be a single ETag of this project.")
+
+def write_project(db: Session, project_id: int, values: dict, if_match: Optional[str], response: Response):
+    try:
+        row = crud.update_project(db, project_id, values, expected_version=if_match_version(if_match))
+    except crud.VersionMismatch as e:
+        raise HTTPException(
+            status_code=412, detail=str(e), headers={"ETag": project_etag(e.current_version)}
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Project with readme_path '{values.get('readme_path')}' already exists.")
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    response.headers["ETag"] = project_etag(row.version)
+    return row
+
+@app.get("/api/projects/{project_id}", response_model=schemas.Project)
+def read_project_api(project_id: int, response: Response, db: Session = Depends(database.get_read_db)):
+    """Returns one project; its version is sent as the ETag for conditional updates."""
+    project = crud.get_project(db, project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    response.headers["ETag"] = project_etag(project.version)
+    return project
+
+@app.get("/api/projects/{project_id}/similar", response_model=List[schemas.ProjectSearchResult])
+def similar_projects_api(
+    project_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(database.get_read_db),
+):
+    """
+    The projects whose name, description and README are most similar to
+    this one's (TF-IDF cosine similarity, 0 to 1), to spot related ideas
+    and likely duplicates.
+    """
+    index = similarity.current()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Similarity index is not available yet.")
+    try:
+        similar = crud.get_similar_projects(db, index, project_id, limit=limit)
+    except similarity.NotIndexed:
+        if not similarity.refresh_enabled():
+            raise HTTPException(status_code=503, detail="Similarity index is stale; run python -m app.similarity.")
+        raise HTTPException(
+            status_code=503,
+            detail="Project was added after the similarity index was built; it is included in the next rebuild.",
+            headers={"Retry-After": str(int(similarity.REFRESH_INTERVAL))},
+        )
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    return [
+        schemas.ProjectSearchResult(**schemas.Project.model_validate(project).model_dump(), score=score)
+        for project, score in similar
+    ]
+
+@app.get("/api/projects/{project_id}/related", response_model=schemas.RelatedProjects)
+def related_projects_api(project_id: int, db: Session = Depends(database.get_read_db)):
+    """
+    Projects connected to this one by markdown links: links out of and into
+    its folder, and projects two hops away (citing the same source, or
+    linked to a directly linked project). Read from the link graph, which
+    is kept current by file mtime at startup and by the folder watcher.
+    """
+    related = crud.get_related_projects(db, project_id)
+    if related is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    return related
+
+@app.put("/api/projects/{project_id}", response_model=schemas.Project)
+def replace_project_api(
+    project_id: int,
+    project: schemas.ProjectCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(database.get_db),
+):
+    """
+    Replaces a project's fields. With `If-Match: "<version>"` the write only
+    succeeds if nobody changed the project since that version (else 412).
+    """
+    return write_project(db, project_id, project.model_dump(), if_match, response)
+
+@app.patch("/api/projects/{project_id}", response_model=schemas.Project)
+def update_project_api(
+    project_id: int,
+    changes: schemas.ProjectUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(database.get_db),
+):
+    """
+    Updates only the fields present in the body, in one conditional write.
+    Honors `If-Match` like PUT.
+    """
+    return write_project(db, project_id, changes.model_dump(exclude_unset=True), if_match, response)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_api():
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+def page_response(
+    request: Request,
+    page: render.RenderedPage,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    accept_encoding: Optional[str],
+) -> Response:
+    """Sends a cached page in the negotiated encoding, or 304 if the client's copy is current."""
+    body, coding, etag = page.representation(compression.negotiate(accept_encoding))
+    headers = {
+        "ETag": etag,
+        "Last-Modified": page.last_modified,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if render.is_not_modified(page, if_none_match, if_modified_since, etag=etag):
+        return Response(status_code=304, headers=headers)
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+        compression.stats.record(compression.route_label(request.scope), len(page.body), len(body))
+    return HTMLResponse(content=body, headers=headers)
+
+@app.get("/api/compression/stats")
+def compression_stats_api():
+    """Reports, per route, how many response bytes compression has saved since startup."""
+    return compression.stats.report()
+
+def project_file(file_path: str) -> pathlib.Path:
+    """Resolves a path relative to the repository root to a file under ideaed-projects/."""
     full_path = base_dir.joinpath(file_path).resolve()
 
     if not str(full_path).startswith(str(projects_dir)):
@@ -61,46 +439,73 @@ async def view_project_file_as_html(file_path: str):
     if not full_path.is_file():
         raise HTTPException(status_code=404, detail="File not found.")
 
-    content = full_path.read_text(encoding="utf-8")
-    
-    # Convert markdown to an HTML fragment
-    html_fragment = markdown2.markdown(content, extras=["fenced-code-blocks", "tables"])
-
-    # Build a full HTML document with the GitHub-like styling
-    html_response_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{pathlib.Path(file_path).name}</title>
-        <link rel="stylesheet" href="/assets/github-markdown.css">
-        <style>
-            body {{
-                box-sizing: border-box;
-                min-width: 200px;
-                max-width: 980px;
-                margin: 0 auto;
-                padding: 45px;
-            }}
-        </style>
-    </head>
-    <body>
-        <main class="markdown-body">
-            {html_fragment}
-        </main>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_response_content)
+    return full_path
+
+@app.get("/view/{file_path:path}")
+def view_project_file_as_html(
+    request: Request,
+    file_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Finds a markdown file, converts it to HTML, and returns it for viewing.
+    Rendered pages are cached, together with their gzip/brotli encodings,
+    and revalidated with ETag/Last-Modified. A plain def: rendering a cache
+    miss reads and parses the file, so it runs in the threadpool.
+    """
+    page = render.get_page(project_file(file_path))
+    return page_response(request, page, if_none_match, if_modified_since, accept_encoding)
+
+def markdown_file(file_path: str) -> pathlib.Path:
+    full_path = project_file(file_path)
+    if full_path.suffix.lower() != ".md":
+        raise HTTPException(status_code=404, detail="Not a markdown document.")
+    return full_path
+
+@app.get("/api/docs/{file_path:path}/toc", response_model=schemas.DocumentToc)
+def document_toc_api(file_path: str):
+    """
+    Lists the headings of a markdown document with their anchors, levels and
+    the character range of each section. The index is cached per file.
+    """
+    index = headings.get_index(markdown_file(file_path))
+    return {"path": file_path, "headings": [heading._asdict() for heading in index.headings]}
+
+@app.get("/api/docs/{file_path:path}/sections/{anchor}")
+def document_section_api(
+    request: Request,
+    file_path: str,
+    anchor: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Renders one section of a markdown document (its heading, body and
+    subsections) as an HTML fragment. Anchors are the ones listed by /toc.
+    """
+    page = headings.get_section_page(markdown_file(file_path), anchor)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Section not found.")
+    return page_response(request, page, if_none_match, if_modified_since, accept_encoding)
 
 @app.get("/{full_path:path}")
-async def serve_frontend_catch_all(full_path: str):
+async def serve_frontend_catch_all(
+    request: Request,
+    full_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     """
     Serves the index.html for any non-API, non-static file path,
-    enabling frontend routing.
+    enabling frontend routing. The page is held in memory and only
+    reloaded when index.html changes on disk.
     """
-    index_path = frontend_dir.joinpath("index.html")
-    if not index_path.is_file():
+    try:
+        page = spa_shell.get()
+    except FileNotFoundError:
         raise HTTPException(status_code=500, detail="index.html not found.")
-    return FileResponse(index_path)
+    return page_response(request, page, if_none_match, if_modified_since, accept_encoding)
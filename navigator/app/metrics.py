@@ -0,0 +1,297 @@
+"""
+Prometheus metrics for the navigator, served as text from /metrics.
+
+- HTTP: a latency histogram and a response counter per route and status,
+  and a gauge of requests in flight (`MetricsMiddleware`).
+- Database: statement counts and durations per statement, from
+  SQLAlchemy cursor events on every engine (`instrument_engine`). The
+  label is a short hash of the statement fingerprint and its first
+  characters; the full statement is logged once, when its label is first
+  seen, rather than repeated in every sample line.
+- Anything else registers its own metrics or a scrape-time collector
+  (see `render` for markdown render times and the render cache).
+
+The exposition format is simple enough that the metric types below are
+implemented here rather than pulling in prometheus_client.
+"""
+import abc
+import functools
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+
+from .compression import route_label
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """The sample lines of every label set."""
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        names = self.label_names + ("le",)
+        for key, counts in items:
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {count}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {counts[-1]!r}"
+            yield f"{self.name}_count{labels} {counts[-2]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def register_collector(self, collect: Callable[[], Iterable[_Metric]]):
+        """Registers a function that builds metrics from current state at every scrape."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_in_flight = registry.gauge(
+    "navigator_http_requests_in_flight", "HTTP requests currently being handled.", ["method"]
+)
+http_request_duration = registry.histogram(
+    "navigator_http_request_duration_seconds", "HTTP request latency, until the last body byte is sent.",
+    ["method", "route"],
+)
+http_responses = registry.counter(
+    "navigator_http_responses_total", "HTTP responses by route and status code.", ["method", "route", "status"]
+)
+db_queries = registry.counter(
+    "navigator_db_queries_total", "SQL statements executed, by statement.", ["statement"]
+)
+db_query_duration = registry.histogram(
+    "navigator_db_query_duration_seconds", "SQL statement execution time, by statement.",
+    ["statement"], buckets=QUERY_BUCKETS,
+)
+
+
+# --- HTTP ---
+
+class MetricsMiddleware:
+    """Times every HTTP request and counts responses per route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500  # Reported if the app fails before starting a response.
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            # Unmatched paths share one label so they cannot blow up the series count.
+            route = route_label(scope, fallback="unmatched")
+            http_request_duration.observe(elapsed, method=method, route=route)
+            http_responses.inc(method=method, route=route, status=str(status))
+
+
+# --- Database ---
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_LIST_RE = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Normalizes a SQL statement so that executions differing only in literal
+    values or IN-list length share one label.
+    """
+    normalized = _WHITESPACE_RE.sub(" ", statement).strip()
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    return _VALUES_LIST_RE.sub(r"\1", normalized)
+
+
+# Statement labels are "<hash> <first STATEMENT_LABEL_CHARS characters>" of
+# the fingerprint. Past MAX_STATEMENT_LABELS distinct statements, new ones
+# are counted under OTHER_STATEMENT so the series count stays bounded.
+STATEMENT_LABEL_CHARS = 40
+MAX_STATEMENT_LABELS = 500
+OTHER_STATEMENT = "other"
+
+_statement_labels: Dict[str, str] = {}
+_statement_labels_lock = threading.Lock()
+
+
+def statement_label(statement: str) -> str:
+    """The `statement` label value of a SQL statement."""
+    normalized = fingerprint(statement)
+    label = _statement_labels.get(normalized)
+    if label is not None:
+        return label
+    with _statement_labels_lock:
+        label = _statement_labels.get(normalized)
+        if label is None:
+            if len(_statement_labels) >= MAX_STATEMENT_LABELS:
+                return OTHER_STATEMENT
+            digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=4).hexdigest()
+            label = _statement_labels[normalized] = f"{digest} {normalized[:STATEMENT_LABEL_CHARS]}"
+            logger.info("Metrics statement label %s: %s", digest, normalized)
+    return label
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    label = statement_label(statement)
+    db_queries.inc(statement=label)
+    db_query_duration.observe(time.perf_counter() - start, statement=label)
+
+
+def instrument_engine(engine):
+    """Records every statement run through `engine` (pass `.sync_engine` for async engines)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,8 +1,12 @@
 import datetime
-from sqlalchemy import Column, Integer, String, Date, Text
+from sqlalchemy import Column, Integer, String, Date, Text, Index, LargeBinary
 from pydantic import BaseModel, ConfigDict
 from .database import Base # Import Base from database.py
 
+VERSIONED_COLUMNS = (
+    "name", "project_type", "maturity", "status", "description", "readme_path", "source_url", "created_date",
+)
+
 # SQLAlchemy Model
 class Project(Base):
     __tablename__ = "projects"
@@ -16,6 +20,62 @@ class Project(Base):
     readme_path = Column(String, nullable=False, unique=True)
     source_url = Column(String)  # 引用原文URL
     created_date = Column(Date, default=datetime.date.today)
+    # Bumped on every content change; served as the ETag for If-Match updates.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Composite indexes back the filtered, keyset-paginated list endpoint:
+    # each equality filter is followed by the (created_date, id) sort key.
+    __table_args__ = (
+        Index("ix_projects_created_date_id", "created_date", "id"),
+        Index("ix_projects_status_created_date_id", "status", "created_date", "id"),
+        Index("ix_projects_maturity_created_date_id", "maturity", "created_date", "id"),
+        Index("ix_projects_project_type_created_date_id", "project_type", "created_date", "id"),
+        # Writers that don't bump the version themselves (bulk upserts, the
+        # folder watcher, the sqlite3 shell) get it bumped for them when a
+        # column actually changes.
+        {"info": {"triggers": [
+            "CREATE TRIGGER IF NOT EXISTS projects_version_au AFTER UPDATE ON projects "
+            "WHEN NEW.version = OLD.version AND ("
+            + " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in VERSIONED_COLUMNS)
+            + ") BEGIN UPDATE projects SET version = OLD.version + 1 WHERE id = NEW.id; END"
+        ]}},
+    )
+
+# Markdown links between project folders, maintained by `links.sync_links`.
+# Both directions of the graph are indexed: outgoing by source project,
+# incoming by target project, and projects sharing a target by target.
+class DocumentLink(Base):
+    __tablename__ = "document_links"
+
+    source_path = Column(String, primary_key=True)
+    target = Column(String, primary_key=True)
+    source_project = Column(String, nullable=False)
+    target_project = Column(String)
+    text = Column(String)
+
+    __table_args__ = (
+        Index("ix_document_links_source_project", "source_project", "target_project"),
+        Index("ix_document_links_target_project", "target_project", "source_project"),
+        Index("ix_document_links_target", "target", "source_project"),
+    )
+
+# The (mtime, size) each markdown file had when its links were last parsed.
+class LinkedFile(Base):
+    __tablename__ = "linked_files"
+
+    path = Column(String, primary_key=True)
+    mtime_ns = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+
+# MinHash signature of each project's name and description, maintained by
+# `duplicates.store_signatures`; `version` is the project version it was
+# computed from.
+class ProjectSignature(Base):
+    __tablename__ = "project_signatures"
+
+    project_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    signature = Column(LargeBinary, nullable=False)
 
 # Pydantic Schemas
 class ProjectBase(BaseModel):
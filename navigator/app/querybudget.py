@@ -0,0 +1,189 @@
+"""
+Per-request SQL accounting, to catch N+1 patterns and slow scans early.
+
+`QueryBudgetMiddleware` counts the statements each request runs, and the
+time they take, from SQLAlchemy cursor events (`instrument_engine`). The
+totals go out in a `Server-Timing` header. A request that runs more
+statements than its route's budget is logged. With
+NAVIGATOR_QUERY_BUDGET_ENFORCE=1 (for test runs) the budget is checked
+before the response starts, and an over-budget request gets a 500 carrying
+the report instead, so the offending route fails loudly. Statements run
+after the response has started (a streamed body) can only be logged.
+
+Any statement slower than NAVIGATOR_SLOW_QUERY_MS is logged with its
+`EXPLAIN QUERY PLAN`, whether or not it ran inside a request.
+"""
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from .compression import route_label
+from .metrics import fingerprint
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.environ.get("NAVIGATOR_SLOW_QUERY_MS", 100))
+DEFAULT_BUDGET = int(os.environ.get("NAVIGATOR_QUERY_BUDGET", 20))
+ENFORCE = os.environ.get("NAVIGATOR_QUERY_BUDGET_ENFORCE", "0") == "1"
+
+# Statement budgets per (method, route template). These routes run a fixed
+# number of statements however many projects there are; a higher count
+# means a per-row query crept in. None means unbounded (the work scales
+# with the request body).
+ROUTE_BUDGETS: Dict[Tuple[str, str], Optional[int]] = {
+    ("GET", "/api/projects"): 1,
+    ("GET", "/api/projects/search"): 2,
+    ("GET", "/api/projects/stats"): 1,
+    ("GET", "/api/projects/export"): 1,
+    ("GET", "/api/projects/{project_id}"): 1,
+    ("GET", "/api/projects/{project_id}/related"): 6,
+    ("GET", "/api/projects/{project_id}/similar"): 2,
+    ("POST", "/api/projects"): 6,
+    ("PUT", "/api/projects/{project_id}"): 4,
+    ("PATCH", "/api/projects/{project_id}"): 4,
+    ("POST", "/api/projects/bulk"): None,
+    ("GET", "/view/{file_path:path}"): 0,
+    ("GET", "/api/docs/{file_path:path}/toc"): 0,
+    ("GET", "/api/docs/{file_path:path}/sections/{anchor}"): 0,
+    ("GET", "/{full_path:path}"): 0,
+}
+
+# Statements kept per request for the over-budget report.
+MAX_RECORDED = 50
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class RequestQueries:
+    """Statements run on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+    def add(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if len(self.statements) < MAX_RECORDED:
+            self.statements.append((statement, seconds))
+
+
+# Set per request; copied into the threadpool with the rest of the context.
+current_request: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "navigator_request_queries", default=None
+)
+
+
+def budget_for(method: str, route: str) -> Optional[int]:
+    return ROUTE_BUDGETS.get((method, route), DEFAULT_BUDGET)
+
+
+# --- Engine events ---
+
+def _explain(conn, statement: str, parameters) -> str:
+    if conn.dialect.name != "sqlite" or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return "(no plan)"
+    if isinstance(parameters, list):  # executemany: explain the first row
+        parameters = parameters[0] if parameters else ()
+    # A raw DBAPI cursor keeps the EXPLAIN itself out of the cursor events.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(f"  {row[-1]}" for row in cursor.fetchall())
+    except Exception as e:  # The plan is diagnostic only; never fail the query.
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._budget_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_budget_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    request = current_request.get()
+    if request is not None:
+        request.add(fingerprint(statement), elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms): %s\n%s", elapsed * 1000, fingerprint(statement), _explain(conn, statement, parameters)
+        )
+
+
+def instrument_engine(engine):
+    """Attributes every statement run through `engine` to the current request."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+class QueryBudgetMiddleware:
+    """Counts each request's statements and checks them against its route's budget."""
+
+    def __init__(self, app, enforce: bool = ENFORCE):
+        self.app = app
+        self.enforce = enforce
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_request.set(queries)
+        rejected = False
+
+        async def send_with_timing(message):
+            nonlocal rejected
+            if rejected:
+                return  # The app's own response is replaced by the 500 already sent.
+            if message["type"] == "http.response.start":
+                report = self._over_budget(scope, queries)
+                if report is not None and self.enforce:
+                    rejected = True
+                    logger.error(report)
+                    await self._reject(send, report)
+                    return
+                timing = f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries"'
+                message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+        if not rejected:
+            report = self._over_budget(scope, queries)
+            if report is not None:
+                logger.warning(report)
+
+    def _over_budget(self, scope, queries: RequestQueries) -> Optional[str]:
+        """The over-budget report for the request so far, or None while it is within budget."""
+        method = scope["method"]
+        route = route_label(scope)
+        budget = budget_for(method, route)
+        if budget is None or queries.count <= budget:
+            return None
+        report = "\n".join(f"  {seconds * 1000:7.2f} ms  {statement}" for statement, seconds in queries.statements)
+        return f"{method} {route} ran {queries.count} statements (budget {budget}):\n{report}"
+
+    @staticmethod
+    async def _reject(send, report: str):
+        body = f"Query budget exceeded: {report}".encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
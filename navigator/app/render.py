@@ -0,0 +1,295 @@
+"""
+Markdown-to-HTML rendering for the /view endpoint, with an in-process cache.
+
+Rendered pages are cached under (resolved path, mtime, size), so an edited
+file simply misses the cache and its stale entry ages out of the LRU. The
+cache is bounded by the total size of the HTML it holds rather than by
+entry count, because analysis documents vary in size by orders of magnitude.
+
+The frontend's index.html is served the same way, from a `SpaShell` kept in
+memory and rebuilt when the file changes.
+"""
+import email.utils
+import hashlib
+import logging
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from . import assets, compression, markdown_engines, metrics
+
+logger = logging.getLogger(__name__)
+
+# Markdown engine for /view: "markdown2" (default) or "markdown-it"; see
+# `markdown_engines`.
+MARKDOWN_ENGINE = os.environ.get("NAVIGATOR_MARKDOWN_ENGINE", "markdown2")
+render_markdown = markdown_engines.get_renderer(MARKDOWN_ENGINE)
+
+# Total bytes of rendered HTML, including its compressed variants, kept in
+# memory (default 64 MiB).
+CACHE_MAX_BYTES = int(os.environ.get("NAVIGATOR_RENDER_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Set NAVIGATOR_PRERENDER=1 to render every markdown file into the cache in
+# the background at startup, using NAVIGATOR_PRERENDER_WORKERS processes
+# (default: one per CPU).
+PRERENDER_ON_STARTUP = os.environ.get("NAVIGATOR_PRERENDER", "0") == "1"
+PRERENDER_WORKERS = int(os.environ.get("NAVIGATOR_PRERENDER_WORKERS", 0)) or None
+
+CacheKey = Tuple[str, int, int]
+
+
+class RenderedPage(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: str
+    # Stored gzip/brotli encodings of `body`, keyed by content coding.
+    variants: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def representation(self, coding: Optional[str]) -> Tuple[bytes, Optional[str], str]:
+        """Returns (body, content coding or None, ETag) to send for a negotiated coding."""
+        if coding in self.variants:
+            return self.variants[coding], coding, compression.variant_etag(self.etag, coding)
+        return self.body, None, self.etag
+
+
+class WarmupReport(NamedTuple):
+    documents: int
+    failed: int
+    seconds: float
+
+
+class RenderCache:
+    """A thread-safe LRU of rendered pages bounded by a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, RenderedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[RenderedPage]:
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: CacheKey, page: RenderedPage):
+        size = page.size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.size
+            self._entries[key] = page
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = RenderCache(CACHE_MAX_BYTES)
+
+render_seconds = metrics.registry.histogram(
+    "navigator_markdown_render_seconds", "Markdown to HTML conversion time per document.",
+    ["engine", "source"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def _cache_metrics():
+    hits = metrics.Counter("navigator_render_cache_hits_total", "/view render cache hits.")
+    hits.inc(cache.hits)
+    misses = metrics.Counter("navigator_render_cache_misses_total", "/view render cache misses.")
+    misses.inc(cache.misses)
+    lookups = cache.hits + cache.misses
+    ratio = metrics.Gauge("navigator_render_cache_hit_ratio", "Share of /view lookups served from the render cache.")
+    ratio.set(cache.hits / lookups if lookups else 0.0)
+    size = metrics.Gauge("navigator_render_cache_bytes", "Bytes of rendered pages held in the render cache.")
+    size.set(cache.current_bytes)
+    entries = metrics.Gauge("navigator_render_cache_entries", "Pages held in the render cache.")
+    entries.set(len(cache))
+    return [hits, misses, ratio, size, entries]
+
+
+metrics.registry.register_collector(_cache_metrics)
+
+
+def cache_key(path: pathlib.Path, stat: os.stat_result) -> CacheKey:
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def render_html(content: str, title: str) -> str:
+    """Converts markdown to a full HTML document with the GitHub-like styling."""
+    html_fragment = render_markdown(content)
+
+    return f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>
+        <link rel="stylesheet" href="{assets.asset_url("github-markdown.css")}">
+        <style>
+            body {{
+                box-sizing: border-box;
+                min-width: 200px;
+                max-width: 980px;
+                margin: 0 auto;
+                padding: 45px;
+            }}
+        </style>
+    </head>
+    <body>
+        <main class="markdown-body">
+            {html_fragment}
+        </main>
+    </body>
+    </html>
+    """
+
+
+def build_page(html: str, mtime: float, stored: bool = False) -> RenderedPage:
+    """
+    Builds a cacheable page with its compressed variants. `stored=True`
+    uses the slowest, smallest settings, for pre-rendering off the request path.
+    """
+    body = html.encode("utf-8")
+    return RenderedPage(
+        body=body,
+        etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        last_modified=email.utils.formatdate(mtime, usegmt=True),
+        variants=compression.precompress(body, stored=stored),
+    )
+
+
+def get_page(path: pathlib.Path) -> RenderedPage:
+    """Returns the rendered page for a markdown file, rendering it on a cache miss."""
+    stat = path.stat()
+    key = cache_key(path, stat)
+    page = cache.get(key)
+    if page is None:
+        content = path.read_text(encoding="utf-8")
+        start = time.perf_counter()
+        html = render_html(content, path.name)
+        render_seconds.observe(time.perf_counter() - start, engine=MARKDOWN_ENGINE, source="request")
+        page = build_page(html, stat.st_mtime)
+        cache.put(key, page)
+    return page
+
+
+class SpaShell:
+    """
+    The frontend's index.html, served for every non-API path. It is held in
+    memory with asset URLs content-hashed and compressed variants built,
+    and rebuilt only when index.html (or an asset it references) changes.
+    """
+
+    def __init__(self, index_path: pathlib.Path):
+        self.index_path = index_path
+        self._source_key = None
+        self._template = None
+        self._html = None
+        self._page: Optional[RenderedPage] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> RenderedPage:
+        stat = self.index_path.stat()
+        source_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if source_key != self._source_key:
+                self._template = self.index_path.read_text(encoding="utf-8")
+                self._source_key = source_key
+            # Cheap when nothing changed: asset hashes are cached by mtime.
+            html = assets.rewrite_asset_urls(self._template, self.index_path.parent)
+            if html != self._html:
+                # Stamped with the rebuild time, not index.html's mtime: an
+                # edited asset changes the page without touching the file.
+                self._page = build_page(html, time.time(), stored=True)
+                self._html = html
+            return self._page
+
+
+def _render_file(path_str: str) -> Tuple[CacheKey, RenderedPage, float]:
+    # Runs in a worker process, so it must stay a picklable top-level function.
+    path = pathlib.Path(path_str)
+    stat = path.stat()
+    content = path.read_text(encoding="utf-8")
+    start = time.perf_counter()
+    html = render_html(content, path.name)
+    seconds = time.perf_counter() - start
+    return cache_key(path, stat), build_page(html, stat.st_mtime, stored=True), seconds
+
+
+def prerender(root: pathlib.Path, max_workers: Optional[int] = None) -> WarmupReport:
+    """
+    Renders every markdown file under `root` in a process pool and stores
+    the results in the cache. Blocks until done; run it off the event loop.
+    A file that fails to render, or whose worker died, is logged and counted
+    in `failed`. Workers are spawned rather than forked, since the server
+    already runs threads when this starts.
+    """
+    start = time.perf_counter()
+    root = root.resolve()
+    paths = sorted({
+        str(path.resolve())
+        for path in root.rglob("*.md")
+        if path.is_file() and str(path.resolve()).startswith(str(root))
+    })
+    documents = failed = 0
+    if paths:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_render_file, path): path for path in paths}
+            for future in as_completed(futures):
+                try:
+                    key, page, seconds = future.result()
+                except Exception:  # Includes BrokenProcessPool; the rest of the warmup goes on.
+                    logger.exception("Pre-rendering %s failed", futures[future])
+                    failed += 1
+                    continue
+                render_seconds.observe(seconds, engine=MARKDOWN_ENGINE, source="prerender")
+                cache.put(key, page)
+                documents += 1
+    return WarmupReport(documents, failed, time.perf_counter() - start)
+
+
+def is_not_modified(
+    page: RenderedPage, if_none_match: Optional[str], if_modified_since: Optional[str], etag: Optional[str] = None
+) -> bool:
+    """
+    Evaluates conditional request headers against a page (RFC 9110 §13.2.2).
+    Pass the ETag of the representation being sent if it isn't `page.etag`.
+    """
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or (etag or page.etag) in tags
+    if if_modified_since is not None:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+            return email.utils.parsedate_to_datetime(page.last_modified) <= since
+        except (TypeError, ValueError):
+            return False
+    return False
@@ -0,0 +1,14 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which natively handles dates and is
+    several times faster than the stdlib encoder on large lists.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -0,0 +1,127 @@
+"""
+Helpers for reading project folders under ideaed-projects/: which files
+belong to a project, how stored readme_path values map onto them, and how
+to pull a title and description out of a README.
+"""
+import pathlib
+import re
+from typing import Optional, Tuple
+
+BASE_DIR = pathlib.Path(__file__).parent.parent.parent.resolve()
+PROJECTS_DIR = BASE_DIR.joinpath("ideaed-projects").resolve()
+
+README_NAME = "README.md"
+
+# Defaults for projects discovered on disk, matching `nav-admin add`.
+DEFAULT_PROJECT_TYPE = "工具类"
+DEFAULT_MATURITY = "🟡 中"
+DEFAULT_STATUS = "📋 规划中"
+
+DESCRIPTION_MAX_LENGTH = 300
+
+_SKIPPED_LINE_PREFIXES = ("#", "<", "![", "[![", "|", "```", "---", "***")
+_METADATA_LINE_RE = re.compile(r"^\*\*[^*]+\*\*\s*[:：]")
+_MARKUP_RE = re.compile(r"\*\*|__|`|<[^>]+>")
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+
+
+def is_tracked_file(name: str) -> bool:
+    """README and analysis documents are the files that describe a project."""
+    return name == README_NAME or (name.endswith(".md") and "analysis" in name)
+
+
+def canonical_readme_path(readme_path: Optional[str]) -> Optional[str]:
+    """
+    Normalizes a stored readme_path to "ideaed-projects/<slug>/README.md".
+
+    Stored paths come from several tools and may be relative, prefixed with
+    "./" or absolute Windows paths, so only the part from "ideaed-projects/"
+    onwards is kept. Returns None for paths outside ideaed-projects/.
+    """
+    if not readme_path:
+        return None
+    normalized = readme_path.replace("\\", "/")
+    marker = normalized.find("ideaed-projects/")
+    if marker == -1:
+        return None
+    return normalized[marker:]
+
+
+def resolve_readme(readme_path: Optional[str]) -> Optional[pathlib.Path]:
+    """Maps a stored readme_path onto an existing file under ideaed-projects/."""
+    canonical = canonical_readme_path(readme_path)
+    if canonical is None:
+        return None
+    candidate = BASE_DIR.joinpath(canonical).resolve()
+    if not str(candidate).startswith(str(PROJECTS_DIR)) or not candidate.is_file():
+        return None
+    return candidate
+
+
+def _clean(line: str) -> str:
+    line = _LINK_RE.sub(r"\1", line)
+    return _MARKUP_RE.sub("", line).strip()
+
+
+def extract_title_and_description(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the first level-one heading and the first prose paragraph of a
+    markdown document. Badges, HTML, tables and "**label**: value" metadata
+    lines are skipped; blockquote and list markers are stripped.
+    """
+    title = None
+    paragraph = []
+    in_code = False
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        if title is None and line.startswith("# "):
+            title = _clean(line[2:])
+            continue
+        if not line:
+            if paragraph:
+                break
+            continue
+        if line.startswith(_SKIPPED_LINE_PREFIXES) or _METADATA_LINE_RE.match(line):
+            if paragraph:
+                break
+            continue
+        line = line.lstrip(">").strip()
+        if line.startswith(("- ", "* ")):
+            line = line[2:]
+        line = _clean(line)
+        if line:
+            paragraph.append(line)
+
+    description = " ".join(paragraph) or None
+    if description and len(description) > DESCRIPTION_MAX_LENGTH:
+        description = description[:DESCRIPTION_MAX_LENGTH - 1] + "…"
+    return title, description
+
+
+def describe_project(project_dir: pathlib.Path) -> Optional[dict]:
+    """
+    Builds a project record from a folder's README (falling back to its
+    analysis documents for the description). Returns None without a README.
+    """
+    readme = project_dir / README_NAME
+    if not readme.is_file():
+        return None
+    title, description = extract_title_and_description(readme.read_text(encoding="utf-8", errors="replace"))
+    if description is None:
+        for analysis in sorted(project_dir.glob("*analysis*.md")):
+            _, description = extract_title_and_description(analysis.read_text(encoding="utf-8", errors="replace"))
+            if description:
+                break
+    return {
+        "name": title or project_dir.name,
+        "project_type": DEFAULT_PROJECT_TYPE,
+        "maturity": DEFAULT_MATURITY,
+        "status": DEFAULT_STATUS,
+        "description": description,
+        "readme_path": f"ideaed-projects/{project_dir.name}/{README_NAME}",
+    }
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 class ProjectBase(BaseModel):
     name: str
@@ -14,8 +14,98 @@ class ProjectBase(BaseModel):
 class ProjectCreate(ProjectBase):
     pass
 
+class ProjectUpdate(BaseModel):
+    """Fields of a PATCH request; only the fields that are sent are changed."""
+    name: Optional[str] = None
+    project_type: Optional[str] = None
+    maturity: Optional[str] = None
+    status: Optional[str] = None
+    description: Optional[str] = None
+    readme_path: Optional[str] = None
+    source_url: Optional[str] = None
+
+    @field_validator("name", "project_type", "maturity", "status", "readme_path")
+    @classmethod
+    def not_null(cls, value):
+        # Omit a field to leave it alone; only the optional fields can be cleared.
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class Project(ProjectBase):
     id: int
-    created_date: date
+    # NULL for rows inserted without one, e.g. from the sqlite3 shell.
+    created_date: Optional[date] = None
+    version: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ProjectSearchResult(Project):
+    score: float
+
+class PossibleDuplicate(BaseModel):
+    id: int
+    name: str
+    readme_path: str
+    similarity: float  # estimated Jaccard similarity of name + description tokens
+
+class ProjectCreated(Project):
+    # Existing projects that look like the same idea; the project is created regardless.
+    possible_duplicates: List[PossibleDuplicate] = []
+
+class ProjectStats(BaseModel):
+    total: int
+    by_type: Dict[str, int]
+    by_maturity: Dict[str, int]
+    by_status: Dict[str, int]
+
+class ProjectBulkItem(ProjectCreate):
+    # Kept on update when omitted; defaults to today for new projects.
+    created_date: Optional[date] = None
+
+class BulkRowResult(BaseModel):
+    index: int
+    readme_path: str
+    outcome: Literal["created", "updated", "unchanged", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkUpsertResult(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    errors: int
+    results: List[BulkRowResult]
+
+class DocumentHeading(BaseModel):
+    level: int
+    title: str
+    anchor: str
+    line: int
+    start: int
+    end: int
+
+class DocumentToc(BaseModel):
+    path: str
+    headings: List[DocumentHeading]
+
+class ProjectRef(BaseModel):
+    slug: str  # folder under ideaed-projects/
+    id: Optional[int] = None  # None for folders without a catalog entry
+    name: Optional[str] = None
+
+class ProjectLink(BaseModel):
+    source_path: str
+    target: str  # repository-relative path or web URL
+    text: Optional[str] = None
+    project: Optional[ProjectRef] = None  # the other project, if the link crosses folders
+
+class TwoHopProject(BaseModel):
+    project: ProjectRef
+    via: List[str]  # shared targets or intermediate projects
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class RelatedProjects(BaseModel):
+    project_id: int
+    outgoing: List[ProjectLink]
+    incoming: List[ProjectLink]
+    two_hop: List[TwoHopProject]
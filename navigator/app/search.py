@@ -0,0 +1,178 @@
+"""
+Full-text search over the projects table, backed by an SQLite FTS5 index.
+
+FTS5's built-in tokenizers split Chinese text into whole runs of characters,
+so a query for "数据" would never match "数据平台". Instead, text is segmented
+in Python before it reaches SQLite: every CJK run becomes overlapping
+bigrams followed by its last character ("数据平台" -> "数据 据平 平台 台") and
+everything else is kept as words. Queries are segmented the same way, with
+each CJK run matched as a phrase so consecutive bigrams behave like a
+substring match. A single character is matched as a prefix ("数"*): every
+character of a run starts one of its tokens, so this finds it anywhere.
+"""
+import os
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from . import models, scanner
+
+# The table name carries the version of what `segment` stores, so databases
+# indexed by an older segmentation get a fresh index at startup.
+FTS_TABLE = "projects_fts_v3"
+_OLD_FTS_TABLES = ("projects_fts", "projects_fts_v2")
+
+# Column weights for bm25(): a hit in the name counts far more than one buried
+# in a README body.
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+# Set NAVIGATOR_SEARCH_READMES=0 to index the database fields only.
+INDEX_READMES = os.environ.get("NAVIGATOR_SEARCH_READMES", "1") != "0"
+
+_CJK_RANGES = (
+    "\u3040-\u30ff"  # Hiragana / Katakana
+    "\u3400-\u4dbf"  # CJK Extension A
+    "\u4e00-\u9fff"  # CJK Unified Ideographs
+    "\uac00-\ud7af"  # Hangul syllables
+    "\uf900-\ufaff"  # CJK Compatibility Ideographs
+)
+# Words exclude CJK characters, so mixed text ("AI销售教练") splits into "ai" and a CJK run.
+_TOKEN_RE = re.compile(rf"([{_CJK_RANGES}]+)|([^\W_{_CJK_RANGES}]+)")
+
+
+def _bigrams(run: str) -> list:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segment(value: Optional[str]) -> str:
+    """Turns free text into the space-separated tokens stored in the index."""
+    if not value:
+        return ""
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(value.lower()):
+        if not cjk:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            # The trailing character lets a one-character prefix query find
+            # the run's last character too.
+            tokens.extend(_bigrams(cjk))
+            tokens.append(cjk[-1])
+    return " ".join(tokens)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Builds an FTS5 MATCH expression requiring every term of `query`.
+
+    CJK runs become phrases of bigrams and a single CJK character a prefix
+    query; other words become prefix queries so partially typed words still
+    match. Returns None if nothing is searchable.
+    """
+    terms = []
+    for cjk, word in _TOKEN_RE.findall(query.lower()):
+        if len(cjk) == 1:
+            terms.append(f'"{cjk}"*')
+        elif cjk:
+            terms.append('"' + " ".join(_bigrams(cjk)) + '"')
+        else:
+            terms.append(f'"{word}"*')
+    return " AND ".join(terms) if terms else None
+
+
+def _read_readme(readme_path: Optional[str]) -> str:
+    if not INDEX_READMES:
+        return ""
+    path = scanner.resolve_readme(readme_path)
+    if path is None:
+        return ""
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def _document(row) -> dict:
+    return {
+        "rowid": row.id,
+        "name": segment(row.name),
+        "description": segment(row.description),
+        "project_type": segment(row.project_type),
+        "body": segment(_read_readme(row.readme_path)),
+    }
+
+
+# --- Index maintenance ---
+
+def create_index(connection: Connection):
+    for old_table in _OLD_FTS_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {old_table}"))
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(name, description, project_type, body, tokenize='unicode61 remove_diacritics 2')"
+    ))
+
+
+def index_projects(connection: Connection, rows: Iterable):
+    """(Re)indexes the given project rows; anything with id/name/... attributes works."""
+    documents = [_document(row) for row in rows]
+    if not documents:
+        return
+    connection.execute(
+        text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"),
+        [{"rowid": d["rowid"]} for d in documents],
+    )
+    connection.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, project_type, body) "
+            "VALUES (:rowid, :name, :description, :project_type, :body)"
+        ),
+        documents,
+    )
+
+
+def unindex_projects(connection: Connection, project_ids: Iterable[int]):
+    params = [{"rowid": project_id} for project_id in project_ids]
+    if params:
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), params)
+
+
+# Projects segmented and written per batch when rebuilding the whole index.
+REBUILD_BATCH_SIZE = 5000
+
+def rebuild_index(connection: Connection):
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = connection.execution_options(yield_per=REBUILD_BATCH_SIZE).execute(
+        text("SELECT id, name, description, project_type, readme_path FROM projects")
+    )
+    for rows in result.partitions():
+        index_projects(connection, rows)
+
+
+def init_search_index(engine):
+    """Creates the FTS table and rebuilds it if it is out of step with projects."""
+    with engine.begin() as connection:
+        create_index(connection)
+        indexed = connection.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        total = connection.execute(text("SELECT count(*) FROM projects")).scalar()
+        if indexed != total:
+            rebuild_index(connection)
+
+
+# Keep the index in step with ORM writes to models.Project. Bulk Core
+# statements bypass these hooks and must call index_projects themselves.
+
+@event.listens_for(models.Project, "after_insert")
+@event.listens_for(models.Project, "after_update")
+def _index_project(mapper, connection, target):
+    index_projects(connection, [target])
+
+
+@event.listens_for(models.Project, "after_delete")
+def _unindex_project(mapper, connection, target):
+    unindex_projects(connection, [target.id])
@@ -0,0 +1,364 @@
+"""
+Project similarity ("related ideas" and likely duplicates) from a local
+TF-IDF index; no model service involved.
+
+Each project's name, description and README are segmented like the search
+index (CJK text as bigrams, other text as words). Terms are weighted
+sublinear-tf × smoothed idf, and every row is L2-normalized, so the dot
+product of two rows is their cosine similarity.
+
+The matrix is kept in CSR form as float32/int32 .npy files next to the
+database ("navigator.db.similarity/", or NAVIGATOR_SIMILARITY_DIR) and
+memory-mapped, so loading it is instant and the OS shares its pages
+between workers. Each build writes a new generation subdirectory and then
+swaps the CURRENT file naming it, so a worker loading during a rebuild
+sees either the old index or the new one, never a mix of both. Scoring a project against all others is one vectorized
+sparse matrix-vector product over the mapped arrays.
+
+The index is rebuilt at startup when it is missing or the catalog changed
+since it was built (project count, highest id, total version, or the size
+or mtime of a README under ideaed-projects/), then
+every REFRESH_INTERVAL seconds if the catalog has changed again. Projects
+added since the last build are not in the index; /similar answers 503 for
+them until the next rebuild rather than an incomplete list. On demand:
+
+    cd navigator
+    python -m app.similarity
+
+Requires numpy: pip install "nav-admin[similarity]".
+"""
+import collections
+import datetime
+import hashlib
+import json
+import math
+import os
+import pathlib
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+
+from . import database, models, scanner, search
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency; /similar answers 503 without it.
+    np = None
+
+
+def _default_directory() -> Optional[pathlib.Path]:
+    path = make_url(database.DATABASE_URL).database
+    if not path or path == ":memory:":
+        return None
+    return pathlib.Path(path + ".similarity")
+
+
+_configured_dir = os.environ.get("NAVIGATOR_SIMILARITY_DIR")
+INDEX_DIR = pathlib.Path(_configured_dir) if _configured_dir else _default_directory()
+
+# Rebuild a missing or stale index at startup (in the background).
+BUILD_ON_STARTUP = os.environ.get("NAVIGATOR_SIMILARITY_BUILD", "1") == "1"
+
+# Seconds between checks for catalog changes that make the index stale
+# (with NAVIGATOR_SIMILARITY_BUILD=1); 0 rebuilds at startup only.
+REFRESH_INTERVAL = float(os.environ.get("NAVIGATOR_SIMILARITY_REFRESH", 60))
+
+# Projects read and vectorized per batch while building.
+BUILD_BATCH_SIZE = 2000
+
+_ARRAYS = ("project_ids", "indptr", "indices", "data", "rows", "idf")
+
+# Names the generation subdirectory holding the current index.
+_POINTER = "CURRENT"
+
+
+class NotIndexed(LookupError):
+    """The project was added after the index was built."""
+
+
+class BuildReport(NamedTuple):
+    projects: int
+    terms: int
+    nonzeros: int
+    bytes: int
+    seconds: float
+
+
+def project_text(project) -> str:
+    """Name, description and README body of a project row."""
+    parts = [project.name or "", project.description or ""]
+    readme = scanner.resolve_readme(project.readme_path)
+    if readme is not None:
+        try:
+            parts.append(readme.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError):
+            pass
+    return "\n".join(parts)
+
+
+def term_counts(text: str) -> collections.Counter:
+    return collections.Counter(search.segment(text).split())
+
+
+def _readme_stamp() -> int:
+    """
+    Folds the path, size and mtime of every README under ideaed-projects/
+    into one number. README edits do not bump a project's version, so they
+    are caught here; the cost follows the files on disk, not the catalog size.
+    """
+    root = scanner.PROJECTS_DIR
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(root.rglob(scanner.README_NAME)):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{path.relative_to(root).as_posix()}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+def catalog_fingerprint(connection) -> List[int]:
+    """Changes whenever a project is added, removed or edited, or a README changes."""
+    table = models.Project.__table__
+    row = connection.execute(select(func.count(), func.max(table.c.id), func.total(table.c.version))).one()
+    return [row[0], row[1] or 0, int(row[2]), _readme_stamp()]
+
+
+def _weights(counts: collections.Counter, vocabulary: Dict[str, int], idf) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Sparse L2-normalized tf-idf vector (sorted column indices, float32 weights)."""
+    terms = sorted((vocabulary[term], count) for term, count in counts.items() if term in vocabulary)
+    if not terms:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    columns = np.fromiter((column for column, _ in terms), dtype=np.int32, count=len(terms))
+    tf = np.fromiter((1.0 + math.log(count) for _, count in terms), dtype=np.float32, count=len(terms))
+    values = tf * idf[columns]
+    return columns, (values / np.linalg.norm(values)).astype(np.float32)
+
+
+class SimilarityIndex:
+    """The current generation of a built index, memory-mapped from its directory."""
+
+    def __init__(self, directory: pathlib.Path):
+        self.directory = directory
+        self.generation = (directory / _POINTER).read_text(encoding="utf-8").strip()
+        files = directory / self.generation
+        self.meta = json.loads((files / "meta.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(files / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        self.project_ids = arrays["project_ids"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.data = arrays["data"]
+        self.rows = arrays["rows"]
+        self.idf = arrays["idf"]
+        terms = json.loads((files / "vocabulary.json").read_text(encoding="utf-8"))
+        self.vocabulary = {term: column for column, term in enumerate(terms)}
+        if len(self.project_ids) != self.meta["projects"] or len(self.data) != self.meta["nonzeros"]:
+            raise ValueError(f"Similarity index in {files} is incomplete.")
+
+    @property
+    def fingerprint(self) -> List[int]:
+        return self.meta["fingerprint"]
+
+    def row_of(self, project_id: int) -> Optional[int]:
+        # Rows are written in id order.
+        row = int(np.searchsorted(self.project_ids, project_id))
+        if row < len(self.project_ids) and self.project_ids[row] == project_id:
+            return row
+        return None
+
+    def row_vector(self, row: int):
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def top_k(self, columns, values, k: int, exclude_row: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(project id, cosine similarity) of the `k` most similar projects with a positive score."""
+        if len(columns) == 0 or len(self.project_ids) == 0:
+            return []
+        query = np.zeros(len(self.idf), dtype=np.float32)
+        query[columns] = values
+        # Sparse matrix × dense vector: every stored weight times the query's
+        # weight for its term, summed per row.
+        scores = np.bincount(self.rows, weights=self.data * query[self.indices], minlength=len(self.project_ids))
+        if exclude_row is not None:
+            scores[exclude_row] = 0.0
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(self.project_ids[row]), float(scores[row])) for row in best if scores[row] > 0]
+
+    def similar_to(self, project, k: int) -> List[Tuple[int, float]]:
+        """
+        Neighbours of a project row. Raises NotIndexed for a project added
+        after the build: scoring its current text would still miss the
+        projects added alongside it, often its closest matches.
+        """
+        row = self.row_of(project.id)
+        if row is None:
+            raise NotIndexed(project.id)
+        return self.top_k(*self.row_vector(row), k, exclude_row=row)
+
+
+# --- Building ---
+
+def _iter_projects(connection) -> Iterable:
+    table = models.Project.__table__
+    result = connection.execution_options(yield_per=BUILD_BATCH_SIZE).execute(
+        select(table.c.id, table.c.name, table.c.description, table.c.readme_path).order_by(table.c.id)
+    )
+    for rows in result.partitions():
+        yield from rows
+
+
+def _publish(directory: pathlib.Path, generation: str):
+    """
+    Points CURRENT at a fully written generation, in one atomic rename, then
+    deletes older generations. The one just replaced is kept, for a worker
+    that read CURRENT before the swap but has not mapped its files yet.
+    """
+    try:
+        previous = (directory / _POINTER).read_text(encoding="utf-8").strip()
+    except OSError:
+        previous = None
+    temporary = directory / f"{_POINTER}.{generation}.tmp"
+    temporary.write_text(generation, encoding="utf-8")
+    os.replace(temporary, directory / _POINTER)
+    for path in directory.glob("index-*"):
+        if path.is_dir() and path.name not in (generation, previous):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def build_index(engine, directory: Optional[pathlib.Path] = None) -> BuildReport:
+    """
+    Builds the index from the whole catalog as a new generation in
+    `directory` and makes it current. Both passes over the catalog run in
+    one read transaction, so they see the same projects. Readers holding
+    the previous generation keep it mapped.
+    """
+    if np is None:
+        raise RuntimeError('The similarity index requires numpy: pip install "nav-admin[similarity]"')
+    directory = directory or INDEX_DIR
+    start = time.perf_counter()
+
+    with engine.connect() as connection, connection.begin():
+        fingerprint = catalog_fingerprint(connection)
+        document_frequency = collections.Counter()
+        total = 0
+        for project in _iter_projects(connection):
+            document_frequency.update(term_counts(project_text(project)).keys())
+            total += 1
+        terms = sorted(document_frequency)
+        vocabulary = {term: column for column, term in enumerate(terms)}
+        idf = np.array(
+            [math.log((1 + total) / (1 + document_frequency[term])) + 1.0 for term in terms], dtype=np.float32
+        )
+        del document_frequency
+
+        project_ids, lengths, index_chunks, data_chunks = [], [], [], []
+        for project in _iter_projects(connection):
+            columns, values = _weights(term_counts(project_text(project)), vocabulary, idf)
+            project_ids.append(project.id)
+            lengths.append(len(columns))
+            index_chunks.append(columns)
+            data_chunks.append(values)
+
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    arrays = {
+        "project_ids": np.array(project_ids, dtype=np.int64),
+        "indptr": indptr,
+        "indices": np.concatenate(index_chunks) if index_chunks else np.empty(0, dtype=np.int32),
+        "data": np.concatenate(data_chunks) if data_chunks else np.empty(0, dtype=np.float32),
+        "rows": np.repeat(np.arange(len(lengths), dtype=np.int32), lengths),
+        "idf": idf,
+    }
+    generation = f"index-{time.time_ns()}-{os.getpid()}"
+    files = directory / generation
+    files.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(files / f"{name}.npy", array)
+    (files / "vocabulary.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+    meta = {
+        "projects": len(project_ids),
+        "terms": len(terms),
+        "nonzeros": int(indptr[-1]),
+        "fingerprint": fingerprint,
+        "built_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    (files / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    _publish(directory, generation)
+    size = sum(array.nbytes for array in arrays.values())
+    return BuildReport(meta["projects"], meta["terms"], meta["nonzeros"], size, time.perf_counter() - start)
+
+
+# --- The loaded index ---
+
+_current: Optional[SimilarityIndex] = None
+_lock = threading.Lock()
+
+
+def current() -> Optional[SimilarityIndex]:
+    return _current
+
+
+def load(directory: Optional[pathlib.Path] = None) -> Optional[SimilarityIndex]:
+    """Maps the index in `directory` and makes it current; None if there is no usable index."""
+    global _current
+    directory = directory or INDEX_DIR
+    if np is None or directory is None:
+        return None
+    try:
+        index = SimilarityIndex(directory)
+    except (OSError, ValueError, KeyError):
+        return None
+    with _lock:
+        _current = index
+    return index
+
+
+def refresh_enabled(directory: Optional[pathlib.Path] = None) -> bool:
+    """Whether the server should keep rebuilding the index as the catalog changes."""
+    return BUILD_ON_STARTUP and REFRESH_INTERVAL > 0 and np is not None and (directory or INDEX_DIR) is not None
+
+
+def init_similarity_index(
+    engine, directory: Optional[pathlib.Path] = None, build: bool = BUILD_ON_STARTUP
+) -> Optional[str]:
+    """
+    Loads the index, first (re)building it if it is missing or stale.
+    Returns a status line, or None if the current index is already up to date.
+    """
+    directory = directory or INDEX_DIR
+    if np is None:
+        return 'Similarity index disabled (pip install "nav-admin[similarity]").'
+    if directory is None:
+        return "Similarity index disabled (set NAVIGATOR_SIMILARITY_DIR for a non-file database)."
+    with engine.connect() as connection:
+        fingerprint = catalog_fingerprint(connection)
+    index = current()
+    if index is not None and index.directory == directory and index.fingerprint == fingerprint:
+        return None
+    # Another worker sharing the directory may already have rebuilt it.
+    index = load(directory)
+    if index is not None and index.fingerprint == fingerprint:
+        return f"Loaded similarity index of {index.meta['projects']} projects."
+    if not build:
+        return "Similarity index is stale; run python -m app.similarity." if index else "No similarity index."
+    report = build_index(engine, directory)
+    load(directory)
+    return (
+        f"Built similarity index of {report.projects} projects ({report.terms} terms, "
+        f"{report.bytes / 2 ** 20:.1f} MiB) in {report.seconds:.2f}s."
+    )
+
+
+if __name__ == "__main__":
+    database.init_db()
+    report = build_index(database.engine)
+    print(
+        f"Indexed {report.projects} projects: {report.terms} terms, {report.nonzeros} weights, "
+        f"{report.bytes / 2 ** 20:.1f} MiB in {INDEX_DIR} ({report.seconds:.2f}s)."
+    )
@@ -0,0 +1,91 @@
+"""
+Faceted project counts (by type, maturity and status) kept in a counter
+table, so catalog summaries cost O(number of distinct values) rather than a
+scan of the projects table.
+
+The counters are maintained by SQLite triggers on `projects`. That way
+every writer keeps them exact inside its own transaction: ORM inserts,
+bulk upserts, the folder watcher, and even edits made with the sqlite3
+shell. NULL facet values are counted under "".
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+COUNTS_TABLE = "project_facet_counts"
+FACETS = ("project_type", "maturity", "status")
+TOTAL_FACET = "total"
+
+
+def _facet_values(prefix: str) -> str:
+    rows = [f"('{facet}', COALESCE({prefix}.{facet}, ''))" for facet in FACETS]
+    rows.append(f"('{TOTAL_FACET}', '')")
+    return ", ".join(rows)
+
+
+def _increment(prefix: str) -> str:
+    return (
+        f"INSERT INTO {COUNTS_TABLE} (facet, value, count) "
+        f"SELECT column1, column2, 1 FROM (VALUES {_facet_values(prefix)}) WHERE true "
+        "ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;"
+    )
+
+
+def _decrement(prefix: str) -> str:
+    return (
+        f"UPDATE {COUNTS_TABLE} SET count = count - 1 "
+        f"WHERE (facet, value) IN (VALUES {_facet_values(prefix)});"
+        f"DELETE FROM {COUNTS_TABLE} WHERE count <= 0;"
+    )
+
+
+_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {COUNTS_TABLE} ("
+    "facet TEXT NOT NULL, value TEXT NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (facet, value)) WITHOUT ROWID",
+    f"CREATE TRIGGER IF NOT EXISTS projects_facet_counts_ai AFTER INSERT ON projects BEGIN "
+    f"{_increment('NEW')} END",
+    f"CREATE TRIGGER IF NOT EXISTS projects_facet_counts_ad AFTER DELETE ON projects BEGIN "
+    f"{_decrement('OLD')} END",
+    f"CREATE TRIGGER IF NOT EXISTS projects_facet_counts_au "
+    f"AFTER UPDATE OF {', '.join(FACETS)} ON projects BEGIN "
+    f"{_decrement('OLD')} {_increment('NEW')} END",
+]
+
+
+def rebuild_counts(connection: Connection):
+    """Recomputes every counter from the projects table with GROUP BY."""
+    connection.execute(text(f"DELETE FROM {COUNTS_TABLE}"))
+    for facet in FACETS:
+        connection.execute(text(
+            f"INSERT INTO {COUNTS_TABLE} (facet, value, count) "
+            f"SELECT '{facet}', COALESCE({facet}, ''), count(*) FROM projects GROUP BY 2"
+        ))
+    connection.execute(text(
+        f"INSERT INTO {COUNTS_TABLE} (facet, value, count) "
+        f"SELECT '{TOTAL_FACET}', '', count(*) FROM projects"
+    ))
+
+
+def init_facet_counts(engine):
+    """Creates the counter table and triggers, rebuilding counts that have drifted."""
+    with engine.begin() as connection:
+        for statement in _DDL:
+            connection.execute(text(statement))
+        counted = connection.execute(
+            text(f"SELECT count FROM {COUNTS_TABLE} WHERE facet = :facet"), {"facet": TOTAL_FACET}
+        ).scalar() or 0
+        total = connection.execute(text("SELECT count(*) FROM projects")).scalar()
+        if counted != total:
+            rebuild_counts(connection)
+
+
+def read_counts(connection) -> dict:
+    """Returns {"total": n, "<facet>": {value: count}} from the counter table."""
+    result = {"total": 0, **{facet: {} for facet in FACETS}}
+    rows = connection.execute(text(f"SELECT facet, value, count FROM {COUNTS_TABLE} ORDER BY facet, count DESC, value"))
+    for facet, value, count in rows:
+        if facet == TOTAL_FACET:
+            result["total"] = count
+        elif facet in result:
+            result[facet][value] = count
+    return result
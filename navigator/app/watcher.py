@@ -0,0 +1,208 @@
+"""
+Keeps the projects table in step with the folders under ideaed-projects/.
+
+The watcher polls the README and analysis files of every project folder
+(one directory listing per project, so a poll stays cheap), waits until a
+burst of changes has settled, then applies the whole batch in a single
+transaction:
+
+- a new README adds a project, using the defaults of `nav-admin add`;
+- a changed README or analysis file refreshes the project's search index
+  entry and fills in a missing description (curated names, types and
+  statuses are never overwritten);
+- a removed README deletes the project.
+
+Each batch also re-parses the links of every markdown file whose mtime
+changed (see `links`).
+
+Run it with the server (NAVIGATOR_WATCH=1) or standalone:
+
+    cd navigator
+    python -m app.watcher
+"""
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select
+
+from . import crud, database, duplicates, links, models, scanner, search, stats
+
+logger = logging.getLogger(__name__)
+
+WATCH_ON_STARTUP = os.environ.get("NAVIGATOR_WATCH", "0") == "1"
+WATCH_INTERVAL = float(os.environ.get("NAVIGATOR_WATCH_INTERVAL", 2.0))
+WATCH_DEBOUNCE = float(os.environ.get("NAVIGATOR_WATCH_DEBOUNCE", 1.0))
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class WatchReport(NamedTuple):
+    files: int
+    created: int
+    updated: int
+    deleted: int
+
+
+def take_snapshot(root: pathlib.Path) -> Snapshot:
+    """Maps "<slug>/<file>" to (mtime_ns, size) for every tracked file."""
+    snapshot = {}
+    try:
+        project_dirs = [entry for entry in os.scandir(root) if entry.is_dir()]
+    except FileNotFoundError:
+        return snapshot
+    for project_dir in project_dirs:
+        try:
+            entries = list(os.scandir(project_dir.path))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_file() and scanner.is_tracked_file(entry.name):
+                stat = entry.stat()
+                snapshot[f"{project_dir.name}/{entry.name}"] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, str]:
+    changes = {path: "deleted" for path in old.keys() - new.keys()}
+    changes.update({path: "created" for path in new.keys() - old.keys()})
+    changes.update({path: "modified" for path in old.keys() & new.keys() if old[path] != new[path]})
+    return changes
+
+
+class ProjectWatcher:
+    """Polls `root` for project file changes and applies them to the database."""
+
+    def __init__(
+        self,
+        root: pathlib.Path = scanner.PROJECTS_DIR,
+        engine=None,
+        interval: float = WATCH_INTERVAL,
+        debounce: float = WATCH_DEBOUNCE,
+    ):
+        self.root = root
+        self.engine = engine if engine is not None else database.engine
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = take_snapshot(root)
+        self._pending: Dict[str, str] = {}
+        self._last_change = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> Optional[WatchReport]:
+        """Runs one polling step; returns a report when a settled batch was applied."""
+        snapshot = take_snapshot(self.root)
+        changes = diff_snapshots(self._snapshot, snapshot)
+        self._snapshot = snapshot
+        if changes:
+            self._pending.update(changes)
+            self._last_change = time.monotonic()
+            return None
+        if self._pending and time.monotonic() - self._last_change >= self.debounce:
+            report = self.apply(self._pending)
+            self._pending = {}
+            return report
+        return None
+
+    def apply(self, changes: Dict[str, str]) -> WatchReport:
+        """Applies a batch of file changes to the projects table in one transaction."""
+        slugs = {path.split("/", 1)[0] for path in changes}
+        readme_paths = {slug: f"ideaed-projects/{slug}/{scanner.README_NAME}" for slug in slugs}
+        table = models.Project.__table__
+        # `refreshed` projects had a file change and get their search entry
+        # rebuilt; only those in `updates` have a column that actually changes.
+        inserts, updates, refreshed, deletes = [], [], [], []
+
+        with self.engine.begin() as connection:
+            existing = crud.find_projects_by_readme(
+                connection, list(readme_paths.values()), table.c.id, table.c.readme_path, table.c.description
+            )
+            for slug, readme_path in readme_paths.items():
+                row = existing.get(readme_path)
+                record = scanner.describe_project(self.root / slug)
+                if record is None:
+                    if row is not None:
+                        deletes.append(row.id)
+                elif row is None:
+                    inserts.append(record)
+                else:
+                    refreshed.append(row.id)
+                    if not row.description and record["description"]:
+                        updates.append({"row_id": row.id, "description": record["description"]})
+
+            if inserts:
+                connection.execute(table.insert(), inserts)
+            if updates:
+                connection.execute(
+                    table.update()
+                    .where(table.c.id == bindparam("row_id"))
+                    .values(description=bindparam("description")),
+                    updates,
+                )
+            if deletes:
+                connection.execute(table.delete().where(table.c.id.in_(deletes)))
+                search.unindex_projects(connection, deletes)
+                duplicates.remove_signatures(connection, deletes)
+
+            # Core statements bypass the ORM hooks that maintain the search
+            # index and the duplicate signatures.
+            columns = (table.c.id, table.c.name, table.c.description, table.c.project_type, table.c.readme_path)
+            changed = or_(
+                table.c.readme_path.in_([record["readme_path"] for record in inserts]),
+                table.c.id.in_(refreshed),
+            )
+            rows = connection.execute(select(*columns).where(changed)).all()
+            search.index_projects(connection, rows)
+            unchanged = set(refreshed).difference(values["row_id"] for values in updates)
+            duplicates.store_signatures(connection, [row for row in rows if row.id not in unchanged])
+            links.sync_links(connection, self.root)
+            signatures = duplicates.take_pending(connection)
+        duplicates.index.apply(signatures)  # only once the transaction has committed
+
+        return WatchReport(len(changes), len(inserts), len(updates), len(deletes))
+
+    def run(self, on_report=None):
+        """Polls until `stop()` is called, passing every applied batch to `on_report`."""
+        while not self._stop.wait(self.interval):
+            try:
+                report = self.poll()
+            except Exception:  # Keep watching; the next change retries the batch.
+                logger.exception("Project watcher error")
+                continue
+            if report is not None and on_report is not None:
+                on_report(report)
+
+    def start(self, on_report=None):
+        self._thread = threading.Thread(target=self.run, args=(on_report,), name="project-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def log_report(report: WatchReport):
+    logger.info(
+        "Project watcher: %d file change(s) -> %d created, %d updated, %d deleted.",
+        report.files, report.created, report.updated, report.deleted,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    database.init_db()
+    search.init_search_index(database.engine)
+    stats.init_facet_counts(database.engine)
+    links.init_link_graph(database.engine)
+    duplicates.init_duplicate_index(database.engine)
+    watcher = ProjectWatcher()
+    print(f"Watching {watcher.root} (interval {watcher.interval}s, debounce {watcher.debounce}s). Press Ctrl+C to stop.")
+    try:
+        watcher.run(on_report=log_report)
+    except KeyboardInterrupt:
+        pass
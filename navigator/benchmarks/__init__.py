@@ -0,0 +1,2 @@
+# Benchmarks for the navigator API. Run them from the 'navigator' directory,
+# e.g. `python -m benchmarks.db_modes`.
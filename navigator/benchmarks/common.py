@@ -0,0 +1,124 @@
+"""
+Shared helpers for the navigator benchmarks: synthetic data, seeding and a
+small concurrent load driver over an in-process ASGI client.
+"""
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+PROJECT_TYPES = ["工具开发", "理论分析", "AI应用", "Web服务"]
+MATURITIES = ["High", "Medium", "Low"]
+STATUSES = ["完成", "进行中", "研究中", "规划中", "理论归档"]
+WORDS = ["数据", "平台", "决策", "智能", "代理", "分析", "框架", "治理", "AI", "LLM", "agent", "pipeline", "toolkit"]
+
+
+def synthetic_project(i: int, rng: random.Random) -> Dict:
+    words = rng.sample(WORDS, 4)
+    return {
+        "name": f"{''.join(words[:2])}-{i}",
+        "project_type": rng.choice(PROJECT_TYPES),
+        "maturity": rng.choice(MATURITIES),
+        "status": rng.choice(STATUSES),
+        "description": " ".join(rng.choice(WORDS) for _ in range(30)),
+        "readme_path": f"ideaed-projects/bench-{i}/README.md",
+        "source_url": None,
+        "created_date": datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randrange(730)),
+    }
+
+
+def synthetic_projects(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [synthetic_project(i, rng) for i in range(n)]
+
+
+def seed_database(engine, n: int, seed: int = 0, batch_size: int = 10_000):
+    """
+    Fills an initialized navigator database with `n` synthetic projects.
+    Rows are generated batch by batch, so a million-row catalog fits in memory.
+    """
+    from app import models, search
+
+    table = models.Project.__table__
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        for start in range(0, n, batch_size):
+            batch = [synthetic_project(i, rng) for i in range(start, min(n, start + batch_size))]
+            connection.execute(table.insert(), batch)
+    search.init_search_index(engine)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_load(
+    send: Callable[[int], Awaitable[bool]],
+    total: int,
+    concurrency: int,
+) -> Dict:
+    """
+    Calls `send(i)` for i in range(total) from `concurrency` workers and
+    summarizes latency. `send` returns False for a failed request.
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            ok = await send(i)
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def run_isolated(module: str, env: Dict[str, str], argv: List[str]) -> Dict:
+    """
+    Runs `python -m <module> --worker <argv>` in a fresh process against a
+    throwaway database and returns the JSON the worker prints last.
+
+    Settings such as NAVIGATOR_ASYNC_DB are read when the app is imported,
+    so comparing configurations needs one process per configuration.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        worker_env = dict(
+            os.environ,
+            NAVIGATOR_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            NAVIGATOR_SEARCH_READMES="0",
+            # The startup similarity build and signing pass would compete
+            # with the measured requests for the GIL.
+            NAVIGATOR_SIMILARITY_BUILD="0",
+            NAVIGATOR_DUPLICATE_SIGN="0",
+            **env,
+        )
+        command = [sys.executable, "-m", module, "--worker", *argv]
+        output = subprocess.run(command, env=worker_env, check=True, capture_output=True, text=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
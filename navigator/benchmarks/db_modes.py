@@ -0,0 +1,81 @@
+"""
+Compares the sync (threadpool) and async (aiosqlite) database modes of the
+project list/create endpoints under concurrent load.
+
+Each mode runs in its own process, because the mode is chosen from
+NAVIGATOR_ASYNC_DB when the app is imported, against a fresh database
+seeded with the same synthetic projects.
+
+    cd navigator
+    python -m benchmarks.db_modes --rows 10000 --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from .common import run_isolated
+
+
+async def _run_worker(args):
+    import httpx
+
+    from app import database
+    from app.main import app
+    from .common import run_load, seed_database, synthetic_project
+
+    rng = random.Random(1)
+    results = {}
+    async with app.router.lifespan_context(app):
+        seed_database(database.engine, args.rows)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def list_projects(i):
+                params = {"limit": 50, "status": rng.choice(["完成", "研究中", "规划中"])}
+                response = await client.get("/api/projects", params=params)
+                return response.status_code == 200
+
+            async def create_project(i):
+                project = synthetic_project(args.rows + i, rng)
+                project["created_date"] = project["created_date"].isoformat()
+                response = await client.post("/api/projects", json=project)
+                return response.status_code == 200
+
+            results["list"] = await run_load(list_projects, args.requests, args.concurrency)
+            results["create"] = await run_load(create_project, args.requests // 4, args.concurrency)
+    print(json.dumps(results))
+
+
+def _run_mode(mode, args):
+    return run_isolated(
+        "benchmarks.db_modes",
+        {"NAVIGATOR_ASYNC_DB": "1" if mode == "async" else "0"},
+        ["--rows", str(args.rows), "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(_run_worker(args))
+        return
+
+    print(f"rows={args.rows} requests={args.requests} concurrency={args.concurrency}")
+    print(f"{'mode':<6} {'route':<7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in ("sync", "async"):
+        for route, stats in _run_mode(mode, args).items():
+            print(
+                f"{mode:<6} {route:<7} {stats['rps']:>9} {stats['p50_ms']:>9}"
+                f" {stats['p99_ms']:>9} {stats['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
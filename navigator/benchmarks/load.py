@@ -0,0 +1,272 @@
+"""
+Load test for the navigator API: seeds a catalog of synthetic projects plus
+generated markdown documents, then drives list, filter, search, stats, create
+and /view through an in-process ASGI client and reports throughput,
+p50/p95/p99 latency and database queries per request.
+
+Each scenario first runs on its own, so its query count is exact, and then
+all of them run together as a mixed workload. Results are written as JSON;
+pass an earlier result file to --compare to diff two runs.
+
+    cd navigator
+    python -m benchmarks.load --projects 10000 --output load-10k.json
+    python -m benchmarks.load --projects 1000000 --requests 500 --compare load-10k.json
+
+Settings read at import time (NAVIGATOR_ASYNC_DB, NAVIGATOR_SQLITE_PROFILE,
+...) are passed through to the worker process from the environment.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import platform
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List
+
+from .common import PROJECT_TYPES, MATURITIES, STATUSES, WORDS, run_isolated, summarize
+
+SCENARIOS = ("list", "filter", "search", "search_broad", "stats", "create", "view")
+
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+
+
+def synthetic_markdown(i: int, rng: random.Random) -> str:
+    """A README-like document: headings, prose, a list, a table and a code block."""
+    def sentence():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "。"
+
+    sections = [f"# {rng.choice(WORDS)}{rng.choice(WORDS)} {i}\n\n" + " ".join(sentence() for _ in range(4))]
+    for n in range(rng.randint(3, 8)):
+        sections.append(f"## {n + 1}. {rng.choice(WORDS)}\n\n" + " ".join(sentence() for _ in range(rng.randint(3, 10))))
+        sections.append("\n".join(f"- **{rng.choice(WORDS)}**: {sentence()}" for _ in range(rng.randint(2, 6))))
+    sections.append(
+        "| 指标 | 数值 |\n|---|---|\n"
+        + "\n".join(f"| {rng.choice(WORDS)} | {rng.randint(1, 1000)} |" for _ in range(6))
+    )
+    sections.append("```python\n" + "\n".join(f"step_{n} = run('{rng.choice(WORDS)}')" for n in range(8)) + "\n```")
+    return "\n\n".join(sections) + "\n"
+
+
+def write_documents(root: pathlib.Path, count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = root / f"doc-{i}.md"
+        path.write_text(synthetic_markdown(i, rng), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def request_for(scenario: str, i: int, rng: random.Random, documents: List[str], run_id: str, projects: int):
+    """
+    Returns (method, url, params, json body) for the i-th request of a scenario.
+
+    `search` looks up the number in a seeded project's name, which matches a
+    handful of projects; `search_broad` uses vocabulary words, which match
+    nearly all of them, so its cost grows with the catalog: every match is
+    scored before the top results are taken.
+    """
+    if scenario == "list":
+        return "GET", "/api/projects", {"limit": 100, "sort": rng.choice(["created_date", "name", "id"])}, None
+    if scenario == "filter":
+        params = {"limit": 50}
+        for key, values in (("status", STATUSES), ("maturity", MATURITIES), ("project_type", PROJECT_TYPES)):
+            if rng.random() < 0.6:
+                params[key] = rng.choice(values)
+        return "GET", "/api/projects", params, None
+    if scenario == "search":
+        return "GET", "/api/projects/search", {"q": str(rng.randrange(projects)), "limit": 20}, None
+    if scenario == "search_broad":
+        return "GET", "/api/projects/search", {"q": " ".join(rng.sample(WORDS, rng.randint(1, 2))), "limit": 20}, None
+    if scenario == "stats":
+        return "GET", "/api/projects/stats", None, None
+    if scenario == "create":
+        body = {
+            "name": f"load-{run_id}-{i}",
+            "project_type": rng.choice(PROJECT_TYPES),
+            "maturity": rng.choice(MATURITIES),
+            "status": rng.choice(STATUSES),
+            "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "readme_path": f"ideaed-projects/load-{run_id}-{i}/README.md",
+        }
+        return "POST", "/api/projects", None, body
+    if scenario == "view":
+        return "GET", "/view/" + documents[i % len(documents)], None, None
+    raise ValueError(f"Unknown scenario: {scenario!r}")
+
+
+class QueryCounter:
+    """Counts statements sent to the database through the app's engines."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+async def _run_worker(args):
+    import httpx
+
+    from app import database, main, models  # noqa: F401  (models registers the tables)
+    from .common import seed_database
+
+    seed_start = time.perf_counter()
+    database.init_db()
+    seed_database(database.engine, args.projects)
+    # Serve /view (and the startup prerender, link graph and watcher) from a
+    # scratch projects root, so the real ideaed-projects/ is never touched.
+    root = pathlib.Path(tempfile.mkdtemp(prefix="navigator-load-"))
+    main.base_dir = root
+    main.projects_dir = root / "ideaed-projects"
+    doc_dir = main.projects_dir / "loadtest"
+    doc_dir.mkdir(parents=True)
+    try:
+        documents = [
+            str(path.relative_to(main.base_dir)).replace(os.sep, "/")
+            for path in write_documents(doc_dir, args.docs)
+        ]
+        seed_seconds = time.perf_counter() - seed_start
+
+        engines = [database.engine, database.read_engine]
+        if database.async_engine is not None:
+            engines.append(database.async_engine.sync_engine)
+        queries = QueryCounter(engines)
+
+        results = {}
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+                rng = random.Random(args.seed)
+
+                async def run(name: str, scenarios, total: int) -> Dict:
+                    per_scenario = {scenario: [] for scenario in scenarios}
+                    errors = {scenario: 0 for scenario in scenarios}
+                    plan = [(rng.choice(scenarios), i) for i in range(total)]
+                    requests = [(s, request_for(s, i, rng, documents, f"{name}{i}", args.projects)) for s, i in plan]
+                    pending = iter(requests)
+
+                    async def worker():
+                        for scenario, (method, url, params, body) in pending:
+                            start = time.perf_counter()
+                            response = await client.request(method, url, params=params, json=body)
+                            per_scenario[scenario].append(time.perf_counter() - start)
+                            if response.status_code >= 400:
+                                errors[scenario] += 1
+
+                    queries_before = queries.count
+                    start = time.perf_counter()
+                    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+                    elapsed = time.perf_counter() - start
+                    executed = queries.count - queries_before
+                    latencies = [t for values in per_scenario.values() for t in values]
+                    summary = summarize(latencies, elapsed, sum(errors.values()))
+                    summary["queries"] = executed
+                    summary["queries_per_request"] = round(executed / total, 2) if total else 0.0
+                    if len(scenarios) > 1:
+                        summary["by_scenario"] = {
+                            scenario: summarize(values, elapsed, errors[scenario])
+                            for scenario, values in per_scenario.items()
+                        }
+                    return summary
+
+                for scenario in args.scenarios:
+                    results[scenario] = await run(scenario, [scenario], args.requests)
+                results["mixed"] = await run("mixed", list(args.scenarios), args.requests * len(args.scenarios))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(json.dumps({"seed_seconds": round(seed_seconds, 2), "results": results}))
+
+
+def _compare(current: Dict, baseline: Dict):
+    print(f"\nChange vs {baseline['meta'].get('timestamp', 'baseline')} ({baseline['meta'].get('projects')} projects):")
+    print(f"{'scenario':>10} {'rps':>10} {'p50':>10} {'p99':>10} {'queries/req':>12}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        def delta(key):
+            if not before[key]:
+                return "n/a"
+            return f"{(result[key] - before[key]) / before[key] * 100:+.0f}%"
+
+        print(
+            f"{name:>10} {delta('rps'):>10} {delta('p50_ms'):>10} {delta('p99_ms'):>10} "
+            f"{result['queries_per_request'] - before['queries_per_request']:>+12.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=10_000, help="synthetic projects to seed (1k to 1M)")
+    parser.add_argument("--docs", type=int, default=200, help="markdown documents to generate for /view")
+    parser.add_argument("--requests", type=int, default=1_000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path, help="result file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--compare", type=pathlib.Path, help="earlier result file to diff against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(_run_worker(args))
+        return
+
+    argv = [
+        "--projects", str(args.projects),
+        "--docs", str(args.docs),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--seed", str(args.seed),
+        "--scenarios", *args.scenarios,
+    ]
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    worker = run_isolated("benchmarks.load", {}, argv)
+    report = {
+        "meta": {
+            "timestamp": timestamp,
+            "projects": args.projects,
+            "docs": args.docs,
+            "requests_per_scenario": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "seed_seconds": worker["seed_seconds"],
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "env": {key: value for key, value in os.environ.items() if key.startswith("NAVIGATOR_")},
+        },
+        "results": worker["results"],
+    }
+
+    output = args.output or RESULTS_DIR / f"load-{timestamp.replace(':', '')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"{args.projects} projects, {args.docs} documents, concurrency {args.concurrency} (seeded in {worker['seed_seconds']}s)")
+    print(f"{'scenario':>10} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries/req':>12}")
+    for name, result in report["results"].items():
+        print(
+            f"{name:>10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9} "
+            f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} {result['queries_per_request']:>12}"
+        )
+    print(f"Results written to {output}")
+
+    if args.compare:
+        _compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the /view markdown engines on the real ideaed-projects documents:
+time per full pass over the corpus, per-document p50/p95/max and throughput.
+
+    cd navigator
+    pip install -e ".[markdown-it]"
+    python -m benchmarks.markdown_engines --repeat 5
+"""
+import argparse
+import pathlib
+import statistics
+import time
+
+from app import markdown_engines, scanner
+
+from .common import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", type=pathlib.Path, default=scanner.PROJECTS_DIR, help="directory of markdown files")
+    parser.add_argument("--engines", nargs="+", choices=list(markdown_engines.ENGINES), default=list(markdown_engines.ENGINES))
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus per engine")
+    parser.add_argument("--slowest", type=int, default=5, help="list the N slowest documents")
+    args = parser.parse_args()
+
+    documents = {
+        str(path.relative_to(args.root)): path.read_text(encoding="utf-8")
+        for path in sorted(args.root.rglob("*.md"))
+    }
+    corpus_bytes = sum(len(text.encode("utf-8")) for text in documents.values())
+    print(f"{len(documents)} documents, {corpus_bytes / 1024:.0f} KiB from {args.root}")
+
+    results = {}
+    for name in args.engines:
+        render = markdown_engines.get_renderer(name)
+        passes = []
+        per_document = {path: [] for path in documents}
+        for _ in range(args.repeat):
+            pass_start = time.perf_counter()
+            for path, text in documents.items():
+                start = time.perf_counter()
+                render(text)
+                per_document[path].append(time.perf_counter() - start)
+            passes.append(time.perf_counter() - pass_start)
+        # Each document's best run, so one-off pauses don't skew the distribution.
+        best = {path: min(timings) for path, timings in per_document.items()}
+        results[name] = (statistics.median(passes), best)
+
+    baseline = results.get("markdown2", next(iter(results.values())))[0]
+    print(f"{'engine':>12} {'pass ms':>9} {'doc p50':>9} {'doc p95':>9} {'doc max':>9} {'MiB/s':>7} {'speedup':>8}")
+    for name, (seconds, best) in results.items():
+        timings = list(best.values())
+        print(
+            f"{name:>12} {seconds * 1000:>9.1f} {percentile(timings, 50) * 1000:>9.2f} "
+            f"{percentile(timings, 95) * 1000:>9.2f} {max(timings) * 1000:>9.2f} "
+            f"{corpus_bytes / seconds / 2 ** 20:>7.1f} {baseline / seconds:>7.2f}x"
+        )
+
+    if args.slowest:
+        reference = results.get("markdown2", next(iter(results.values())))[1]
+        print(f"\nSlowest documents ({', '.join(results)} ms):")
+        for path in sorted(reference, key=reference.get, reverse=True)[:args.slowest]:
+            print(f"  {' / '.join(f'{best[path] * 1000:.1f}' for _, best in results.values()):>20}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares the project list's fast path (Core rows + orjson) with the ORM +
+pydantic response_model path it replaced, for 1k/10k/100k-row pages.
+
+    cd navigator
+    python -m benchmarks.serialization --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from .common import run_isolated
+
+
+async def _run_worker(args):
+    from typing import List
+
+    import httpx
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from app import crud, database, schemas
+    from app.main import app
+    from .common import seed_database
+
+    # The previous implementation: ORM objects validated into schemas.Project
+    # and encoded by FastAPI's default JSON response.
+    legacy = FastAPI()
+
+    @legacy.get("/api/projects", response_model=List[schemas.Project])
+    def read_projects_legacy(limit: int = 100, db: Session = Depends(database.get_read_db)):
+        return crud.get_projects(db, limit=limit)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        seed_database(database.engine, max(args.sizes))
+        for name, target in (("orm+pydantic", legacy), ("core+orjson", app)):
+            transport = httpx.ASGITransport(app=target)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                for size in args.sizes:
+                    timings = []
+                    for _ in range(args.repeat):
+                        start = time.perf_counter()
+                        response = await client.get("/api/projects", params={"limit": size})
+                        timings.append(time.perf_counter() - start)
+                        assert response.status_code == 200 and len(response.json()) == size
+                    results[f"{name}/{size}"] = {
+                        "median_ms": round(statistics.median(timings) * 1000, 1),
+                        "bytes": len(response.content),
+                    }
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(_run_worker(args))
+        return
+
+    argv = ["--sizes", *map(str, args.sizes), "--repeat", str(args.repeat)]
+    results = run_isolated("benchmarks.serialization", {}, argv)
+    print(f"{'rows':>8} {'orm+pydantic ms':>16} {'core+orjson ms':>15} {'speedup':>8}")
+    for size in args.sizes:
+        legacy = results[f"orm+pydantic/{size}"]["median_ms"]
+        fast = results[f"core+orjson/{size}"]["median_ms"]
+        print(f"{size:>8} {legacy:>16} {fast:>15} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measures read throughput on the project list while inserts run
+concurrently, for three configurations:
+
+- baseline: stock SQLite settings and one shared connection pool, as
+  before the tuning profile;
+- default: stock SQLite settings with separate reader/writer pools;
+- tuned: WAL + pragmas with separate reader/writer pools.
+
+    cd navigator
+    python -m benchmarks.sqlite_profile --rows 20000 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from .common import run_isolated, summarize
+
+
+PROFILES = {
+    "baseline": {"NAVIGATOR_SQLITE_PROFILE": "default", "NAVIGATOR_DB_SPLIT_POOLS": "0"},
+    "default": {"NAVIGATOR_SQLITE_PROFILE": "default"},
+    "tuned": {"NAVIGATOR_SQLITE_PROFILE": "tuned"},
+}
+
+
+async def _run_worker(args):
+    import httpx
+
+    from app import database
+    from app.main import app
+    from .common import seed_database, synthetic_project
+
+    rng = random.Random(2)
+    read_latencies, write_latencies = [], []
+    read_errors = write_errors = 0
+
+    async with app.router.lifespan_context(app):
+        seed_database(database.engine, args.rows)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            deadline = time.perf_counter() + args.seconds
+            next_id = iter(range(args.rows, args.rows * 100))
+
+            async def reader():
+                nonlocal read_errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    response = await client.get("/api/projects", params={"limit": 50, "maturity": rng.choice(["High", "Low"])})
+                    read_latencies.append(time.perf_counter() - start)
+                    read_errors += response.status_code != 200
+
+            async def writer():
+                nonlocal write_errors
+                while time.perf_counter() < deadline:
+                    project = synthetic_project(next(next_id), rng)
+                    project["created_date"] = project["created_date"].isoformat()
+                    start = time.perf_counter()
+                    response = await client.post("/api/projects", json=project)
+                    write_latencies.append(time.perf_counter() - start)
+                    write_errors += response.status_code != 200
+
+            await asyncio.gather(
+                *(reader() for _ in range(args.readers)),
+                *(writer() for _ in range(args.writers)),
+            )
+
+    print(json.dumps({
+        "reads": summarize(read_latencies, args.seconds, read_errors),
+        "writes": summarize(write_latencies, args.seconds, write_errors),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(_run_worker(args))
+        return
+
+    argv = ["--rows", str(args.rows), "--seconds", str(args.seconds),
+            "--readers", str(args.readers), "--writers", str(args.writers)]
+    print(f"rows={args.rows} seconds={args.seconds} readers={args.readers} writers={args.writers}")
+    print(f"{'profile':<8} {'op':<7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for profile, env in PROFILES.items():
+        for op, stats in run_isolated("benchmarks.sqlite_profile", env, argv).items():
+            print(
+                f"{profile:<8} {op:<7} {stats['rps']:>9} {stats['p50_ms']:>9}"
+                f" {stats['p99_ms']:>9} {stats['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 import re
 import requests
 import datetime
+import hashlib
 import json
+import sys
 from pathlib import Path
-import time
 
 # --- Configuration ---
 API_URL = "http://127.0.0.1:8000/api/projects"
+BULK_API_URL = f"{API_URL}/bulk"
 MARKDOWN_FILE = Path(__file__).parent.parent / "项目导航.md"
+# Content hashes of the projects sent by the last successful run.
+STATE_FILE = Path(__file__).parent / ".migration_state.json"
 
 STATUS_MAP = {
     "✅": "完成",
@@ -36,6 +40,72 @@ PROJECT_TYPE_MAP = {
 }
 
 
+OVERVIEW_HEADING = "## 📋 项目概览"
+DESCRIPTION_MARKER = "**🎯 项目描述**:"
+NAME_LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+
+def index_sections(lines):
+    """
+    Tokenizes the navigation document in a single pass.
+
+    Returns the raw rows of the overview table and a mapping from every
+    `### heading` to the description block found under it. A description
+    runs from the `**🎯 项目描述**:` marker to the next bold label that
+    follows a blank line, or to the next heading.
+    """
+    table_rows = []
+    descriptions = {}
+    in_overview = False
+    heading = None
+    capturing = False
+    block = []
+    previous_blank = False
+
+    def finish_block():
+        if heading is not None and block and heading not in descriptions:
+            descriptions[heading] = "\n".join(block).strip()
+
+    for line in lines:
+        stripped = line.strip()
+
+        if stripped.startswith("#"):
+            if capturing:
+                finish_block()
+                capturing = False
+            if stripped.startswith("## "):
+                in_overview = stripped == OVERVIEW_HEADING
+                heading = None
+            elif stripped.startswith("### "):
+                heading = stripped[4:].strip()
+            previous_blank = False
+            continue
+
+        if in_overview and stripped.startswith("|"):
+            table_rows.append(stripped)
+        elif capturing:
+            if previous_blank and stripped.startswith("**"):
+                finish_block()
+                capturing = False
+            else:
+                block.append(line)
+        elif heading is not None and stripped.startswith(DESCRIPTION_MARKER):
+            capturing = True
+            block = [stripped[len(DESCRIPTION_MARKER):]]
+
+        previous_blank = not stripped
+
+    if capturing:
+        finish_block()
+    return table_rows, descriptions
+
+
+def content_hash(project):
+    """Stable hash of a project record, used to skip unchanged projects on re-runs."""
+    canonical = json.dumps(project, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def parse_markdown():
     """Parses the markdown file to extract project data."""
     print(f"Reading markdown file from: {MARKDOWN_FILE}")
@@ -43,39 +113,32 @@ def parse_markdown():
         print(f"Error: Markdown file not found at {MARKDOWN_FILE}")
         return []
 
-    content = MARKDOWN_FILE.read_text(encoding="utf-8")
-    
-    # Extract the main project table
-    table_regex = r"## 📋 项目概览\s*\|([\s\S]*?)\s*## 🚀 项目详情"
-    table_match = re.search(table_regex, content)
-    if not table_match:
+    with MARKDOWN_FILE.open(encoding="utf-8") as f:
+        table_rows, descriptions = index_sections(f)
+
+    if not table_rows:
         print("Error: Could not find the project overview table.")
         return []
 
-    table_content = table_match.group(1)
-    rows = table_content.strip().split("\n")[2:] # Skip header and separator
-
     projects = []
-    for row in rows:
-        if not row.strip() or "---" in row:
+    for row in table_rows[2:]:  # Skip header and separator
+        if "---" in row:
             continue
-        
+
         parts = [p.strip() for p in row.split("|") if p.strip()]
         if len(parts) < 4:
             continue
 
         # --- Extract from table ---
         # 1. Name and Readme Path
-        name_part = parts[0]
-        name_match = re.search(r"\[(.*?)\]\((.*?)\)", name_part)
+        name_match = NAME_LINK_RE.search(parts[0])
         if not name_match:
             continue
         name = name_match.group(1)
         readme_path = name_match.group(2)
 
         # 2. Status
-        status_part = parts[1]
-        status_icon = status_part.split(" ")[0]
+        status_icon = parts[1].split(" ")[0]
         status_text = STATUS_MAP.get(status_icon, "未知")
 
         # 3. Created Date
@@ -88,24 +151,10 @@ def parse_markdown():
             created_date = datetime.date.today()
             print(f"Warning: Could not parse date '{date_part}' for project '{name}'. Using today's date.")
 
-
         # --- Extract from details section ---
-        description = ""
-        # The section header in the markdown is `### Project Name`
-        # The key parts are bolded, e.g., **🎯 项目描述**:
-        # We look for the description block and stop at the next double newline followed by the start of another bolded line.
-        desc_regex = rf"###\s*{re.escape(name)}[\s\S]*?\*\*🎯 项目描述\*\*:\s*([\s\S]*?)(?=\n\n\*\*)"
-        desc_match = re.search(desc_regex, content)
-        if desc_match:
-            description = desc_match.group(1).strip()
-        else:
-            # Fallback for projects at the very end of the file or with different structures
-            desc_regex_fallback = rf"###\s*{re.escape(name)}[\s\S]*?\*\*🎯 项目描述\*\*:\s*([\s\S]*?)(?=###\s*)"
-            desc_match_fallback = re.search(desc_regex_fallback, content)
-            if desc_match_fallback:
-                description = desc_match_fallback.group(1).strip()
-            else:
-                print(f"Warning: Could not find description for project '{name}'.")
+        description = descriptions.get(name, "")
+        if name not in descriptions:
+            print(f"Warning: Could not find description for project '{name}'.")
 
         # --- Infer data ---
         maturity = MATURITY_MAP.get(status_text, "Unknown")
@@ -125,52 +174,76 @@ def parse_markdown():
     print(f"Successfully parsed {len(projects)} projects.")
     return projects
 
+
+def load_state():
+    """Returns the readme_path -> content hash map recorded by the last run."""
+    if not STATE_FILE.exists():
+        return {}
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    STATE_FILE.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def select_changed(projects, state):
+    """Keeps only the projects whose content hash differs from the last run."""
+    return [p for p in projects if state.get(p["readme_path"]) != content_hash(p)]
+
+
 def migrate_to_db(projects):
-    """Sends parsed project data to the API."""
+    """
+    Sends parsed project data to the API in a single bulk upsert.
+    Returns the API summary, or None if the request failed.
+    """
     if not projects:
         print("No projects to migrate.")
-        return
+        return None
 
     print("\nStarting migration...")
-    succeeded = 0
-    failed = 0
-    
-    headers = {"Content-Type": "application/json"}
+    try:
+        response = requests.post(BULK_API_URL, json=projects)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"  ❌ Bulk import failed. Error: {e}")
+        return None
+
+    summary = response.json()
+    icons = {"created": "✅", "updated": "🔄", "unchanged": "⏭️", "error": "❌"}
+    for row in summary["results"]:
+        name = projects[row["index"]]["name"]
+        line = f"  {icons[row['outcome']]} {row['outcome'].capitalize()} '{name}'"
+        if row.get("detail"):
+            line += f": {row['detail']}"
+        print(line)
 
-    for project in projects:
-        try:
-            response = requests.post(API_URL, data=json.dumps(project), headers=headers)
-            if response.status_code == 200:
-                print(f"  ✅ Successfully added '{project['name']}'")
-                succeeded += 1
-            elif response.status_code == 409: # Conflict for duplicates
-                 print(f"  ⚠️ Project '{project['name']}' already exists. Skipping.")
-                 succeeded +=1 # Count as success as it's already there
-            else:
-                print(f"  ❌ Failed to add '{project['name']}'. Status: {response.status_code}")
-                print(f"     Response: {response.text}")
-                failed += 1
-        except requests.exceptions.RequestException as e:
-            print(f"  ❌ Failed to add '{project['name']}'. Error: {e}")
-            failed += 1
-        
-        # Add a delay to prevent overwhelming the server
-        time.sleep(0.5)
-            
     print("\n--- Migration Summary ---")
     print(f"Total projects processed: {len(projects)}")
-    print(f"Succeeded: {succeeded}")
-    print(f"Failed: {failed}")
+    print(f"Created: {summary['created']}")
+    print(f"Updated: {summary['updated']}")
+    print(f"Unchanged: {summary['unchanged']}")
+    print(f"Failed: {summary['errors']}")
     print("--------------------------")
-    if failed > 0:
+    if summary["errors"] > 0:
         print("Some projects could not be migrated. Please check the errors above.")
     else:
         print("Migration completed successfully!")
+    return summary
 
 
 if __name__ == "__main__":
+    # Pass --force to resend every project regardless of recorded hashes.
+    force = "--force" in sys.argv[1:]
     project_data = parse_markdown()
-    if project_data:
+    state = {} if force else load_state()
+    changed = select_changed(project_data, state)
+    if project_data and not changed:
+        print("All projects are unchanged since the last run. Use --force to resend them.")
+    elif changed:
+        print(f"{len(changed)} of {len(project_data)} projects changed since the last run.")
         # Make sure server is running
         try:
             requests.get(API_URL.replace("/api/projects", "/"), timeout=2)
@@ -179,4 +252,10 @@ if __name__ == "__main__":
             print("Please start the server first by running this command in another terminal:")
             print("uvicorn navigator.app.main:app --reload")
             exit(1)
-        migrate_to_db(project_data) 
\ No newline at end of file
+        summary = migrate_to_db(changed)
+        if summary is not None:
+            for row in summary["results"]:
+                if row["outcome"] != "error":
+                    project = changed[row["index"]]
+                    state[project["readme_path"]] = content_hash(project)
+            save_state(state)
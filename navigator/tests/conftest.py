@@ -0,0 +1,46 @@
+import os
+import pathlib
+import tempfile
+
+import pytest
+
+# Tests never touch navigator.db: the app's engines are created at import
+# time from NAVIGATOR_DATABASE_URL, so point it at a scratch database before
+# any app module is imported.
+SCRATCH_DIR = pathlib.Path(tempfile.mkdtemp(prefix="navigator-tests-"))
+SCRATCH_DB = SCRATCH_DIR / "navigator.db"
+os.environ["NAVIGATOR_DATABASE_URL"] = f"sqlite:///{SCRATCH_DB}"
+os.environ["NAVIGATOR_SIMILARITY_BUILD"] = "0"
+# Every test request is held to its route's statement budget: one that runs
+# more statements than querybudget.ROUTE_BUDGETS allows gets a 500.
+os.environ["NAVIGATOR_QUERY_BUDGET_ENFORCE"] = "1"
+os.environ.setdefault("NAVIGATOR_SIMILARITY_DIR", str(SCRATCH_DIR / "similarity"))
+
+PROJECT = {
+    "name": "数据平台决策工具包",
+    "project_type": "工具类",
+    "maturity": "🟡 中",
+    "status": "📋 规划中",
+    "description": "帮助团队评估数据平台架构的决策框架",
+    "readme_path": "ideaed-projects/data-platform/README.md",
+}
+
+
+def project(**fields) -> dict:
+    """A valid create/bulk payload, with `fields` overriding the defaults."""
+    return {**PROJECT, **fields}
+
+
+@pytest.fixture
+def client():
+    """A TestClient on an empty database, initialized by the app's own startup."""
+    from fastapi.testclient import TestClient
+
+    from app import database, main
+
+    for engine in (database.engine, database.read_engine):
+        engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        pathlib.Path(f"{SCRATCH_DB}{suffix}").unlink(missing_ok=True)
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,62 @@
+import os
+import re
+
+import pytest
+
+from app import assets, main, render
+
+
+@pytest.fixture
+def frontend(tmp_path, monkeypatch):
+    (tmp_path / "style.css").write_text("body { color: black; }\n", encoding="utf-8")
+    (tmp_path / "index.html").write_text(
+        '<link rel="stylesheet" href="/assets/style.css"><div id="app"></div>\n', encoding="utf-8"
+    )
+    monkeypatch.setattr(main, "spa_shell", render.SpaShell(tmp_path / "index.html"))
+    return tmp_path
+
+
+def shell_css_url(client):
+    return re.search(r'href="(/assets/style\.[0-9a-f]+\.css)"', client.get("/some/route").text)[1]
+
+
+def test_hashed_asset_is_immutable(client):
+    url = assets.asset_url("style.css")
+    assert re.fullmatch(r"/assets/style\.[0-9a-f]{10}\.css", url)
+    hashed = client.get(url)
+    assert hashed.status_code == 200
+    assert hashed.headers["cache-control"] == assets.IMMUTABLE
+    assert hashed.content == client.get("/assets/style.css").content
+    assert client.get("/assets/style.css").headers["cache-control"] == "no-cache"
+    assert client.get("/assets/style.0123456789.css").headers["cache-control"] == "no-cache"  # stale hash
+
+
+def test_only_get_and_head_are_served(client):
+    url = assets.asset_url("style.css")
+    assert client.head(url).status_code == 200
+    for method in ("POST", "DELETE"):
+        for path in (url, "/assets/style.css"):
+            response = client.request(method, path)
+            assert response.status_code == 405
+            assert response.headers["allow"] == "GET, HEAD"
+
+
+def test_spa_shell_serves_hashed_urls_and_follows_edits(frontend, client):
+    page = client.get("/ideas/42")
+    assert page.status_code == 200
+    assert 'id="app"' in page.text
+    assert page.headers["cache-control"] == "no-cache"
+    assert client.get("/ideas/42", headers={"If-None-Match": page.headers["etag"]}).status_code == 304
+
+    before = shell_css_url(client)
+    css = frontend / "style.css"
+    css.write_text("body { color: red; }\n", encoding="utf-8")
+    os.utime(css, ns=(css.stat().st_atime_ns, css.stat().st_mtime_ns + 10**9))
+    after = client.get("/ideas/42", headers={"If-None-Match": page.headers["etag"]})
+    assert after.status_code == 200  # an asset edit changes the page
+    assert shell_css_url(client) != before
+
+
+def test_missing_index_html_is_a_server_error(frontend, client):
+    (frontend / "index.html").unlink()
+    assert client.get("/ideas/42").status_code == 500
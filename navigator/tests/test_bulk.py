@@ -0,0 +1,44 @@
+from conftest import project
+
+
+def bulk(client, items):
+    response = client.post("/api/projects/bulk", json=items)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_bulk_reports_every_outcome_in_request_order(client):
+    first = bulk(client, [
+        project(name="Alpha", readme_path="ideaed-projects/alpha/README.md"),
+        project(name="Beta", readme_path="ideaed-projects/beta/README.md"),
+    ])
+    assert (first["created"], first["updated"], first["unchanged"], first["errors"]) == (2, 0, 0, 0)
+    alpha_id = first["results"][0]["id"]
+
+    second = bulk(client, [
+        project(name="Gamma", readme_path="ideaed-projects/gamma/README.md"),
+        project(name="Alpha", readme_path="ideaed-projects/alpha/README.md"),
+        project(name="Beta v2", readme_path="ideaed-projects/beta/README.md"),
+        project(name="Gamma again", readme_path="ideaed-projects/gamma/README.md"),
+    ])
+    assert [(r["index"], r["outcome"]) for r in second["results"]] == [
+        (0, "created"), (1, "unchanged"), (2, "updated"), (3, "error"),
+    ]
+    assert second["results"][1]["id"] == alpha_id
+    assert second["results"][3]["detail"] == "Duplicate readme_path earlier in this batch."
+    assert (second["created"], second["updated"], second["unchanged"], second["errors"]) == (1, 1, 1, 1)
+
+
+def test_bulk_update_keeps_created_date_and_reindexes(client):
+    bulk(client, [project(created_date="2024-05-01", readme_path="ideaed-projects/a/README.md")])
+    result = bulk(client, [project(name="销售教练", readme_path="ideaed-projects/a/README.md")])
+    row = client.get(f"/api/projects/{result['results'][0]['id']}").json()
+    assert (row["name"], row["created_date"], row["version"]) == ("销售教练", "2024-05-01", 2)
+    hits = client.get("/api/projects/search", params={"q": "教练"}).json()
+    assert [hit["name"] for hit in hits] == ["销售教练"]
+
+
+def test_bulk_rejects_invalid_items(client):
+    response = client.post("/api/projects/bulk", json=[{"name": "no readme_path"}])
+    assert response.status_code == 422
+    assert client.get("/api/projects").json() == []
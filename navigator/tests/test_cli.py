@@ -0,0 +1,130 @@
+import pathlib
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from app import cli, database, duplicates
+
+
+# The root navigator-admin distribution installs only typer, requests and rich.
+WITHOUT_SERVER_STACK = """
+import importlib.abc, sys
+class Block(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("sqlalchemy", "pydantic", "orjson", "fastapi"):
+            raise ImportError(name)
+sys.meta_path.insert(0, Block())
+from typer.testing import CliRunner
+from app import cli
+print(CliRunner().invoke(cli.app, sys.argv[1:]).output)
+"""
+
+
+def record(slug, name, description):
+    return {
+        "name": name, "project_type": "工具类", "maturity": "🟡 中", "status": "📋 规划中",
+        "description": description, "readme_path": f"ideaed-projects/{slug}/README.md",
+    }
+
+
+def catalog_row(readme_path, name, description):
+    return {
+        "id": 1, "version": 3, "name": name, "project_type": "AI应用", "maturity": "🟢 高", "status": "✅ 完成",
+        "description": description, "readme_path": readme_path, "source_url": None, "created_date": "2025-01-02",
+    }
+
+
+SCANNED = {
+    r["readme_path"]: r for r in (
+        record("new-idea", "新想法", "全新的项目"),
+        record("curated", "README标题", "README描述"),
+        record("placeholder", "真正的名称", "README描述"),
+    )
+}
+CATALOG = {
+    "ideaed-projects/curated/README.md": catalog_row("./ideaed-projects/curated/README.md", "整理过的名称", "整理过的描述"),
+    "ideaed-projects/placeholder/README.md": catalog_row("ideaed-projects/placeholder/README.md", "placeholder", None),
+}
+
+
+def test_diff_fills_gaps_and_keeps_curated_fields():
+    records, changes = cli.diff_catalog(SCANNED, CATALOG)
+    assert changes == {
+        "ideaed-projects/new-idea/README.md": ["new"],
+        "ideaed-projects/placeholder/README.md": ["name", "description"],
+    }
+    update = records[1]
+    assert (update["name"], update["description"], update["status"]) == ("真正的名称", "README描述", "✅ 完成")
+    assert set(update) == set(cli.BULK_FIELDS)
+
+
+def test_diff_overwrite_keeps_stored_readme_path():
+    records, changes = cli.diff_catalog(SCANNED, CATALOG, overwrite=True)
+    assert changes["ideaed-projects/curated/README.md"] == ["name", "description"]
+    curated = next(r for r in records if r["name"] == "README标题")
+    assert curated["readme_path"] == "./ideaed-projects/curated/README.md"
+
+
+def run_without_server_stack(*args):
+    return subprocess.run(
+        [sys.executable, "-c", WITHOUT_SERVER_STACK, *args],
+        cwd=pathlib.Path(cli.__file__).parent.parent, capture_output=True, text=True, check=True,
+    ).stdout
+
+
+def test_http_commands_do_not_import_the_server_stack():
+    assert "Hello from nav-admin!" in run_without_server_stack("hello")
+    assert "--direct needs the server's dependencies" in run_without_server_stack("--direct", "hello")
+
+
+@pytest.fixture
+def direct(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'catalog.db'}")
+    monkeypatch.setattr(cli, "direct_mode", True)
+    monkeypatch.setattr(cli, "_direct_sessions", None)
+    monkeypatch.setattr(cli, "_direct_index_loaded", False)
+    yield tmp_path / "catalog.db"
+    duplicates.index.clear()
+
+
+def test_direct_bulk_upserts_in_process(direct):
+    records = [record("alpha", "Alpha", "第一个"), record("beta", "Beta", "第二个")]
+    assert cli.send_bulk(records)["created"] == 2
+    records[1]["description"] = "改过的描述"
+    summary = cli.send_bulk(records)
+    assert (summary["unchanged"], summary["updated"]) == (1, 1)
+    catalog = cli.fetch_catalog()
+    assert catalog["ideaed-projects/beta/README.md"]["description"] == "改过的描述"
+
+
+def test_direct_mode_signs_only_the_rows_it_writes(direct, monkeypatch):
+    cli.send_bulk([record("alpha", "Alpha", "第一个"), record("beta", "Beta", "第二个")])
+    with sqlite3.connect(direct) as connection:
+        connection.execute("DELETE FROM project_signatures WHERE project_id = 1")  # as after a shell edit
+    # A fresh nav-admin invocation.
+    monkeypatch.setattr(cli, "_direct_sessions", None)
+    duplicates.index.clear()
+    signed = []
+    monkeypatch.setattr(duplicates, "signature", lambda *text: signed.append(text) or SIGNATURE(*text))
+
+    created = cli.create_project(record("beta-2", "Beta", "第二个"))
+    assert [duplicate["id"] for duplicate in created["possible_duplicates"]] == [2]
+    assert signed == [("Beta", "第二个")] * 2  # the new row and its duplicate check; project 1 stays unsigned
+
+
+SIGNATURE = duplicates.signature
+
+
+def test_direct_transactions_take_the_write_lock_up_front(direct):
+    engine = database.make_direct_engine()
+    database.init_db(engine)
+    with engine.connect() as connection, connection.begin():
+        connection.execute(text("SELECT 1"))  # a read still holds the write lock
+        other = sqlite3.connect(direct, timeout=0)
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("INSERT INTO linked_files VALUES ('x', 1, 1)")
+        other.close()
+    assert sqlite3.connect(direct).execute("PRAGMA journal_mode").fetchone() == ("wal",)
@@ -0,0 +1,59 @@
+import gzip
+
+from conftest import project
+from app import compression
+
+STYLE = "/assets/style.css"
+
+
+def test_static_files_are_served_from_stored_variants(client):
+    identity = client.get(STYLE, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(STYLE, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    assert "accept-encoding" in compressed.headers["vary"].lower()
+    assert compressed.content == identity.content  # decoded by the client
+    assert int(compressed.headers["content-length"]) < len(identity.content)
+
+    revalidated = client.get(STYLE, headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_range_requests_get_identity_bytes(client):
+    full = client.get(STYLE, headers={"Accept-Encoding": "identity"}).content
+    partial = client.get(STYLE, headers={"Accept-Encoding": "gzip, br", "Range": "bytes=10-29"})
+    assert partial.status_code == 206
+    assert "content-encoding" not in partial.headers
+    assert partial.headers["content-range"] == f"bytes 10-29/{len(full)}"
+    assert partial.content == full[10:30]
+
+
+def test_dynamic_responses_are_compressed_above_the_minimum_size(client):
+    for i in range(10):
+        client.post("/api/projects", json=project(readme_path=f"ideaed-projects/p{i}/README.md"))
+    listed = client.get("/api/projects", headers={"Accept-Encoding": "gzip"})
+    assert listed.headers["content-encoding"] == "gzip"
+    assert len(listed.json()) == 10
+
+    single = client.get("/api/projects", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in single.headers  # under NAVIGATOR_COMPRESS_MIN_BYTES
+
+    exported = client.get("/api/projects/export", headers={"Accept-Encoding": "gzip"}, params={"format": "csv"})
+    assert exported.headers["content-encoding"] == "gzip"
+    assert exported.text.count("\n") == 11
+
+
+def test_savings_are_tallied_per_route(client):
+    compression.stats.clear()
+    client.get(STYLE, headers={"Accept-Encoding": "gzip"})
+    client.get(STYLE, headers={"Accept-Encoding": "identity"})
+    assets = client.get("/api/compression/stats").json()["/assets"]
+    assert (assets["responses"], assets["compressed"]) == (2, 1)
+    assert assets["bytes_saved"] == assets["bytes_in"] - assets["bytes_out"] > 0
+
+
+def test_gzip_helpers_round_trip():
+    body = "数据平台".encode("utf-8") * 200
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
+    assert compression.negotiate("gzip;q=0.5, identity") == "gzip"
+    assert compression.negotiate("gzip;q=0") is None
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import project
+
+
+@pytest.fixture
+def created(client):
+    return client.post("/api/projects", json=project()).json()
+
+
+def test_get_sends_the_version_as_etag(client, created):
+    response = client.get(f"/api/projects/{created['id']}")
+    assert response.headers["ETag"] == '"1"'
+    assert client.get("/api/projects/999").status_code == 404
+
+
+def test_if_match_guards_against_lost_updates(client, created):
+    url = f"/api/projects/{created['id']}"
+    first = client.patch(url, json={"status": "✅ 完成"}, headers={"If-Match": '"1"'})
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"2"'
+
+    stale = client.patch(url, json={"status": "🚧 进行中"}, headers={"If-Match": '"1"'})
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] == '"2"'
+    assert client.get(url).json()["status"] == "✅ 完成"
+
+
+def test_put_replaces_and_honors_if_match(client, created):
+    url = f"/api/projects/{created['id']}"
+    replaced = client.put(url, json=project(name="新名称"), headers={"If-Match": '"1"'})
+    assert (replaced.status_code, replaced.json()["name"], replaced.json()["version"]) == (200, "新名称", 2)
+    assert client.put(url, json=project(), headers={"If-Match": '"1"'}).status_code == 412
+
+
+@pytest.mark.parametrize("header", [None, "*"])
+def test_unconditional_writes_always_apply(client, created, header):
+    headers = {"If-Match": header} if header else {}
+    response = client.patch(f"/api/projects/{created['id']}", json={"name": "改名"}, headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("header", ['W/"1"', '"1", "2"', "1"])
+def test_unusable_if_match_fails_the_precondition(client, created, header):
+    assert client.patch(f"/api/projects/{created['id']}", json={"name": "x"}, headers={"If-Match": header}).status_code == 412
+
+
+def test_conflicting_readme_path_and_missing_project(client, created):
+    other = client.post("/api/projects", json=project(readme_path="ideaed-projects/other/README.md")).json()
+    assert client.patch(f"/api/projects/{other['id']}", json={"readme_path": created["readme_path"]}).status_code == 409
+    assert client.patch("/api/projects/999", json={"name": "x"}).status_code == 404
@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app import duplicates, models, search
+
+PROJECTS = [
+    ("数据平台决策工具包", "帮助团队评估数据平台架构的决策框架与评分模型"),
+    ("AI销售教练", "用代理AI为销售人员提供实时指导，突破业绩停滞"),
+    ("Regularization deep dive", "L1 L2 dropout regularization for deep learning models"),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for trigger in models.Project.__table__.info["triggers"]:
+            connection.execute(text(trigger))
+        search.create_index(connection)
+        connection.execute(models.Project.__table__.insert(), [
+            {"name": name, "description": description, "readme_path": f"ideaed-projects/p{i}/README.md"}
+            for i, (name, description) in enumerate(PROJECTS, start=1)
+        ])
+    yield engine
+    duplicates.index.clear()
+
+
+def test_signature_agreement_estimates_jaccard():
+    words = [f"word{i}" for i in range(100)]
+    first = duplicates.signature(" ".join(words[:80]), "")
+    second = duplicates.signature(" ".join(words[20:]), "")  # Jaccard 60 / 100
+    assert duplicates.estimate_similarity(first, second) == pytest.approx(0.6, abs=0.12)
+    assert duplicates.estimate_similarity(first, first) == 1.0
+
+
+def test_index_finds_near_duplicates_only():
+    index = duplicates.LshIndex()
+    for project_id, (name, description) in enumerate(PROJECTS, start=1):
+        index.add(project_id, duplicates.signature(name, description))
+    found = index.query(duplicates.signature("数据平台决策工具", "帮助团队评估数据平台架构的决策框架和评分模型"))
+    assert [d.project_id for d in found] == [1]
+    assert index.query(duplicates.signature(*PROJECTS[0]), exclude=1) == []
+    index.remove(1)
+    assert index.query(duplicates.signature(*PROJECTS[0])) == []
+
+
+def test_startup_signs_missing_and_stale_projects(engine):
+    assert duplicates.init_duplicate_index(engine) == (3, 3)
+    assert duplicates.init_duplicate_index(engine) == (0, 3)
+    with engine.begin() as connection:
+        table = models.Project.__table__
+        # Edited outside the app: the version trigger makes the signature stale.
+        connection.execute(table.update().where(table.c.id == 3).values(description="AI销售教练 代理AI 实时指导"))
+        connection.execute(table.delete().where(table.c.id == 2))
+    assert duplicates.init_duplicate_index(engine) == (1, 2)
+    with engine.connect() as connection:
+        assert connection.execute(select(models.ProjectSignature.project_id)).scalars().all() == [1, 3]
+
+
+def test_startup_without_signing_loads_stored_signatures_only(engine):
+    assert duplicates.init_duplicate_index(engine, sign=False) == (0, 0)
+    with Session(engine) as db:
+        db.get(models.Project, 2).status = "完成"  # signed when next written
+        db.commit()
+    assert duplicates.init_duplicate_index(engine, sign=False) == (0, 1)
+
+
+def test_orm_insert_is_signed_and_flagged(engine):
+    duplicates.init_duplicate_index(engine)
+    with Session(engine) as db:
+        db.add(models.Project(name="AI 销售教练", description="用代理AI为销售人员提供实时指导，突破业绩停滞期", readme_path="ideaed-projects/coach/README.md"))
+        db.commit()
+    assert len(duplicates.index) == 4
+    project = models.Project(name="AI销售教练", description="用代理AI为销售人员提供实时指导，突破业绩瓶颈")
+    assert [d.project_id for d in duplicates.find_duplicates(project)] == [2, 4]
+
+
+def test_rolled_back_writes_never_reach_the_index(engine):
+    duplicates.init_duplicate_index(engine)
+    with Session(engine) as db:
+        db.add(models.Project(name="AI 销售教练", description="用代理AI为销售人员提供实时指导", readme_path="ideaed-projects/coach/README.md"))
+        db.flush()
+        db.rollback()
+    with pytest.raises(RuntimeError):
+        with engine.begin() as connection:
+            duplicates.remove_signatures(connection, [1])
+            raise RuntimeError
+    assert len(duplicates.index) == 3
+    assert [d.project_id for d in duplicates.find_duplicates(models.Project(name=PROJECTS[0][0], description=PROJECTS[0][1]))] == [1]
+
+
+def test_changes_committed_during_a_load_are_kept(engine):
+    duplicates.init_duplicate_index(engine)
+    loaded = duplicates.LshIndex()
+    loaded.add(1, duplicates.signature(*PROJECTS[0]))
+    duplicates.index.start_loading()
+    duplicates.index.remove(2)
+    duplicates.index.add(9, duplicates.signature(*PROJECTS[1]))
+    duplicates.index.finish_loading(loaded)
+    assert sorted(d.project_id for d in duplicates.find_duplicates(models.Project(name=PROJECTS[1][0], description=PROJECTS[1][1]))) == [9]
+    assert len(duplicates.index) == 2
+
+
+def test_failed_startup_load_is_logged(monkeypatch, caplog):
+    import asyncio
+
+    from app import main
+
+    def init_duplicate_index(engine):
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(duplicates, "init_duplicate_index", init_duplicate_index)
+    asyncio.run(main.load_duplicate_index())
+    assert "Duplicate index load failed" in caplog.text
@@ -0,0 +1,67 @@
+import asyncio
+import csv
+import functools
+import io
+import json
+
+from conftest import project
+from app import crud, database, main
+
+
+def export(client, **params):
+    response = client.get("/api/projects/export", params=params)
+    assert response.status_code == 200
+    return response
+
+
+def seed(client):
+    for i, maturity in enumerate(["🟢 高", "🟡 中", "🟡 中"]):
+        client.post("/api/projects", json=project(name=f"项目{i}", maturity=maturity, readme_path=f"ideaed-projects/p{i}/README.md"))
+
+
+def test_ndjson_export_has_one_project_per_line(client):
+    seed(client)
+    response = export(client)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="projects.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["项目0", "项目1", "项目2"]
+    assert rows == [client.get(f"/api/projects/{row['id']}").json() for row in rows]
+
+
+def test_csv_export_has_a_header_and_filters(client):
+    seed(client)
+    rows = list(csv.DictReader(io.StringIO(export(client, format="csv", maturity="🟡 中", order="desc").text)))
+    assert [row["name"] for row in rows] == ["项目2", "项目1"]
+    assert set(rows[0]) == set(client.get("/api/projects", params={"limit": 1}).json()[0])
+    assert export(client, format="csv", status="✅ 完成").text.splitlines() == [",".join(rows[0])]
+
+
+def test_disconnect_returns_the_read_connection(client, monkeypatch):
+    seed(client)
+    monkeypatch.setattr(crud, "iter_project_batches", functools.partial(crud.iter_project_batches, batch_size=1))
+    first_chunk = asyncio.Event()
+    chunks = []
+
+    async def receive():
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message["body"]:
+            chunks.append(message["body"])
+            first_chunk.set()
+
+    async def run():
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/projects/export", "raw_path": b"/api/projects/export",
+            "query_string": b"", "root_path": "", "headers": [], "client": ("test", 1), "server": ("test", 80),
+        }
+        await main.app(scope, receive, send)
+        for _ in range(10):  # let a pending close finish
+            await asyncio.sleep(0)
+        return database.read_engine.pool.checkedout()
+
+    assert asyncio.run(run()) == 0
+    assert len(chunks) < 3  # stopped early
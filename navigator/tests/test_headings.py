@@ -0,0 +1,49 @@
+from app import headings
+
+DOCUMENT = """# 项目分析
+
+简介。
+
+## 📊 市场分析
+
+```python
+# not a heading
+```
+
+### 目标用户 ###
+
+## 市场分析
+
+~~~
+```
+## still code
+~~~
+
+## [链接](https://example.com) and `code`
+"""
+
+
+def test_headings_and_anchors():
+    index = headings.build_index(DOCUMENT)
+    assert [(h.level, h.title, h.anchor) for h in index.headings] == [
+        (1, "项目分析", "项目分析"),
+        (2, "📊 市场分析", "-市场分析"),
+        (3, "目标用户", "目标用户"),
+        (2, "市场分析", "市场分析"),
+        (2, "链接 and code", "链接-and-code"),
+    ]
+
+
+def test_section_spans_subsections():
+    index = headings.build_index(DOCUMENT)
+    section = index.by_anchor["-市场分析"]
+    text = DOCUMENT[section.start:section.end]
+    assert text.startswith("## 📊 市场分析") and "### 目标用户" in text
+    assert "## 市场分析" not in text.replace("## 📊 市场分析", "")
+    assert index.by_anchor["项目分析"].end == len(DOCUMENT)
+
+
+def test_repeated_titles_get_numbered_anchors():
+    index = headings.build_index("## FAQ\n\n## FAQ\n\n## FAQ\n")
+    assert [h.anchor for h in index.headings] == ["faq", "faq-1", "faq-2"]
+    assert [h.line for h in index.headings] == [1, 3, 5]
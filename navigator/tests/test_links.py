@@ -0,0 +1,31 @@
+from app import links
+
+SOURCE = "ideaed-projects/alpha/docs/guide.md"
+
+
+def test_resolve_target():
+    assert links.resolve_target(SOURCE, "../README.md") == "ideaed-projects/alpha/README.md"
+    assert links.resolve_target(SOURCE, "../../beta/README.md#usage") == "ideaed-projects/beta/README.md"
+    assert links.resolve_target(SOURCE, "../../../%E9%A1%B9%E7%9B%AE%E5%AF%BC%E8%88%AA.md") == "项目导航.md"
+    assert links.resolve_target(SOURCE, "HTTPS://Example.COM/a/b/?q=1#top") == "https://example.com/a/b?q=1"
+    assert links.resolve_target(SOURCE, "#section") is None
+    assert links.resolve_target(SOURCE, "mailto:someone@example.com") is None
+    assert links.resolve_target(SOURCE, "../../../../outside.md") is None
+
+
+def test_extract_links():
+    text = """# Guide
+See [Beta](../../beta/README.md "title") and ![diagram](img.png).
+Cited: <mcreference link="https://example.com/post/" index="1">**Post**</mcreference>, <https://example.org>.
+Inline `[code](../../gamma/README.md)` is skipped, and so is a fenced block:
+```
+[fenced](../../delta/README.md)
+```
+[ref]: https://example.com/post
+[Beta again](../../beta/README.md)
+"""
+    assert links.extract_links(SOURCE, text) == [
+        links.Link("ideaed-projects/beta/README.md", "beta", "Beta"),
+        links.Link("https://example.com/post", None, "Post"),
+        links.Link("https://example.org", None, None),
+    ]
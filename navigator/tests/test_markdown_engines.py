@@ -0,0 +1,112 @@
+"""
+Output equivalence of the /view markdown engines.
+
+Engines differ in whitespace, attribute details and syntax highlighting, so
+pages are compared by the elements a reader relies on: headings, table
+cells, code blocks, links and images, each with its text.
+"""
+import html.parser
+import pathlib
+import re
+import urllib.parse
+
+import pytest
+
+from app import markdown_engines, render
+
+CORPUS_DIR = pathlib.Path(__file__).resolve().parents[2] / "ideaed-projects"
+CORPUS = sorted(CORPUS_DIR.rglob("*.md"))
+
+ALTERNATIVES = [name for name in markdown_engines.ENGINES if name != "markdown2"]
+
+
+class _Outline(html.parser.HTMLParser):
+    ELEMENTS = {"h1", "h2", "h3", "h4", "h5", "h6", "th", "td", "pre", "a", "img"}
+
+    def __init__(self):
+        super().__init__()
+        self.open = []
+        self.items = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.ELEMENTS:
+            attrs = dict(attrs)
+            # markdown-it percent-encodes non-ASCII URLs; markdown2 leaves them as written.
+            target = urllib.parse.unquote(attrs.get("href") or attrs.get("src") or "")
+            self.open.append((tag, target, []))
+            if tag == "img":
+                self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.open and self.open[-1][0] == tag:
+            tag, target, text = self.open.pop()
+            self.items.append((tag, target, re.sub(r"\s+", " ", "".join(text)).strip()))
+
+    def handle_data(self, data):
+        for _, _, text in self.open:
+            text.append(data)
+
+
+def outline(html_fragment):
+    parser = _Outline()
+    parser.feed(html_fragment)
+    parser.close()
+    return parser.items
+
+
+@pytest.fixture(scope="module", params=ALTERNATIVES)
+def engine(request):
+    try:
+        return markdown_engines.get_renderer(request.param)
+    except ImportError as e:
+        pytest.skip(f"{request.param} is not installed: {e}")
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return markdown_engines.get_renderer("markdown2")
+
+
+SNIPPETS = {
+    "headings": "# 项目标题\n\n## 1. 背景\n\n### Sub *heading*\n",
+    "emphasis": "普通文本 **加粗** *斜体* `code` 与 [链接](../项目导航.md)\n",
+    "list": "说明：\n\n- **一**：第一项\n- 第二项\n  - 嵌套\n\n1. 步骤\n2. 步骤\n",
+    "table": "| 指标 | 数值 |\n|---|---:|\n| 用户 | 1000 |\n| **收入** | `42` |\n",
+    "fenced code": "```python\ndef f(x):\n    return x * 2  # 注释\n```\n",
+    "fence inside code": "```python\npattern = '```json'\n```\n\n```\nplain\n```\n",
+    "inline html": '结论：<mcreference link="https://example.com" index="1">来源</mcreference>\n',
+    "image": "![架构图](docs/arch.png)\n",
+}
+
+
+@pytest.mark.parametrize("text", SNIPPETS.values(), ids=list(SNIPPETS))
+def test_snippets_match_markdown2(engine, reference, text):
+    assert outline(engine(text)) == outline(reference(text))
+
+
+@pytest.mark.skipif(not CORPUS, reason="ideaed-projects is not available")
+@pytest.mark.parametrize("path", CORPUS, ids=[str(p.relative_to(CORPUS_DIR)) for p in CORPUS])
+def test_corpus_matches_markdown2(engine, reference, path):
+    text = path.read_text(encoding="utf-8")
+    assert outline(engine(text)) == outline(reference(text))
+
+
+def test_list_after_paragraph_line_is_a_known_difference():
+    text = "版本历史：\n- v1.0\n- v1.1\n"
+    assert "<li>" not in markdown_engines.get_renderer("markdown2")(text)
+    for name in ALTERNATIVES:
+        try:
+            renderer = markdown_engines.get_renderer(name)
+        except ImportError:
+            continue
+        assert "<li>v1.0</li>" in renderer(text)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="markdown-it"):
+        markdown_engines.get_renderer("commonmark")
+
+
+def test_render_html_uses_configured_engine(monkeypatch):
+    monkeypatch.setattr(render, "render_markdown", lambda text: "<p>engine output</p>")
+    assert "<p>engine output</p>" in render.render_html("# ignored", "doc.md")
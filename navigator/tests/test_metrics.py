@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import project
+from app import metrics
+
+
+def test_metric_types_must_render_samples():
+    with pytest.raises(TypeError):
+        metrics._Metric("navigator_test", "A metric without samples.")
+
+
+def test_histogram_exposition():
+    histogram = metrics.Histogram("navigator_test_seconds", "Test latency.", ["route"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    assert histogram.render() == [
+        "# HELP navigator_test_seconds Test latency.",
+        "# TYPE navigator_test_seconds histogram",
+        'navigator_test_seconds_bucket{route="/a",le="0.1"} 1',
+        'navigator_test_seconds_bucket{route="/a",le="1.0"} 2',
+        'navigator_test_seconds_bucket{route="/a",le="+Inf"} 2',
+        'navigator_test_seconds_sum{route="/a"} 0.55',
+        'navigator_test_seconds_count{route="/a"} 2',
+    ]
+
+
+def test_fingerprint_folds_literals_and_in_lists():
+    assert metrics.fingerprint("SELECT * FROM projects WHERE id IN (1, 2, 3) AND name = 'x'") == (
+        "SELECT * FROM projects WHERE id IN (?) AND name = ?"
+    )
+
+
+def test_statement_labels_are_short_and_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "_statement_labels", {})
+    monkeypatch.setattr(metrics, "MAX_STATEMENT_LABELS", 2)
+    long_statement = "SELECT " + ", ".join(f"column_{i}" for i in range(100)) + " FROM projects"
+    label = metrics.statement_label(long_statement)
+    assert metrics.statement_label(long_statement.replace(" FROM", "\n  FROM")) == label  # same fingerprint
+    assert len(label) == 8 + 1 + metrics.STATEMENT_LABEL_CHARS
+    assert metrics.statement_label("SELECT 2") != label
+    assert metrics.statement_label("SELECT * FROM links") == metrics.OTHER_STATEMENT
+
+
+def test_metrics_endpoint_counts_routes_and_statements(client):
+    client.post("/api/projects", json=project())
+    client.get("/api/projects")
+    body = client.get("/metrics").text
+    assert 'navigator_http_responses_total{method="GET",route="/api/projects",status="200"}' in body
+    statement_lines = [line for line in body.splitlines() if line.startswith("navigator_db_queries_total{")]
+    assert statement_lines
+    longest = max(len(line) for line in statement_lines)
+    assert longest < 120
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from app import database, models
+
+DATES = [datetime.date(2025, 3, 1), None, datetime.date(2025, 1, 1), datetime.date(2025, 3, 1), None, datetime.date(2025, 2, 1)]
+
+
+@pytest.fixture
+def catalog(client):
+    """Six projects, two without a created_date (as imported from the sqlite3 shell)."""
+    with database.engine.begin() as connection:
+        connection.execute(models.Project.__table__.insert(), [
+            {
+                "name": f"项目{i}", "project_type": "工具类" if i % 2 else "AI应用", "maturity": "🟡 中", "status": "📋 规划中",
+                "readme_path": f"ideaed-projects/p{i}/README.md", "created_date": date,
+            }
+            for i, date in enumerate(DATES, start=1)
+        ])
+    return client
+
+
+def all_pages(client, limit, **params):
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/projects", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("sort", ["created_date", "name", "id"])
+def test_cursor_pages_cover_every_row_once(catalog, sort, order):
+    expected = [row["id"] for row in catalog.get("/api/projects", params={"sort": sort, "order": order}).json()]
+    assert sorted(expected) == [1, 2, 3, 4, 5, 6]
+    for limit in (1, 2, 4):
+        assert all_pages(catalog, limit, sort=sort, order=order) == expected
+
+
+def test_null_dates_sort_first_ascending_and_last_descending(catalog):
+    assert all_pages(catalog, 2) == [2, 5, 3, 6, 1, 4]
+    assert all_pages(catalog, 2, order="desc") == [4, 1, 6, 3, 5, 2]
+
+
+def test_cursor_pages_follow_filters(catalog):
+    assert all_pages(catalog, 1, project_type="工具类") == [5, 3, 1]
+    assert all_pages(catalog, 1, type="AI应用", order="desc") == [4, 6, 2]
+
+
+def test_skip_and_invalid_cursor(catalog):
+    assert [row["id"] for row in catalog.get("/api/projects", params={"skip": 4}).json()] == [1, 4]
+    assert catalog.get("/api/projects", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_projects_without_a_created_date_are_served(catalog):
+    assert catalog.get("/api/projects/2").json()["created_date"] is None
+    patched = catalog.patch("/api/projects/2", json={"status": "✅ 完成"})
+    assert patched.status_code == 200
+    assert patched.json()["created_date"] is None
+    replaced = catalog.put("/api/projects/5", json={"name": "项目5", "project_type": "工具类", "maturity": "🟡 中", "status": "📋 规划中", "readme_path": "ideaed-projects/p5/README.md"})
+    assert (replaced.status_code, replaced.json()["created_date"]) == (200, None)
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import querybudget
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    querybudget.instrument_engine(engine)
+    return engine
+
+
+def make_client(engine, enforce: bool) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(querybudget.QueryBudgetMiddleware, enforce=enforce)
+
+    def run(count: int):
+        with engine.connect() as connection:
+            for _ in range(count):
+                connection.execute(text("SELECT 1"))
+
+    @app.get("/run/{count}")
+    def run_queries(count: int):
+        run(count)
+        return {"ran": count}
+
+    @app.get("/stream/{count}")
+    def stream_queries(count: int):
+        def body():
+            yield b"started\n"
+            run(count)  # after the response has started
+            yield b"done\n"
+        return StreamingResponse(body())
+
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    monkeypatch.setitem(querybudget.ROUTE_BUDGETS, ("GET", "/run/{count}"), 2)
+    monkeypatch.setitem(querybudget.ROUTE_BUDGETS, ("GET", "/stream/{count}"), 2)
+
+
+def test_within_budget_reports_server_timing(engine, caplog):
+    response = make_client(engine, enforce=True).get("/run/2")
+    assert response.status_code == 200
+    assert response.headers["server-timing"].endswith('desc="2 queries"')
+    assert not caplog.records
+
+
+def test_over_budget_is_logged_when_not_enforced(engine, caplog):
+    response = make_client(engine, enforce=False).get("/run/3")
+    assert response.json() == {"ran": 3}
+    assert "GET /run/{count} ran 3 statements (budget 2)" in caplog.text
+    assert caplog.records[0].levelno == logging.WARNING
+
+
+def test_over_budget_fails_before_the_response_when_enforced(engine, caplog):
+    response = make_client(engine, enforce=True).get("/run/3")
+    assert response.status_code == 500
+    assert "ran 3 statements (budget 2)" in response.text
+    assert "SELECT ?" in response.text
+    assert "server-timing" not in response.headers
+    assert caplog.records[0].levelno == logging.ERROR
+
+
+def test_statements_after_the_response_started_are_only_logged(engine, caplog):
+    response = make_client(engine, enforce=True).get("/stream/3")
+    assert (response.status_code, response.text) == (200, "started\ndone\n")
+    assert "ran 3 statements (budget 2)" in caplog.text
+
+
+def test_slow_statements_are_logged_with_their_plan(engine, caplog, monkeypatch):
+    monkeypatch.setattr(querybudget, "SLOW_QUERY_MS", 0)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert "Slow query" in caplog.text
+    assert "SCAN CONSTANT ROW" in caplog.text
@@ -0,0 +1,55 @@
+from conftest import project
+
+from app import search
+
+
+def test_segment():
+    assert search.segment("数据平台 for AI") == "数据 据平 平台 台 for ai"
+    assert search.segment("表") == "表"
+    assert search.segment("AI销售教练v2") == "ai 销售 售教 教练 练 v2"
+
+
+def test_build_match_query():
+    assert search.build_match_query("数据平台 AI") == '"数据 据平 平台" AND "ai"*'
+    assert search.build_match_query("数") == '"数"*'
+    assert search.build_match_query("!!") is None
+
+
+def search_names(client, query):
+    response = client.get("/api/projects/search", params={"q": query})
+    assert response.status_code == 200
+    return [hit["name"] for hit in response.json()]
+
+
+def test_search_matches_substrings(client):
+    client.post("/api/projects", json=project(name="数据平台决策工具包", readme_path="ideaed-projects/a/README.md"))
+    client.post("/api/projects", json=project(
+        name="交互式仪表", description="Interactive dashboard", readme_path="ideaed-projects/b/README.md",
+    ))
+    assert search_names(client, "平台决策") == ["数据平台决策工具包"]
+    assert search_names(client, "dash") == ["交互式仪表"]
+    assert search_names(client, "平台 dash") == []
+
+
+def test_single_cjk_character_matches_anywhere_in_a_run(client):
+    client.post("/api/projects", json=project(
+        name="交互式仪表", description="Interactive dashboard", readme_path="ideaed-projects/b/README.md",
+    ))
+    assert search_names(client, "交") == ["交互式仪表"]  # first character of the run
+    assert search_names(client, "式") == ["交互式仪表"]
+    assert search_names(client, "表") == ["交互式仪表"]  # last character of the run
+    assert search_names(client, "数") == []
+
+
+def test_mixed_script_text_matches_each_part(client):
+    client.post("/api/projects", json=project(name="AI销售教练", readme_path="ideaed-projects/coach/README.md"))
+    assert search_names(client, "教练") == ["AI销售教练"]
+    assert search_names(client, "ai") == ["AI销售教练"]
+    assert search_names(client, "AI销售") == ["AI销售教练"]
+
+
+def test_search_follows_updates(client):
+    created = client.post("/api/projects", json=project(readme_path="ideaed-projects/a/README.md")).json()
+    client.patch(f"/api/projects/{created['id']}", json={"name": "销售教练"})
+    assert search_names(client, "销") == ["销售教练"]
+    assert search_names(client, "数据平台") == ["销售教练"]  # still in the description
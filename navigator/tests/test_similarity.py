@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import models, similarity
+
+np = pytest.importorskip("numpy")
+
+PROJECTS = [
+    ("数据平台决策工具包", "帮助团队评估数据平台架构的决策框架与评分模型"),
+    ("数据平台选型工具", "评估数据平台架构的决策框架，含评分模型与案例"),
+    ("AI销售教练", "用代理AI为销售人员提供实时指导，突破业绩停滞"),
+    ("Regularization deep dive", "L1 L2 dropout regularization for deep learning models"),
+    ("Dropout in practice", "dropout and weight decay regularization for deep learning"),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(models.Project.__table__.insert(), [
+            {"name": name, "description": description, "readme_path": f"ideaed-projects/p{i}/README.md"}
+            for i, (name, description) in enumerate(PROJECTS, start=1)
+        ])
+    return engine
+
+
+@pytest.fixture
+def index(engine, tmp_path):
+    report = similarity.build_index(engine, tmp_path / "index")
+    assert report.projects == len(PROJECTS)
+    return similarity.SimilarityIndex(tmp_path / "index")
+
+
+def test_nearest_neighbours(index):
+    assert [project_id for project_id, _ in index.top_k(*index.row_vector(0), k=1, exclude_row=0)] == [2]
+    assert [project_id for project_id, _ in index.top_k(*index.row_vector(3), k=1, exclude_row=3)] == [5]
+
+
+def test_scores_are_cosine_similarities(index):
+    columns, values = index.row_vector(1)
+    assert np.linalg.norm(values) == pytest.approx(1.0, abs=1e-6)
+    (project_id, score), = index.top_k(columns, values, k=1)
+    assert project_id == 2 and score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_unindexed_project_is_reported(index):
+    project = models.Project(id=99, name="销售AI助手", description="代理AI实时指导销售人员", readme_path="ideaed-projects/new/README.md")
+    with pytest.raises(similarity.NotIndexed):
+        index.similar_to(project, 1)
+
+
+def test_stale_index_is_rebuilt(engine, tmp_path):
+    directory = tmp_path / "index"
+    assert similarity.init_similarity_index(engine, directory, build=True).startswith("Built")
+    assert similarity.init_similarity_index(engine, directory, build=True) is None  # already current
+    with engine.begin() as connection:
+        connection.execute(models.Project.__table__.delete().where(models.Project.id == 5))
+    assert similarity.init_similarity_index(engine, directory, build=True).startswith("Built")
+    assert similarity.current().meta["projects"] == len(PROJECTS) - 1
+
+
+def test_readme_edit_makes_the_index_stale(engine, tmp_path, monkeypatch):
+    from app import scanner
+
+    monkeypatch.setattr(scanner, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(scanner, "PROJECTS_DIR", tmp_path / "ideaed-projects")
+    readme = tmp_path / "ideaed-projects" / "p3" / "README.md"
+    readme.parent.mkdir(parents=True)
+    readme.write_text("# AI销售教练\n", encoding="utf-8")
+    directory = tmp_path / "index"
+    assert similarity.init_similarity_index(engine, directory, build=True).startswith("Built")
+    assert similarity.init_similarity_index(engine, directory, build=True) is None
+    readme.write_text("# AI销售教练\n\ndropout regularization for deep learning\n", encoding="utf-8")
+    assert similarity.init_similarity_index(engine, directory, build=True).startswith("Built")
+    index = similarity.current()
+    assert [project_id for project_id, _ in index.top_k(*index.row_vector(2), k=1, exclude_row=2)] == [4]  # via the README
+
+
+def test_rebuild_swaps_whole_generations(engine, tmp_path):
+    directory = tmp_path / "index"
+    similarity.build_index(engine, directory)
+    first = similarity.SimilarityIndex(directory)
+    with engine.begin() as connection:
+        connection.execute(models.Project.__table__.delete().where(models.Project.id == 5))
+    similarity.build_index(engine, directory)
+    second = similarity.SimilarityIndex(directory)
+    assert second.generation != first.generation
+    assert (first.meta["projects"], second.meta["projects"]) == (len(PROJECTS), len(PROJECTS) - 1)
+    assert len(first.project_ids) == len(PROJECTS)  # still mapped from its own files
+    similarity.build_index(engine, directory)
+    # The generation just replaced is kept for readers caught mid-swap; older ones go.
+    assert sorted(path.name for path in directory.iterdir() if path.is_dir()) == sorted(
+        [second.generation, similarity.SimilarityIndex(directory).generation]
+    )
+
+
+def test_similar_endpoint_reports_projects_added_after_the_build(client, monkeypatch):
+    from conftest import project
+    from app import database
+
+    first = client.post("/api/projects", json=project()).json()
+    assert similarity.init_similarity_index(database.engine, build=True).startswith("Built")
+    second = client.post("/api/projects", json=project(readme_path="ideaed-projects/copy/README.md")).json()
+
+    assert client.get(f"/api/projects/{first['id']}/similar").json() == []
+    stale = client.get(f"/api/projects/{second['id']}/similar")
+    assert stale.status_code == 503
+    assert "stale" in stale.json()["detail"]
+    assert client.get("/api/projects/999/similar").status_code == 404
+    monkeypatch.setattr(similarity, "BUILD_ON_STARTUP", True)  # rebuilt by the server every REFRESH_INTERVAL
+    assert client.get(f"/api/projects/{second['id']}/similar").headers["Retry-After"] == "60"
+
+    assert similarity.init_similarity_index(database.engine, build=True).startswith("Built")
+    assert [hit["id"] for hit in client.get(f"/api/projects/{second['id']}/similar").json()] == [first["id"]]
+
+
+def test_refresh_loop_survives_a_failed_build(monkeypatch, caplog):
+    import asyncio
+
+    from app import main
+
+    calls = []
+
+    def init_similarity_index(engine):
+        calls.append(engine)
+        if len(calls) == 1:
+            raise OSError("No space left on device")
+        if len(calls) == 3:
+            raise asyncio.CancelledError
+        return None
+
+    monkeypatch.setattr(similarity, "init_similarity_index", init_similarity_index)
+    monkeypatch.setattr(similarity, "refresh_enabled", lambda: True)
+    monkeypatch.setattr(similarity, "REFRESH_INTERVAL", 0)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main.load_similarity_index())
+    assert len(calls) == 3
+    assert "Similarity index build failed" in caplog.text
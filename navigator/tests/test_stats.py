@@ -0,0 +1,30 @@
+from sqlalchemy import text
+
+from conftest import project
+from app import database, stats
+
+
+def test_counts_follow_every_write_path(client):
+    client.post("/api/projects", json=project(readme_path="ideaed-projects/a/README.md"))
+    created = client.post("/api/projects", json=project(readme_path="ideaed-projects/b/README.md")).json()
+    client.post("/api/projects/bulk", json=[project(project_type="AI应用", maturity="🟢 高", readme_path="ideaed-projects/c/README.md")])
+    client.patch(f"/api/projects/{created['id']}", json={"status": "✅ 完成"})
+    # Edited outside the app, as from the sqlite3 shell: the triggers still fire.
+    with database.engine.begin() as connection:
+        connection.execute(text("DELETE FROM projects WHERE readme_path = 'ideaed-projects/a/README.md'"))
+        connection.execute(text("INSERT INTO projects (name, readme_path, version) VALUES ('shell', 'ideaed-projects/d/README.md', 1)"))
+
+    assert client.get("/api/projects/stats").json() == {
+        "total": 3,
+        "by_type": {"工具类": 1, "AI应用": 1, "": 1},  # NULL facet values are counted under ""
+        "by_maturity": {"🟡 中": 1, "🟢 高": 1, "": 1},
+        "by_status": {"✅ 完成": 1, "📋 规划中": 1, "": 1},
+    }
+
+
+def test_startup_rebuilds_drifted_counts(client):
+    client.post("/api/projects", json=project())
+    with database.engine.begin() as connection:
+        connection.execute(text(f"DELETE FROM {stats.COUNTS_TABLE}"))
+    stats.init_facet_counts(database.engine)
+    assert client.get("/api/projects/stats").json()["by_type"] == {"工具类": 1}
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from app import main
+
+DOC = "ideaed-projects/idea/README.md"
+
+
+@pytest.fixture
+def docs(client, tmp_path, monkeypatch):
+    (tmp_path / "ideaed-projects" / "idea").mkdir(parents=True)
+    (tmp_path / DOC).write_text("# 想法\n\n" + "一段很长的描述。" * 200 + "\n", encoding="utf-8")
+    (tmp_path / "secret.md").write_text("# 不在项目目录中\n", encoding="utf-8")
+    monkeypatch.setattr(main, "base_dir", tmp_path)
+    monkeypatch.setattr(main, "projects_dir", tmp_path / "ideaed-projects")
+    return tmp_path
+
+
+def test_rendered_page_revalidates_with_etag_and_last_modified(docs, client):
+    page = client.get(f"/view/{DOC}", headers={"Accept-Encoding": "identity"})
+    assert page.status_code == 200
+    assert "<h1" in page.text and "想法" in page.text
+    assert page.headers["cache-control"] == "no-cache"
+
+    assert client.get(f"/view/{DOC}", headers={"If-None-Match": page.headers["etag"], "Accept-Encoding": "identity"}).status_code == 304
+    assert client.get(f"/view/{DOC}", headers={"If-Modified-Since": page.headers["last-modified"]}).status_code == 304
+
+
+def test_each_encoding_has_its_own_etag(docs, client):
+    identity = client.get(f"/view/{DOC}", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get(f"/view/{DOC}", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] != identity.headers["etag"]
+    assert gzipped.text == identity.text
+    stale = client.get(f"/view/{DOC}", headers={"Accept-Encoding": "gzip", "If-None-Match": identity.headers["etag"]})
+    assert stale.status_code == 200
+
+
+def test_edited_file_gets_a_new_etag(docs, client):
+    before = client.get(f"/view/{DOC}").headers["etag"]
+    path = docs / DOC
+    path.write_text("# 改过的想法\n", encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    after = client.get(f"/view/{DOC}", headers={"If-None-Match": before})
+    assert after.status_code == 200
+    assert "改过的想法" in after.text
+
+
+def test_only_files_under_the_projects_folder_are_served(docs, client):
+    assert client.get("/view/secret.md").status_code == 403
+    assert client.get("/view/ideaed-projects/idea/missing.md").status_code == 404
+
+
+def test_prerender_logs_failed_files_and_keeps_going(docs, caplog):
+    from app import render
+
+    (docs / "ideaed-projects" / "idea" / "broken.md").write_bytes(b"# \xff\xfe not utf-8\n")
+    report = render.prerender(docs / "ideaed-projects", max_workers=1)
+    assert (report.documents, report.failed) == (1, 1)
+    assert "Pre-rendering" in caplog.text and "broken.md" in caplog.text
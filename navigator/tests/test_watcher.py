@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import project
+from app import database, watcher
+
+
+@pytest.fixture
+def root(tmp_path, client):
+    return tmp_path
+
+
+@pytest.fixture
+def project_updates():
+    """The UPDATE statements run on the projects table."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE projects "):
+            statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(database.engine, "before_cursor_execute", record)
+
+
+def write_readme(root, slug, text):
+    (root / slug).mkdir(exist_ok=True)
+    (root / slug / "README.md").write_text(text, encoding="utf-8")
+
+
+def settle(project_watcher):
+    """Polls until the pending batch is applied (the debounce is zero)."""
+    assert project_watcher.poll() is None
+    return project_watcher.poll()
+
+
+def projects(client):
+    return {row["readme_path"]: row for row in client.get("/api/projects").json()}
+
+
+def test_new_readme_adds_a_project_and_removal_deletes_it(root, client):
+    project_watcher = watcher.ProjectWatcher(root, database.engine, interval=0, debounce=0)
+    write_readme(root, "coach", "# AI销售教练\n\n为销售人员提供实时指导。\n")
+    assert settle(project_watcher) == watcher.WatchReport(files=1, created=1, updated=0, deleted=0)
+    row = projects(client)["ideaed-projects/coach/README.md"]
+    assert (row["name"], row["description"]) == ("AI销售教练", "为销售人员提供实时指导。")
+    assert [hit["name"] for hit in client.get("/api/projects/search", params={"q": "教练"}).json()] == ["AI销售教练"]
+
+    (root / "coach" / "README.md").unlink()
+    assert settle(project_watcher).deleted == 1
+    assert projects(client) == {}
+    assert client.get("/api/projects/search", params={"q": "教练"}).json() == []
+
+
+def test_changed_readme_fills_a_missing_description_only(root, client, project_updates):
+    client.post("/api/projects", json=project(name="整理过的名称", readme_path="ideaed-projects/a/README.md"))
+    client.post("/api/projects", json=project(description=None, readme_path="ideaed-projects/b/README.md"))
+    project_watcher = watcher.ProjectWatcher(root, database.engine, interval=0, debounce=0)
+
+    write_readme(root, "a", "# README标题\n\n新的描述。\n")
+    write_readme(root, "b", "# README标题\n\n补上的描述。\n")
+    assert settle(project_watcher) == watcher.WatchReport(files=2, created=0, updated=1, deleted=0)
+    rows = projects(client)
+    assert (rows["ideaed-projects/a/README.md"]["name"], rows["ideaed-projects/a/README.md"]["version"]) == ("整理过的名称", 1)
+    assert rows["ideaed-projects/b/README.md"]["description"] == "补上的描述。"
+    assert len(project_updates) == 1
+
+    write_readme(root, "a", "# README标题\n\n又改了一次。\n")
+    assert settle(project_watcher).updated == 0
+    assert len(project_updates) == 1  # nothing to write back
+
+
+def test_errors_are_logged_and_the_watcher_keeps_running(root, caplog, monkeypatch):
+    project_watcher = watcher.ProjectWatcher(root, database.engine, interval=0, debounce=0)
+    calls = []
+
+    def poll():
+        calls.append(1)
+        if len(calls) == 2:
+            project_watcher.stop()
+        raise RuntimeError("disk gone")
+
+    monkeypatch.setattr(project_watcher, "poll", poll)
+    project_watcher.run()
+    assert len(calls) == 2
+    assert caplog.text.count("Project watcher error") == 2
+    assert "disk gone" in caplog.text